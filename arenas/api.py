@@ -1,17 +1,33 @@
-from datetime import datetime
-from django.utils.dateparse import parse_date
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Court
-from .availability import get_daily_booking_blocks
+from core.db_router import ReplicaReadMixin
+from .models import Court, OpenWindow, SlotTemplate, sport_type_matches
+from .availability import build_datetime, fresh_calendar, get_range_booking_blocks
+from .geo import haversine_km_expression, parse_point, within_cells_q
+from .cache import get_cached_daily_booking_blocks
+from .pricing import get_price_table, get_price_tables, priced_blocks
 
+# Limits for the range endpoint, so one call can't ask for the whole catalog
+MAX_RANGE_DAYS = 31
+MAX_RANGE_COURTS = 100
 
-class AvailabilityBlocksView(APIView):
+# Courts considered by one "any free court" search
+MAX_SEARCH_COURTS = 200
+
+
+class AvailabilityBlocksView(ReplicaReadMixin, APIView):
     """
     GET /api/v1/availability/blocks/?court_id=1&date=YYYY-MM-DD
     """
+    # court + windows + fallback templates + bookings (+ templates +
+    # rules for the price table) on a cache miss, court only on a hit
+    query_budget = 6
+
     def get(self, request):
         court_id = request.query_params.get("court_id")
         date_str = request.query_params.get("date")
@@ -34,15 +50,236 @@ class AvailabilityBlocksView(APIView):
         except Court.DoesNotExist:
             return Response({"detail": "Court not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        blocks = get_daily_booking_blocks(court, day)
+        blocks = get_cached_daily_booking_blocks(court, day)
+
+        return Response(priced_blocks(blocks, get_price_table(court)))
+
+
+class AvailabilityRangeView(ReplicaReadMixin, APIView):
+    """
+    GET /api/v1/availability/range/?arena_id=1&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+    GET /api/v1/availability/range/?court_ids=1,2,3&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+
+    Blocks for every court and every day in the range (end_date inclusive),
+    computed with a fixed number of queries.
+    """
+    # courts + windows + fallback templates + bookings (+ templates +
+    # rules for uncached price tables), whatever the range size
+    query_budget = 6
+
+    def get(self, request):
+        arena_id = request.query_params.get("arena_id")
+        court_ids_str = request.query_params.get("court_ids")
+        start_str = request.query_params.get("start_date")
+        end_str = request.query_params.get("end_date")
+
+        if not (arena_id or court_ids_str) or not start_str or not end_str:
+            return Response(
+                {"detail": "arena_id or court_ids, start_date and end_date are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        start_date = parse_date(start_str)
+        end_date = parse_date(end_str)
+        if not start_date or not end_date:
+            return Response(
+                {"detail": "Invalid date format. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if end_date < start_date:
+            return Response(
+                {"detail": "end_date must not be before start_date"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+            return Response(
+                {"detail": f"Date range is limited to {MAX_RANGE_DAYS} days"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        courts = Court.objects.filter(is_active=True)
+        if arena_id:
+            courts = courts.filter(arena_id=arena_id, arena__is_active=True)
+        if court_ids_str:
+            try:
+                court_ids = [int(c) for c in court_ids_str.split(",") if c.strip()]
+            except ValueError:
+                return Response(
+                    {"detail": "court_ids must be a comma-separated list of integers"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if len(court_ids) > MAX_RANGE_COURTS:
+                return Response(
+                    {"detail": f"At most {MAX_RANGE_COURTS} courts per request"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            courts = courts.filter(id__in=court_ids)
+
+        court_ids = list(courts.values_list("id", flat=True)[:MAX_RANGE_COURTS])
+        if not court_ids:
+            return Response({"detail": "Court not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        blocks_by_court = get_range_booking_blocks(court_ids, start_date, end_date)
+        price_tables = get_price_tables(court_ids)
 
-        # Serialize datetimes to ISO strings
         data = [
             {
-                "start": b["start"].isoformat(),
-                "end": b["end"].isoformat(),
+                "court_id": court_id,
+                "days": [
+                    {
+                        "date": day.isoformat(),
+                        "blocks": priced_blocks(blocks, price_tables[court_id]),
+                    }
+                    for day, blocks in per_day.items()
+                ],
             }
-            for b in blocks
+            for court_id, per_day in blocks_by_court.items()
         ]
 
         return Response(data)
+
+
+class FreeCourtSearchView(ReplicaReadMixin, APIView):
+    """
+    GET /api/v1/availability/search/?arena_id=1&sport_type=padel&date=YYYY-MM-DD&start=19:00&end=20:30
+    GET /api/v1/availability/search/?lat=..&lng=..&radius_km=10&sport_type=padel&date=YYYY-MM-DD&start=19:00
+
+    Courts that have a free preset block covering [start, end) on that date.
+    Without `end`, any free block containing `start` matches.
+    """
+    # courts (with window / template coverage prefilter) + windows +
+    # fallback templates + bookings (+ templates + rules for uncached
+    # price tables)
+    query_budget = 6
+
+    def get(self, request):
+        params = request.query_params
+        sport_type = params.get("sport_type")
+        date_str = params.get("date")
+        start_str = params.get("start")
+
+        if not sport_type or not date_str or not start_str:
+            return Response(
+                {"detail": "sport_type, date and start are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        day = parse_date(date_str)
+        if not day:
+            return Response(
+                {"detail": "Invalid date format. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        start_time = parse_time(start_str)
+        end_time = parse_time(params["end"]) if params.get("end") else None
+        if not start_time or (params.get("end") and not end_time):
+            return Response(
+                {"detail": "Invalid time format. Use HH:MM"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if end_time and end_time <= start_time:
+            return Response(
+                {"detail": "end must be after start"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        courts = Court.objects.filter(
+            sport_type_matches(sport_type),
+            is_active=True,
+            arena__is_active=True,
+        )
+
+        point = None
+        if params.get("arena_id"):
+            try:
+                arena_id = int(params["arena_id"])
+            except ValueError:
+                return Response(
+                    {"detail": "arena_id must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            courts = courts.filter(arena_id=arena_id).order_by("arena_id", "name")
+        else:
+            try:
+                point = parse_point(params)
+            except ValueError as exc:
+                return Response(
+                    {"detail": f"arena_id or a location is required: {exc}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            lat, lng, radius_km = point
+            # radius and nearest-first in SQL, so the cap keeps the closest
+            courts = (
+                courts.filter(within_cells_q(lat, lng, radius_km, field="arena__geo_cell"))
+                .annotate(distance_km=haversine_km_expression(
+                    lat, lng, "arena__latitude", "arena__longitude",
+                ))
+                .filter(distance_km__lte=radius_km)
+                .order_by("distance_km", "arena_id", "name")
+            )
+
+        tz = timezone.get_current_timezone()
+        window_start = build_datetime(day, start_time, tz)
+        window_end = build_datetime(day, end_time, tz) if end_time else None
+
+        # Only courts open over the whole window can match, filter the
+        # rest out in SQL: an index range scan of the materialized
+        # windows, or the weekly templates where the calendar isn't fresh
+        covering_window = OpenWindow.objects.filter(
+            court=OuterRef("pk"),
+            date=day,
+            start__lte=window_start,
+        )
+        covering_template = SlotTemplate.objects.filter(
+            court=OuterRef("pk"),
+            weekday=day.weekday(),
+            is_active=True,
+            start_time__lte=start_time,
+        )
+        if end_time:
+            covering_window = covering_window.filter(end__gte=window_end)
+            covering_template = covering_template.filter(end_time__gte=end_time)
+        else:
+            covering_window = covering_window.filter(end__gt=window_start)
+            covering_template = covering_template.filter(end_time__gt=start_time)
+
+        fresh = Exists(fresh_calendar(day, day, court_ref="pk"))
+        courts = list(
+            courts.filter(
+                (fresh & Exists(covering_window)) | (~fresh & Exists(covering_template))
+            )
+            .select_related("arena")[:MAX_SEARCH_COURTS]
+        )
+
+        if not courts:
+            return Response([])
+
+        blocks_by_court = get_range_booking_blocks([c.id for c in courts], day, day)
+        price_tables = get_price_tables([c.id for c in courts])
+
+        data = []
+        for court in courts:
+            matching = [
+                b for b in blocks_by_court[court.id][day]
+                if b["start"] <= window_start
+                and (b["end"] >= window_end if window_end else b["end"] > window_start)
+            ]
+            if not matching:
+                continue
+
+            item = {
+                "court_id": court.id,
+                "court_name": court.name,
+                "arena_id": court.arena_id,
+                "arena_name": court.arena.name,
+                "sport_type": court.sport_type,
+                "blocks": priced_blocks(matching, price_tables[court.id]),
+            }
+            if point:
+                item["distance_km"] = round(court.distance_km, 3)
+            data.append(item)
+
+        return Response(data)
@@ -0,0 +1,120 @@
+"""
+Native async twins of read-heavy availability endpoints, for the ASGI
+stack (core/asgi.py). Same query params, status codes and bodies as the
+DRF views in arenas/api.py.
+
+Also the availability change stream, which only exists here.
+"""
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+
+from core.async_api import aauthenticate, athrottle, json_response
+from core.db_router import use_replica
+from .cache import aget_cached_daily_booking_blocks
+from .changes import aavailability_events
+from .pricing import aget_price_table, priced_blocks
+from .models import Court
+
+
+@require_GET
+async def availability_blocks(request):
+    """
+    GET /api/v1/availability/blocks/async/?court_id=1&date=YYYY-MM-DD
+    """
+    # anonymous is fine, but a user is throttled as one (and a bad token
+    # is a 401), like the DRF view
+    user, error = await aauthenticate(request, optional=True)
+    if error:
+        return error
+
+    throttled = await athrottle(request, user)
+    if throttled:
+        return throttled
+
+    court_id = request.GET.get("court_id")
+    date_str = request.GET.get("date")
+
+    if not court_id or not date_str:
+        return json_response({"detail": "court_id and date are required"}, status=400)
+
+    day = parse_date(date_str)
+    if not day:
+        return json_response({"detail": "Invalid date format. Use YYYY-MM-DD"}, status=400)
+
+    with use_replica():
+        try:
+            court = await Court.objects.aget(id=court_id, is_active=True)
+        except (Court.DoesNotExist, ValueError):
+            return json_response({"detail": "Court not found"}, status=404)
+
+        blocks = await aget_cached_daily_booking_blocks(court, day)
+        price_table = await aget_price_table(court)
+
+    return json_response(priced_blocks(blocks, price_table))
+
+
+# Courts one stream may follow
+MAX_STREAM_COURTS = 100
+
+
+@require_GET
+async def availability_stream(request):
+    """
+    GET /api/v1/availability/stream/?court_id=1
+    GET /api/v1/availability/stream/?court_ids=1,2,3&since=<seq>
+    GET /api/v1/availability/stream/?arena_id=1
+
+    Server-Sent Events of availability changes, see arenas/changes.py.
+    ASGI only: a WSGI worker would hold the whole stream in memory.
+    """
+    if not hasattr(request, "scope"):
+        return json_response({"detail": "Streaming requires the ASGI server"}, status=501)
+
+    user, error = await aauthenticate(request, optional=True)
+    if error:
+        return error
+
+    throttled = await athrottle(request, user)
+    if throttled:
+        return throttled
+
+    court_id = request.GET.get("court_id")
+    court_ids_str = request.GET.get("court_ids")
+    arena_id = request.GET.get("arena_id")
+    # EventSource resends the last seen id when it reconnects
+    since_str = request.GET.get("since") or request.headers.get("Last-Event-ID")
+
+    try:
+        since = int(since_str) if since_str else None
+        if arena_id:
+            court_ids = [
+                pk async for pk in Court.objects.filter(
+                    arena_id=int(arena_id),
+                    is_active=True,
+                ).values_list("id", flat=True)[:MAX_STREAM_COURTS]
+            ]
+            if not court_ids:
+                return json_response({"detail": "Arena not found"}, status=404)
+        elif court_ids_str or court_id:
+            court_ids = [int(c) for c in (court_ids_str or court_id).split(",") if c.strip()]
+        else:
+            return json_response(
+                {"detail": "court_id, court_ids or arena_id is required"}, status=400,
+            )
+    except ValueError:
+        return json_response({"detail": "Invalid court_id, arena_id or since"}, status=400)
+
+    if not court_ids or len(court_ids) > MAX_STREAM_COURTS:
+        return json_response(
+            {"detail": f"Between 1 and {MAX_STREAM_COURTS} courts per stream"}, status=400,
+        )
+
+    response = StreamingHttpResponse(
+        aavailability_events(court_ids, since),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # nginx would buffer the events otherwise
+    response["X-Accel-Buffering"] = "no"
+    return response
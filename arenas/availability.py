@@ -1,7 +1,17 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
-from bookings.models import Booking
-from arenas.timeblocks import timedelta
+from bookings.models import Booking, BookingHold
+from arenas.models import CourtCalendar, OpenWindow, SlotTemplate
+from arenas.timeblocks import template_blocks
+from arenas.intervals import (
+    TICKS_PER_MINUTE,
+    from_ticks,
+    merge_intervals,
+    overlaps_merged,
+    subtract_merged,
+    to_ticks,
+)
 
 def get_weekday(date_obj):
     """
@@ -20,39 +30,147 @@ def build_datetime(date_obj, time_obj, tz):
     return timezone.make_aware(dt, tz)
 
 
-def get_daily_base_slots(court, date_obj):
-    """
-    Returns base availability slots for a court on a given date,
-    derived ONLY from SlotTemplate.
-    """
-    weekday = get_weekday(date_obj)
+def minute_to_time(minute):
+    return time(minute // 60, minute % 60)
 
-    templates = court.slot_templates.filter(
-        weekday=weekday,
-        is_active=True
-    )
 
+def build_base_slots(templates, date_obj):
+    """
+    Turn SlotTemplate rows into dated slots for date_obj.
+    "blocks" are the template's precompiled candidate blocks
+    (arenas/timeblocks.py) as (start_dt, end_dt) pairs.
+    """
+    tz = timezone.get_current_timezone()
     slots = []
 
     for tpl in templates:
-        start_dt = build_datetime(
-            date_obj,
-            tpl.start_time,
-            timezone.get_current_timezone()
-        )
-        end_dt = build_datetime(
-            date_obj,
-            tpl.end_time,
-            timezone.get_current_timezone()
-        )
+        start_dt = build_datetime(date_obj, tpl.start_time, tz)
+        end_dt = build_datetime(date_obj, tpl.end_time, tz)
 
         slots.append({
             "start": start_dt,
             "end": end_dt,
             "price": tpl.base_price,
+            "blocks": [
+                (
+                    build_datetime(date_obj, minute_to_time(block_start), tz),
+                    build_datetime(date_obj, minute_to_time(block_end), tz),
+                )
+                for block_start, block_end in template_blocks(tpl)
+            ],
+        })
+
+    return slots
+
+
+def build_window_slots(windows):
+    """
+    Same slots as build_base_slots, from materialized OpenWindows
+    (arenas/windows.py): no weekday or wall-time arithmetic left.
+    """
+    tz = timezone.get_current_timezone()
+    slots = []
+
+    for window in windows:
+        origin = to_ticks(window.start)
+        slots.append({
+            "start": timezone.localtime(window.start, tz),
+            "end": timezone.localtime(window.end, tz),
+            "price": window.price,
+            "blocks": [
+                (
+                    from_ticks(origin + block_start * TICKS_PER_MINUTE, tz),
+                    from_ticks(origin + block_end * TICKS_PER_MINUTE, tz),
+                )
+                for block_start, block_end in window.blocks
+            ],
         })
 
     return slots
+
+
+def fresh_calendar(start_date, end_date, court_ref="court_id"):
+    """
+    Subquery for Exists(): the court at OuterRef(court_ref) has clean
+    OpenWindows for every date of [start_date, end_date].
+    """
+    return CourtCalendar.objects.filter(
+        court_id=OuterRef(court_ref),
+        dirty=False,
+        generated_from__lte=start_date,
+        generated_until__gte=end_date,
+    )
+
+
+def base_slot_querysets(court_ids, start_date, end_date):
+    """
+    returns: (OpenWindows of courts with a fresh calendar,
+              SlotTemplates of the other courts)
+    Every court is served by exactly one of them.
+    """
+    fresh = Exists(fresh_calendar(start_date, end_date))
+    windows = OpenWindow.objects.filter(
+        fresh,
+        court_id__in=court_ids,
+        date__gte=start_date,
+        date__lte=end_date,
+    ).order_by("start")
+    templates = SlotTemplate.objects.filter(
+        ~fresh,
+        court_id__in=court_ids,
+        weekday__in={get_weekday(day) for day in iter_dates(start_date, end_date)},
+        is_active=True,
+    ).order_by("start_time")
+
+    return windows, templates
+
+
+def group_base_slots(windows, templates, start_date, end_date):
+    """
+    returns: {(court_id, date): [slots]}, missing keys mean closed
+    """
+    windows_by_key = {}
+    for window in windows:
+        windows_by_key.setdefault((window.court_id, window.date), []).append(window)
+
+    slots = {key: build_window_slots(rows) for key, rows in windows_by_key.items()}
+
+    templates_by_key = {}
+    for tpl in templates:
+        templates_by_key.setdefault((tpl.court_id, tpl.weekday), []).append(tpl)
+
+    if templates_by_key:
+        for day in iter_dates(start_date, end_date):
+            weekday = get_weekday(day)
+            for (court_id, tpl_weekday), rows in templates_by_key.items():
+                if tpl_weekday == weekday:
+                    slots[court_id, day] = build_base_slots(rows, day)
+
+    return slots
+
+
+def get_base_slots_by_court_date(court_ids, start_date, end_date):
+    """
+    Dated slots of many courts and days in two queries: materialized
+    OpenWindows where the court's calendar covers the range, SlotTemplate
+    expansion for the rest.
+
+    returns: {(court_id, date): [slots]}, missing keys mean closed
+    """
+    windows, templates = base_slot_querysets(court_ids, start_date, end_date)
+    return group_base_slots(windows, templates, start_date, end_date)
+
+
+def get_daily_base_slots(court, date_obj):
+    """
+    Returns base availability slots for a court on a given date,
+    derived from its OpenWindows / SlotTemplates.
+    """
+    return get_base_slots_by_court_date([court.id], date_obj, date_obj).get(
+        (court.id, date_obj), []
+    )
+
+
 def subtract_interval(slot_start, slot_end, busy_start, busy_end):
     """
     Given one open slot [slot_start, slot_end)
@@ -86,38 +204,62 @@ def subtract_busy_from_slots(slots, busy_intervals):
     busy_intervals: list of tuples (busy_start_dt, busy_end_dt)
 
     returns: new slots list after removing busy time.
+
+    Same result as applying subtract_interval for every (slot, busy) pair,
+    but busy intervals are merged once and each slot is swept in a single
+    pass (see arenas.intervals).
     """
+    busy_starts, busy_ends = merge_intervals(
+        (to_ticks(s), to_ticks(e)) for (s, e) in busy_intervals
+    )
+
     result = []
 
     for slot in slots:
-        current = [(slot["start"], slot["end"])]
-
-        for (busy_start, busy_end) in busy_intervals:
-            next_current = []
-            for (s, e) in current:
-                next_current.extend(subtract_interval(s, e, busy_start, busy_end))
-            current = next_current
+        tz = slot["start"].tzinfo
+        pieces = subtract_merged(
+            to_ticks(slot["start"]),
+            to_ticks(slot["end"]),
+            busy_starts,
+            busy_ends,
+        )
 
         # Convert back to slot dicts
-        for (s, e) in current:
-            result.append({"start": s, "end": e, "price": slot["price"]})
+        for (s, e) in pieces:
+            result.append({
+                "start": from_ticks(s, tz),
+                "end": from_ticks(e, tz),
+                "price": slot["price"],
+            })
 
     # sort by start time
     result.sort(key=lambda x: x["start"])
     return result
+def live_holds():
+    """
+    BookingHolds that haven't expired; they are busy like bookings.
+    """
+    return BookingHold.objects.filter(expires_at__gt=timezone.now())
+
+
 def get_busy_intervals(court, day_start, day_end):
     """
     Returns a list of (start_dt, end_dt) for bookings that overlap the day window.
-    Only counts RESERVED bookings.
+    Counts RESERVED bookings and live holds (one UNION query).
     """
-    qs = Booking.objects.filter(
+    bookings = Booking.objects.filter(
         court=court,
         status=Booking.Status.RESERVED,
         start__lt=day_end,
         end__gt=day_start,
-    ).order_by("start")
+    ).order_by().values_list("start", "end")
+    holds = live_holds().filter(
+        court=court,
+        start__lt=day_end,
+        end__gt=day_start,
+    ).values_list("start", "end")
 
-    return [(b.start, b.end) for b in qs]
+    return list(bookings.union(holds, all=True).order_by("start"))
 def get_daily_available_slots(court, date_obj):
     base_slots = get_daily_base_slots(court, date_obj)
 
@@ -146,22 +288,182 @@ def split_into_blocks(slot_start, slot_end, block_minutes=90):
         current += delta
 
     return blocks
-def get_daily_booking_blocks(court, date_obj, block_minutes=90):
+def compute_booking_blocks(base_slots, busy_starts, busy_ends):
+    """
+    The candidate blocks of base_slots that don't overlap a booking.
+
+    Candidates are precompiled per template, so this is only one bisect
+    per block against the merged busy_starts / busy_ends
+    (see merge_intervals).
+    """
+    blocks = {}
+    for slot in base_slots:
+        for (block_start, block_end) in slot["blocks"]:
+            if not overlaps_merged(
+                to_ticks(block_start), to_ticks(block_end), busy_starts, busy_ends
+            ):
+                blocks[block_start, block_end] = {
+                    "start": block_start,
+                    "end": block_end,
+                }
+
+    return sorted(blocks.values(), key=lambda b: (b["start"], b["end"]))
+
+
+def get_daily_booking_blocks(court, date_obj):
     """
     Returns preset booking blocks that are:
-    - within availability
+    - within availability (the court's block plan)
     - not overlapping bookings
     """
-    available_slots = get_daily_available_slots(court, date_obj)
+    base_slots = get_daily_base_slots(court, date_obj)
 
-    blocks = []
-    for slot in available_slots:
-        blocks.extend(
-            split_into_blocks(
-                slot["start"],
-                slot["end"],
-                block_minutes=block_minutes,
-            )
+    if not base_slots:
+        return []
+
+    day_start = min(s["start"] for s in base_slots)
+    day_end = max(s["end"] for s in base_slots)
+
+    busy_starts, busy_ends = merge_intervals(
+        (to_ticks(s), to_ticks(e))
+        for (s, e) in get_busy_intervals(court, day_start, day_end)
+    )
+    return compute_booking_blocks(base_slots, busy_starts, busy_ends)
+
+
+def iter_dates(start_date, end_date):
+    """
+    Yield every date from start_date to end_date (inclusive).
+    """
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += timedelta(days=1)
+
+
+def get_busy_intervals_by_court(court_ids, range_start, range_end):
+    """
+    Same as get_busy_intervals, but for many courts in ONE query.
+    Returns {court_id: [(start_dt, end_dt), ...]} sorted by start.
+    """
+    busy = {court_id: [] for court_id in court_ids}
+
+    bookings = Booking.objects.filter(
+        court_id__in=court_ids,
+        status=Booking.Status.RESERVED,
+        start__lt=range_end,
+        end__gt=range_start,
+    ).order_by().values_list("court_id", "start", "end")
+    holds = live_holds().filter(
+        court_id__in=court_ids,
+        start__lt=range_end,
+        end__gt=range_start,
+    ).values_list("court_id", "start", "end")
+
+    for court_id, start, end in bookings.union(holds, all=True).order_by("start"):
+        busy[court_id].append((start, end))
+
+    return busy
+
+
+def get_templates_by_court_weekday(court_ids, weekdays):
+    """
+    Active SlotTemplates for many courts in ONE query.
+    Returns {(court_id, weekday): [templates ordered by start_time]}.
+    """
+    templates_by_key = {}
+    templates = SlotTemplate.objects.filter(
+        court_id__in=court_ids,
+        weekday__in=weekdays,
+        is_active=True,
+    ).order_by("start_time")
+
+    for tpl in templates:
+        templates_by_key.setdefault((tpl.court_id, tpl.weekday), []).append(tpl)
+
+    return templates_by_key
+
+
+def get_range_booking_blocks(court_ids, start_date, end_date):
+    """
+    Batched version of get_daily_booking_blocks for many courts and days.
+
+    Loads all open windows (two queries, see get_base_slots_by_court_date)
+    and all overlapping RESERVED bookings / live holds (one query), then
+    computes every court-day in memory.
+
+    returns: {court_id: {date: [blocks]}}
+    """
+    court_ids = list(court_ids)
+    days = list(iter_dates(start_date, end_date))
+    slots_by_key = get_base_slots_by_court_date(court_ids, start_date, end_date)
+
+    tz = timezone.get_current_timezone()
+    range_start = build_datetime(start_date, time.min, tz)
+    range_end = build_datetime(end_date + timedelta(days=1), time.min, tz)
+    busy_by_court = get_busy_intervals_by_court(court_ids, range_start, range_end)
+
+    result = {}
+    for court_id in court_ids:
+        # merged once per court; each day then only bisects into it
+        busy_starts, busy_ends = merge_intervals(
+            (to_ticks(s), to_ticks(e)) for (s, e) in busy_by_court[court_id]
         )
+        per_day = {}
 
-    return blocks
+        for day in days:
+            per_day[day] = compute_booking_blocks(
+                slots_by_key.get((court_id, day), []), busy_starts, busy_ends
+            )
+
+        result[court_id] = per_day
+
+    return result
+
+
+async def aget_daily_booking_blocks(court, date_obj):
+    """
+    Async get_daily_booking_blocks, for async views: the event loop is
+    free while the queries run. They still run one after another, the
+    async ORM sends them all through the request's one thread-sensitive
+    executor (and connection). The open window isn't known up front, so
+    bookings are read for the whole local day; bookings outside the
+    windows don't change the result.
+    """
+    tz = timezone.get_current_timezone()
+    day_start = build_datetime(date_obj, time.min, tz)
+    day_end = build_datetime(date_obj + timedelta(days=1), time.min, tz)
+
+    windows_qs, templates_qs = base_slot_querysets([court.id], date_obj, date_obj)
+    busy_qs = Booking.objects.filter(
+        court=court,
+        status=Booking.Status.RESERVED,
+        start__lt=day_end,
+        end__gt=day_start,
+    ).order_by().values_list("start", "end").union(
+        live_holds().filter(
+            court=court,
+            start__lt=day_end,
+            end__gt=day_start,
+        ).values_list("start", "end"),
+        all=True,
+    )
+
+    windows = await _alist(windows_qs)
+    templates = await _alist(templates_qs)
+    busy = await _alist(busy_qs)
+
+    base_slots = group_base_slots(windows, templates, date_obj, date_obj).get(
+        (court.id, date_obj), []
+    )
+    if not base_slots:
+        return []
+
+    busy_starts, busy_ends = merge_intervals(
+        (to_ticks(s), to_ticks(e)) for (s, e) in busy
+    )
+    return compute_booking_blocks(base_slots, busy_starts, busy_ends)
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
@@ -0,0 +1,222 @@
+"""
+Versioned cache for computed availability blocks.
+
+Every court has a version counter. Cached block lists are keyed by court,
+date AND that version, so invalidating a court is a single increment: old
+entries are simply never read again and age out through the backend's
+TIMEOUT / MAX_ENTRIES culling.
+
+Price tables (see arenas/pricing.py) use a second counter of the same
+kind, PRICING. Bookings and holds bump AVAILABILITY on every write; only
+template, plan and price rule edits bump PRICING, so the tables survive
+ordinary booking traffic.
+
+Misses are computed on the primary database even inside use_replica():
+an entry stored under the court's new version must not hold what a
+lagging replica still returns for the old one.
+
+Works with any Django cache backend (locmem, file based, ...). The alias
+is configured in settings.CACHES["availability"].
+"""
+import threading
+import time
+
+from django.core.cache import caches
+
+from core.db_router import use_primary
+from .availability import aget_daily_booking_blocks, get_daily_booking_blocks
+
+AVAILABILITY_CACHE_ALIAS = "availability"
+
+# version kinds
+AVAILABILITY = "availability"
+PRICING = "pricing"
+
+_MISSING = object()
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_availability_cache():
+    return caches[AVAILABILITY_CACHE_ALIAS]
+
+
+def _version_key(court_id, kind=AVAILABILITY):
+    if kind == AVAILABILITY:
+        return f"court:{court_id}:version"
+    return f"court:{court_id}:{kind}:version"
+
+
+def get_court_version(court_id, kind=AVAILABILITY):
+    """
+    Current version of a court's availability (or prices, kind=PRICING).
+
+    If the counter was evicted it restarts from the current time (ns),
+    not from 1, so it can never collide with a version that old cached
+    entries were stored under.
+    """
+    cache = get_availability_cache()
+    key = _version_key(court_id, kind)
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_court_version(court_id, kind=AVAILABILITY):
+    """
+    Invalidate every cached entry of a court keyed on that kind of version.
+    """
+    cache = get_availability_cache()
+    key = _version_key(court_id, kind)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        # counter missing (never read, or evicted)
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def _record(hit):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+
+
+def get_cache_stats():
+    """
+    Hit / miss counters of this process.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
+
+
+def get_or_compute(court_id, name, compute, kind=AVAILABILITY):
+    """
+    Return the cached value `name` of a court, computing it on a miss.
+    The key includes the court version of that kind, so
+    bump_court_version(court_id, kind) invalidates it.
+    """
+    cache = get_availability_cache()
+    version = get_court_version(court_id, kind)
+    key = f"{name}:{court_id}:v{version}"
+
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _record(hit=True)
+        return value
+
+    _record(hit=False)
+    with use_primary():
+        value = compute()
+    cache.set(key, value)
+    return value
+
+
+def get_court_versions(court_ids, kind=AVAILABILITY):
+    """
+    get_court_version for many courts in two cache round trips.
+    """
+    cache = get_availability_cache()
+    keys = {court_id: _version_key(court_id, kind) for court_id in court_ids}
+    found = cache.get_many(keys.values())
+
+    versions = {}
+    for court_id, key in keys.items():
+        if key in found:
+            versions[court_id] = found[key]
+        else:
+            versions[court_id] = get_court_version(court_id, kind)
+
+    return versions
+
+
+def get_many_or_compute(court_ids, name, compute_many, kind=AVAILABILITY):
+    """
+    get_or_compute for many courts. compute_many(missing_court_ids) must
+    return {court_id: value} and is called at most once, so the misses
+    are built in one batch.
+    """
+    cache = get_availability_cache()
+    versions = get_court_versions(court_ids, kind)
+    keys = {court_id: f"{name}:{court_id}:v{version}" for court_id, version in versions.items()}
+    found = cache.get_many(keys.values())
+
+    values = {}
+    missing = []
+    for court_id, key in keys.items():
+        if key in found:
+            _record(hit=True)
+            values[court_id] = found[key]
+        else:
+            _record(hit=False)
+            missing.append(court_id)
+
+    if missing:
+        with use_primary():
+            computed = compute_many(missing)
+        cache.set_many({keys[court_id]: computed[court_id] for court_id in missing})
+        values.update(computed)
+
+    return values
+
+
+def get_cached_daily_booking_blocks(court, date_obj):
+    """
+    Cached get_daily_booking_blocks.
+    """
+    return get_or_compute(
+        court.id,
+        f"blocks:{date_obj.isoformat()}",
+        lambda: get_daily_booking_blocks(court, date_obj),
+    )
+
+
+async def aget_court_version(court_id, kind=AVAILABILITY):
+    cache = get_availability_cache()
+    key = _version_key(court_id, kind)
+
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+
+    return version
+
+
+async def aget_or_compute(court_id, name, acompute, kind=AVAILABILITY):
+    """
+    Async get_or_compute; acompute is a coroutine function.
+    Shares keys (and hit/miss counters) with the sync version.
+    """
+    cache = get_availability_cache()
+    version = await aget_court_version(court_id, kind)
+    key = f"{name}:{court_id}:v{version}"
+
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        _record(hit=True)
+        return value
+
+    _record(hit=False)
+    with use_primary():
+        value = await acompute()
+    await cache.aset(key, value)
+    return value
+
+
+async def aget_cached_daily_booking_blocks(court, date_obj):
+    return await aget_or_compute(
+        court.id,
+        f"blocks:{date_obj.isoformat()}",
+        lambda: aget_daily_booking_blocks(court, date_obj),
+    )
@@ -0,0 +1,270 @@
+"""
+Availability change log and its Server-Sent Events feed.
+
+Every availability_changed signal appends an AvailabilityChange row in
+the changing transaction (arenas/signals.py), so rolled back changes are
+never announced. Its id is the sequence number.
+
+GET /api/v1/availability/stream/ (arenas/async_views.py) sends
+
+    id: 42
+    event: change
+    data: {"seq": 42, "court_id": 3, "start_date": "2026-10-20", "end_date": "2026-10-20"}
+
+for the requested courts, from ?since=<seq> or the Last-Event-ID header
+browsers send on reconnect, otherwise from now. A client refetches the
+blocks of that court and date range (every date when both are null).
+"event: reset" means the changes since `since` can't be replayed (pruned,
+or too many), so the client refetches everything it shows and goes on
+from the reset's seq.
+
+One ChangeFeed per process polls the log for all subscribers, so the
+database sees one cheap `id > cursor` query per POLL_INTERVAL_SECONDS
+however many clients are connected. Ids are assigned at insert but
+become visible at commit, so a lower id can show up after a higher one;
+the feed doesn't move past such a gap until GAP_GRACE_SECONDS have
+passed (the id of a rolled back insert never shows up).
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from datetime import timedelta
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.db import connection
+from django.utils import timezone
+
+from .models import AvailabilityChange
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 1
+GAP_GRACE_SECONDS = 5
+POLL_BATCH_SIZE = 500
+
+# a subscriber further behind than this gets a reset instead
+MAX_BACKLOG = 1000
+
+KEEPALIVE_SECONDS = 15
+# streams end after this long, EventSource reconnects with Last-Event-ID
+STREAM_SECONDS = 300
+RETRY_MILLISECONDS = 2000
+
+
+def change_dates(start=None, end=None):
+    """
+    returns: (first, last) local date of [start, end), or (None, None)
+    """
+    if start is None or end is None:
+        return None, None
+    # end is exclusive, a booking until midnight doesn't touch the next day
+    return timezone.localdate(start), timezone.localdate(end - timedelta(microseconds=1))
+
+
+def record_change(court_id, start=None, end=None):
+    start_date, end_date = change_dates(start, end)
+    return AvailabilityChange.objects.create(
+        court_id=court_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+
+
+def serialize_change(change):
+    return {
+        "seq": change.id,
+        "court_id": change.court_id,
+        "start_date": change.start_date.isoformat() if change.start_date else None,
+        "end_date": change.end_date.isoformat() if change.end_date else None,
+    }
+
+
+def sse_event(event, data, seq=None):
+    lines = []
+    if seq is not None:
+        lines.append(f"id: {seq}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def alatest_seq():
+    latest = await AvailabilityChange.objects.order_by("-id").values_list("id", flat=True).afirst()
+    return latest or 0
+
+
+async def aread_settled(cursor):
+    """
+    Changes after cursor, stopping at a gap in the ids that may still be
+    filled by a transaction committing late.
+
+    returns: (changes, new cursor)
+    """
+    changes = [
+        change async for change in
+        AvailabilityChange.objects.filter(id__gt=cursor).order_by("id")[:POLL_BATCH_SIZE]
+    ]
+
+    settled = timezone.now() - timedelta(seconds=GAP_GRACE_SECONDS)
+    ready = []
+    for change in changes:
+        if change.id != cursor + 1 and change.created_at > settled:
+            break
+        ready.append(change)
+        cursor = change.id
+
+    return ready, cursor
+
+
+class Subscription:
+    def __init__(self, court_ids):
+        self.court_ids = set(court_ids)
+        self.queue = asyncio.Queue()
+
+    def offer(self, change):
+        if change.court_id in self.court_ids:
+            self.queue.put_nowait(change)
+
+
+class ChangeFeed:
+    """
+    Polls the log while anyone is subscribed and fans the changes out.
+    Lives on one event loop, see get_change_feed().
+    """
+    def __init__(self):
+        self.subscribers = set()
+        self.cursor = None
+        # set once cursor is known
+        self.started = asyncio.Event()
+        self.task = None
+
+    def subscribe(self, court_ids):
+        subscription = Subscription(court_ids)
+        self.subscribers.add(subscription)
+        if self.task is None:
+            # Not in the subscribing request's context, which it outlives:
+            # the copy would keep the request's ThreadSensitiveContext, so
+            # its executor thread and database connection, alive.
+            self.task = asyncio.get_running_loop().create_task(
+                self.run_isolated(), context=contextvars.Context(),
+            )
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    async def run_isolated(self):
+        # the feed's queries get a thread, and so a connection, of their own
+        async with ThreadSensitiveContext():
+            await self.run()
+
+    async def run(self):
+        try:
+            self.cursor = await alatest_seq()
+            self.started.set()
+
+            while self.subscribers:
+                changes, self.cursor = await aread_settled(self.cursor)
+                for change in changes:
+                    for subscription in list(self.subscribers):
+                        subscription.offer(change)
+                if len(changes) < POLL_BATCH_SIZE:
+                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        except Exception:
+            logger.exception("Availability change feed stopped")
+        finally:
+            # ends the remaining streams, clients reconnect
+            for subscription in self.subscribers:
+                subscription.queue.put_nowait(None)
+            self.subscribers.clear()
+            self.started.set()
+
+            self.task = None
+            self.cursor = None
+            self.started = asyncio.Event()
+
+            # nothing closes it at the end of a request
+            await sync_to_async(connection.close)()
+
+    async def position(self):
+        """
+        returns: the cursor, everything after it reaches subscribers
+        through their queue; None if the feed stopped
+        """
+        started = self.started
+        await started.wait()
+        return self.cursor
+
+
+_feeds = {}
+
+
+def get_change_feed():
+    loop = asyncio.get_running_loop()
+    feed = _feeds.get(loop)
+    if feed is None:
+        # drop feeds of closed loops (test clients run a loop per request)
+        for other in [other for other in _feeds if other.is_closed()]:
+            del _feeds[other]
+        feed = _feeds[loop] = ChangeFeed()
+    return feed
+
+
+async def aavailability_events(court_ids, since=None):
+    """
+    The SSE body for court_ids: backlog after `since`, then live changes.
+    """
+    feed = get_change_feed()
+    subscription = feed.subscribe(court_ids)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+        position = await feed.position()
+        if position is None:
+            return
+        last = position
+        if since is not None and since != position:
+            backlog = [
+                change async for change in AvailabilityChange.objects.filter(
+                    id__gt=since,
+                    id__lte=position,
+                    court_id__in=court_ids,
+                ).order_by("id")[:MAX_BACKLOG + 1]
+            ]
+            oldest = await AvailabilityChange.objects.order_by("id").values_list(
+                "id", flat=True,
+            ).afirst()
+            replayable = (
+                since < position
+                and len(backlog) <= MAX_BACKLOG
+                and (oldest is None or since >= oldest - 1)
+            )
+            if not replayable:
+                yield sse_event("reset", {"seq": position}, seq=position)
+            else:
+                for change in backlog:
+                    yield sse_event("change", serialize_change(change), seq=change.id)
+
+        yield sse_event("ready", {"seq": position}, seq=position)
+
+        deadline = asyncio.get_running_loop().time() + STREAM_SECONDS
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return
+            try:
+                change = await asyncio.wait_for(
+                    subscription.queue.get(), min(KEEPALIVE_SECONDS, remaining),
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if change is None:
+                return
+            # queued while the backlog was read
+            if change.id > last:
+                last = change.id
+                yield sse_event("change", serialize_change(change), seq=change.id)
+    finally:
+        feed.unsubscribe(subscription)
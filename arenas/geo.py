@@ -0,0 +1,137 @@
+"""
+Spatial grid over latitude / longitude, no PostGIS needed.
+
+The globe is cut into GEO_CELL_DEGREES cells, numbered row by row:
+
+    cell = lat_index * LON_CELLS + lon_index
+
+so the cells of one latitude row inside a bounding box form a contiguous
+integer range. A radius search becomes a few BETWEEN ranges on the
+indexed Arena.geo_cell column, then exact haversine distances are computed
+for the candidates (in Python, or in SQL with haversine_km_expression()).
+"""
+import math
+from functools import reduce
+from operator import or_
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+GEO_CELL_DEGREES = 0.1
+LAT_CELLS = int(180 / GEO_CELL_DEGREES)
+LON_CELLS = int(360 / GEO_CELL_DEGREES)
+
+MAX_RADIUS_KM = 100
+DEFAULT_RADIUS_KM = 10
+
+
+def _lat_index(lat):
+    return max(0, min(LAT_CELLS - 1, math.floor((lat + 90) / GEO_CELL_DEGREES)))
+
+
+def _lon_index(lon):
+    return math.floor((lon + 180) / GEO_CELL_DEGREES) % LON_CELLS
+
+
+def geo_cell(lat, lon):
+    """
+    Grid cell of a point, or None if it has no coordinates.
+    """
+    if lat is None or lon is None:
+        return None
+    return _lat_index(float(lat)) * LON_CELLS + _lon_index(float(lon))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_km_expression(lat, lon, lat_field="latitude", lon_field="longitude"):
+    """
+    haversine_km() from (lat, lon) to each row's `lat_field` / `lon_field`,
+    as a database expression, so candidates can be filtered and ordered
+    by distance before they are limited.
+    """
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2 = Radians(Cast(F(lat_field), FloatField()))
+    lon2 = Radians(Cast(F(lon_field), FloatField()))
+    a = (
+        Power(Sin((lat2 - Value(lat1)) / Value(2.0)), 2)
+        + Value(math.cos(lat1)) * Cos(lat2) * Power(Sin((lon2 - Value(lon1)) / Value(2.0)), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Value(1.0), Sqrt(a)))
+
+
+def cell_ranges(lat, lon, radius_km):
+    """
+    Inclusive (low, high) geo_cell ranges covering the bounding box of the
+    circle around (lat, lon). Handles the poles and the antimeridian.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    if widest_lat >= 90:
+        dlon = 180.0
+    else:
+        dlon = dlat / math.cos(math.radians(widest_lat))
+
+    if dlon >= 180:
+        lon_ranges = [(0, LON_CELLS - 1)]
+    else:
+        low, high = _lon_index(lon - dlon), _lon_index(lon + dlon)
+        if low <= high:
+            lon_ranges = [(low, high)]
+        else:
+            # wraps around the antimeridian
+            lon_ranges = [(low, LON_CELLS - 1), (0, high)]
+
+    ranges = []
+    for row in range(_lat_index(min_lat), _lat_index(max_lat) + 1):
+        for low, high in lon_ranges:
+            ranges.append((row * LON_CELLS + low, row * LON_CELLS + high))
+
+    return ranges
+
+
+def within_cells_q(lat, lon, radius_km, field="geo_cell"):
+    """
+    Q object matching rows whose `field` is in the circle's bounding box.
+    Candidates still need an exact haversine_km check.
+    """
+    return reduce(or_, (
+        Q(**{f"{field}__range": cell_range})
+        for cell_range in cell_ranges(lat, lon, radius_km)
+    ))
+
+
+def parse_point(query_params):
+    """
+    Read lat, lng and radius_km from query params.
+
+    returns: (lat, lng, radius_km)
+    raises: ValueError with a message fit for the API response
+    """
+    if "lat" not in query_params or "lng" not in query_params:
+        raise ValueError("lat and lng are required")
+
+    try:
+        lat = float(query_params["lat"])
+        lng = float(query_params["lng"])
+        radius_km = float(query_params.get("radius_km", DEFAULT_RADIUS_KM))
+    except ValueError:
+        raise ValueError("lat, lng and radius_km must be numbers")
+
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat/lng out of range")
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValueError(f"radius_km must be between 0 and {MAX_RADIUS_KM}")
+
+    return lat, lng, radius_km
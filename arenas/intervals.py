@@ -0,0 +1,93 @@
+"""
+Integer interval engine used by the availability code.
+
+Intervals are half-open (start, end) pairs of "ticks": integer microseconds
+since the Unix epoch. Datetimes are converted with to_ticks / from_ticks
+only at the edges, everything in between is plain int arithmetic.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+TICK = timedelta(microseconds=1)
+TICKS_PER_MINUTE = 60 * 1000 * 1000
+
+
+def to_ticks(dt):
+    """
+    Timezone-aware datetime -> int ticks (exact, no float rounding).
+    """
+    return (dt - EPOCH) // TICK
+
+
+def from_ticks(ticks, tz):
+    """
+    int ticks -> timezone-aware datetime in tz.
+    """
+    return (EPOCH + timedelta(microseconds=ticks)).astimezone(tz)
+
+
+def merge_intervals(intervals):
+    """
+    Sort and coalesce overlapping or touching intervals.
+
+    returns: (starts, ends) as two sorted lists, so callers can bisect
+    """
+    starts = []
+    ends = []
+
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+
+        if ends and start <= ends[-1]:
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+
+    return starts, ends
+
+
+def subtract_merged(start, end, busy_starts, busy_ends):
+    """
+    Remove merged busy intervals from one open window [start, end).
+
+    Jumps to the first busy interval that can overlap, then sweeps
+    forward once. Returns the remaining open pieces in order.
+    """
+    pieces = []
+    cursor = start
+
+    # first busy interval that ends after the window starts
+    i = bisect_right(busy_ends, start)
+    n = len(busy_starts)
+
+    while i < n and busy_starts[i] < end:
+        if busy_starts[i] > cursor:
+            pieces.append((cursor, busy_starts[i]))
+        if busy_ends[i] > cursor:
+            cursor = busy_ends[i]
+        i += 1
+
+    if cursor < end:
+        pieces.append((cursor, end))
+
+    return pieces
+
+
+def overlaps_merged(start, end, busy_starts, busy_ends):
+    """
+    True if [start, end) overlaps any of the merged busy intervals.
+    """
+    i = bisect_right(busy_ends, start)
+    return i < len(busy_starts) and busy_starts[i] < end
+
+
+def split_ticks(start, end, step):
+    """
+    Split [start, end) into fixed blocks of `step` ticks.
+    A trailing remainder shorter than step is dropped.
+    """
+    return [(s, s + step) for s in range(start, end - step + 1, step)]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0004_slottemplate_slottemplate_end_after_start'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='slottemplate',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['court', 'weekday', 'start_time'], name='slottemplate_active_court_day'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+from arenas.geo import geo_cell
+
+
+def backfill_geo_cells(apps, schema_editor):
+    Arena = apps.get_model("arenas", "Arena")
+    arenas = Arena.objects.exclude(latitude=None).exclude(longitude=None)
+    for arena in arenas.iterator(chunk_size=1000):
+        arena.geo_cell = geo_cell(arena.latitude, arena.longitude)
+        arena.save(update_fields=["geo_cell"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0005_slottemplate_active_court_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arena',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_geo_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0006_arena_geo_cell'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='court',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['arena', 'sport_type'], name='court_active_arena_sport'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:43
+
+import arenas.timeblocks
+from django.db import migrations, models
+
+from arenas.timeblocks import compile_blocks
+
+
+def compile_slot_templates(apps, schema_editor):
+    # every court starts on the default plan
+    SlotTemplate = apps.get_model("arenas", "SlotTemplate")
+    batch = []
+    for template in SlotTemplate.objects.filter(compiled_blocks=None).iterator(chunk_size=1000):
+        template.compiled_blocks = compile_blocks(template.start_time, template.end_time)
+        batch.append(template)
+        if len(batch) >= 1000:
+            SlotTemplate.objects.bulk_update(batch, ["compiled_blocks"])
+            batch = []
+    if batch:
+        SlotTemplate.objects.bulk_update(batch, ["compiled_blocks"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0007_court_active_arena_sport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='court',
+            name='block_buffer_minutes',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='court',
+            name='block_plan',
+            field=models.JSONField(default=arenas.timeblocks.default_block_plan),
+        ),
+        migrations.AddField(
+            model_name='slottemplate',
+            name='compiled_blocks',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(compile_slot_templates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0008_court_block_plan_slottemplate_compiled_blocks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80)),
+                ('weekdays', models.JSONField(blank=True, default=list)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('min_minutes', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('max_minutes', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('multiplier', models.DecimalField(decimal_places=3, default=1, max_digits=6)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('priority', models.SmallIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_rules', to='arenas.court')),
+            ],
+            options={
+                'ordering': ['court_id', 'priority', 'id'],
+            },
+        ),
+    ]
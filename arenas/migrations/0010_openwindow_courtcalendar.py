@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0009_pricerule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourtCalendar',
+            fields=[
+                ('court', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calendar', serialize=False, to='arenas.court')),
+                ('generated_from', models.DateField(blank=True, null=True)),
+                ('generated_until', models.DateField(blank=True, null=True)),
+                ('dirty', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OpenWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('blocks', models.JSONField(default=list)),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_windows', to='arenas.court')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_windows', to='arenas.slottemplate')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['court', 'date', 'start'], name='open_window_court_day')],
+            },
+        ),
+    ]
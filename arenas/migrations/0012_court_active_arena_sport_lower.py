@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:39
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0011_availabilitychange'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='court',
+            name='court_active_arena_sport',
+        ),
+        migrations.AddIndex(
+            model_name='court',
+            index=models.Index(models.F('arena'), django.db.models.functions.text.Lower('sport_type'), condition=models.Q(('is_active', True)), name='court_active_arena_sport'),
+        ),
+    ]
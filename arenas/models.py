@@ -1,6 +1,11 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django.contrib.auth.models import User
 
+from .geo import geo_cell
+from .timeblocks import compile_blocks, default_block_plan, validate_block_plan
+
 
 class Arena(models.Model):
     owner = models.ForeignKey(
@@ -19,6 +24,13 @@ class Arena(models.Model):
         max_digits=9, decimal_places=6,
         null=True, blank=True,
     )
+    # Spatial grid cell of (latitude, longitude), see arenas/geo.py.
+    # Maintained in save(); bulk writes must set it themselves.
+    geo_cell = models.IntegerField(
+        null=True, blank=True,
+        db_index=True,
+        editable=False,
+    )
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -29,6 +41,24 @@ class Arena(models.Model):
     def __str__(self):
         return f"{self.name} (owner: {self.owner.username})"
 
+    def save(self, *args, **kwargs):
+        self.geo_cell = geo_cell(self.latitude, self.longitude)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geo_cell"}
+
+        super().save(*args, **kwargs)
+
+
+def sport_type_matches(sport_type):
+    """
+    Case-insensitive sport_type filter, written as lower(sport_type) = ...
+    so the (arena, lower(sport_type)) index can serve it (iexact can't).
+    Stored values are left as entered.
+    """
+    return Exact(Lower("sport_type"), sport_type.strip().lower())
+
 
 class Court(models.Model):
     arena = models.ForeignKey(
@@ -42,13 +72,58 @@ class Court(models.Model):
     indoor = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
 
+    # How template windows are cut into blocks, see arenas/timeblocks.py.
+    # Changing either recompiles the court's SlotTemplates in save().
+    block_plan = models.JSONField(default=default_block_plan)
+    block_buffer_minutes = models.PositiveSmallIntegerField(default=0)
+
     class Meta:
         ordering = ["arena_id", "name"]
         unique_together = ("arena", "name")
+        indexes = [
+            # "any free court" search: active courts of an arena by sport
+            # (see sport_type_matches)
+            models.Index(
+                models.F("arena"),
+                Lower("sport_type"),
+                name="court_active_arena_sport",
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.arena.name} - {self.name}"
 
+    def clean(self):
+        validate_block_plan(self.block_plan, self.block_buffer_minutes)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if not adding and (
+            update_fields is None
+            or {"block_plan", "block_buffer_minutes"} & set(update_fields)
+        ):
+            self.recompile_slot_templates()
+
+    def recompile_slot_templates(self):
+        """
+        Re-cut every template of this court with the current plan.
+        Only rows whose blocks actually change are written.
+        """
+        changed = []
+        for template in self.slot_templates.all():
+            blocks = template.compile(self)
+            if blocks != template.compiled_blocks:
+                template.compiled_blocks = blocks
+                changed.append(template)
+
+        if changed:
+            SlotTemplate.objects.bulk_update(changed, ["compiled_blocks"])
+        return len(changed)
+
 
 class SlotTemplate(models.Model):
     """
@@ -66,6 +141,11 @@ class SlotTemplate(models.Model):
     base_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     is_active = models.BooleanField(default=True)
 
+    # Candidate blocks of the window under the court's block plan,
+    # [[start_minute, end_minute], ...]. Maintained in save() and by
+    # Court.recompile_slot_templates(); bulk writes must set it themselves.
+    compiled_blocks = models.JSONField(null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ["court_id", "weekday", "start_time"]
         unique_together = ("court", "weekday", "start_time", "end_time")
@@ -75,6 +155,147 @@ class SlotTemplate(models.Model):
                 name="slottemplate_end_after_start",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["court", "weekday", "start_time"],
+                name="slottemplate_active_court_day",
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.court} - {self.weekday} {self.start_time}-{self.end_time}"
+
+    def compile(self, court=None):
+        court = court or self.court
+        return compile_blocks(
+            self.start_time,
+            self.end_time,
+            court.block_plan,
+            court.block_buffer_minutes,
+        )
+
+    def save(self, *args, **kwargs):
+        self.compiled_blocks = self.compile()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"start_time", "end_time"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "compiled_blocks"}
+
+        super().save(*args, **kwargs)
+
+
+class PriceRule(models.Model):
+    """
+    Price adjustment on top of SlotTemplate.base_price, see arenas/pricing.py.
+
+    A rule matches a block when every condition that is set holds:
+    weekdays (empty = every day), block start within [start_time, end_time),
+    block length within [min_minutes, max_minutes]. Matching rules apply in
+    priority order: price = price * multiplier + amount.
+    """
+    court = models.ForeignKey(
+        "Court",
+        on_delete=models.CASCADE,
+        related_name="price_rules",
+    )
+    name = models.CharField(max_length=80)
+
+    weekdays = models.JSONField(default=list, blank=True)  # 0=Mon ... 6=Sun
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    min_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
+    max_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    multiplier = models.DecimalField(max_digits=6, decimal_places=3, default=1)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    priority = models.SmallIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ["court_id", "priority", "id"]
+
+    def __str__(self):
+        return f"{self.court} - {self.name}"
+
+
+class OpenWindow(models.Model):
+    """
+    One SlotTemplate window on a concrete date, materialized for the next
+    CALENDAR_DAYS days by arenas/windows.py, so "open at time X" is an
+    indexed range scan instead of a weekday expansion in Python.
+
+    blocks are the template's compiled blocks as [start, end] minute
+    offsets from `start` (absolute time, so DST days stay exact).
+    """
+    court = models.ForeignKey(
+        "Court",
+        on_delete=models.CASCADE,
+        related_name="open_windows",
+    )
+    template = models.ForeignKey(
+        SlotTemplate,
+        on_delete=models.CASCADE,
+        related_name="open_windows",
+    )
+    date = models.DateField()
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    blocks = models.JSONField(default=list)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["court", "date", "start"], name="open_window_court_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.court} | {self.start}–{self.end}"
+
+
+class CourtCalendar(models.Model):
+    """
+    Which dates of a court's OpenWindows are materialized. A dirty
+    calendar (templates or plan changed since) is not used; readers fall
+    back to SlotTemplate until it is regenerated.
+    """
+    court = models.OneToOneField(
+        "Court",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="calendar",
+    )
+    generated_from = models.DateField(null=True, blank=True)
+    generated_until = models.DateField(null=True, blank=True)
+    dirty = models.BooleanField(default=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.court} | {self.generated_from}..{self.generated_until}"
+
+
+class AvailabilityChange(models.Model):
+    """
+    Append-only log of availability changes, written in the changing
+    transaction by the availability_changed receiver. The id is the
+    sequence number SSE clients resume from (arenas/changes.py).
+
+    start_date / end_date are the local dates whose blocks changed, both
+    null for every date (template, plan or price edits).
+    """
+    # no constraint: the log outlives deleted courts
+    court = models.ForeignKey(
+        "Court",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="availability_changes",
+    )
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.id} court {self.court_id} | {self.start_date}..{self.end_date}"
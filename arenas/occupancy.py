@@ -0,0 +1,228 @@
+"""
+Bitset occupancy of one court for one day.
+
+The day (local midnight to next midnight) is cut into RESOLUTION_MINUTES
+cells; bit i of an int covers cell i. The day is described by:
+
+- open_mask: cells inside an active SlotTemplate window
+- busy_mask: cells touched by a RESERVED booking or a live hold
+- blocks:    the templates' precompiled candidate blocks, as cell ranges
+
+With these, "is this block bookable", "list free blocks" and "how many
+minutes are booked" are a handful of shifts, ANDs and bit counts.
+"""
+from datetime import time, timedelta
+
+from django.utils import timezone
+
+from .availability import (
+    build_datetime,
+    get_busy_intervals,
+    get_daily_base_slots,
+)
+from .cache import get_cached_daily_booking_blocks, get_or_compute
+from .intervals import TICKS_PER_MINUTE, from_ticks, to_ticks
+
+RESOLUTION_MINUTES = 5
+RESOLUTION_TICKS = RESOLUTION_MINUTES * TICKS_PER_MINUTE
+
+
+def _mask(i, j):
+    """
+    Bits i..j-1 set.
+    """
+    return ((1 << (j - i)) - 1) << i
+
+
+class DayOccupancy:
+    """
+    exact is False when a candidate block is off the RESOLUTION_MINUTES
+    grid. Callers must then fall back to the block list.
+    """
+    __slots__ = ("day_start", "size", "open_mask", "busy_mask", "blocks", "exact")
+
+    def __init__(self, day_start, day_end):
+        self.day_start = to_ticks(day_start)
+        self.size = -(-(to_ticks(day_end) - self.day_start) // RESOLUTION_TICKS)
+        self.open_mask = 0
+        self.busy_mask = 0
+        self.blocks = set()
+        self.exact = True
+
+    def _cell(self, dt):
+        """
+        returns: (index, aligned)
+        """
+        index, rest = divmod(to_ticks(dt) - self.day_start, RESOLUTION_TICKS)
+        return index, rest == 0
+
+    def _clip(self, index):
+        return max(0, min(index, self.size))
+
+    def add_open(self, start, end):
+        i, start_aligned = self._cell(start)
+        j, _ = self._cell(end)
+
+        # round inwards: a partial cell is not open
+        if not start_aligned:
+            i += 1
+
+        i, j = self._clip(i), self._clip(j)
+        if j > i:
+            self.open_mask |= _mask(i, j)
+
+    def add_block(self, start, end):
+        """
+        One precompiled candidate block of the day.
+        """
+        i, start_aligned = self._cell(start)
+        j, end_aligned = self._cell(end)
+
+        if not (start_aligned and end_aligned) or i < 0 or j > self.size:
+            self.exact = False
+            return
+
+        self.blocks.add((i, j))
+
+    def add_busy(self, start, end):
+        i, _ = self._cell(start)
+        j, end_aligned = self._cell(end)
+
+        # round outwards: a partially booked cell is busy. Exact for
+        # grid-aligned blocks, which overlap the rounded interval iff
+        # they overlap the booking.
+        if not end_aligned:
+            j += 1
+
+        i, j = self._clip(i), self._clip(j)
+        if j > i:
+            self.busy_mask |= _mask(i, j)
+
+    @property
+    def free_mask(self):
+        return self.open_mask & ~self.busy_mask
+
+    def is_free(self, start, end):
+        """
+        True if every cell of [start, end) is open and not booked.
+        """
+        i, _ = self._cell(start)
+        j, end_aligned = self._cell(end)
+        if not end_aligned:
+            j += 1
+        if i < 0 or j > self.size or j <= i:
+            return False
+
+        needed = _mask(i, j)
+        return self.free_mask & needed == needed
+
+    def is_candidate_block(self, start, end):
+        """
+        True if [start, end) is one of the day's precompiled blocks, booked
+        or not. Only meaningful when self.exact is True.
+        """
+        i, start_aligned = self._cell(start)
+        j, end_aligned = self._cell(end)
+        return start_aligned and end_aligned and (i, j) in self.blocks
+
+    def is_bookable_block(self, start, end):
+        """
+        True if [start, end) is one of the blocks get_daily_booking_blocks
+        would return for this day. Only meaningful when self.exact is True.
+        """
+        i, start_aligned = self._cell(start)
+        j, end_aligned = self._cell(end)
+        if not (start_aligned and end_aligned):
+            return False
+
+        return (i, j) in self.blocks and not self.busy_mask & _mask(i, j)
+
+    def free_blocks(self):
+        """
+        Unbooked candidate blocks, as {'start': dt, 'end': dt} dicts.
+        """
+        tz = timezone.get_current_timezone()
+        return [
+            {
+                "start": from_ticks(self.day_start + i * RESOLUTION_TICKS, tz),
+                "end": from_ticks(self.day_start + j * RESOLUTION_TICKS, tz),
+            }
+            for i, j in sorted(self.blocks)
+            if not self.busy_mask & _mask(i, j)
+        ]
+
+    def open_minutes(self):
+        return self.open_mask.bit_count() * RESOLUTION_MINUTES
+
+    def booked_minutes(self):
+        """
+        Booked minutes inside open windows.
+        """
+        return (self.open_mask & self.busy_mask).bit_count() * RESOLUTION_MINUTES
+
+    def free_minutes(self):
+        return self.free_mask.bit_count() * RESOLUTION_MINUTES
+
+
+def build_day_occupancy(court, date_obj):
+    """
+    Build the bitsets from SlotTemplate and Booking + BookingHold (two queries).
+    """
+    tz = timezone.get_current_timezone()
+    day_start = build_datetime(date_obj, time.min, tz)
+    day_end = build_datetime(date_obj + timedelta(days=1), time.min, tz)
+
+    occupancy = DayOccupancy(day_start, day_end)
+
+    for slot in get_daily_base_slots(court, date_obj):
+        occupancy.add_open(slot["start"], slot["end"])
+        for block_start, block_end in slot["blocks"]:
+            occupancy.add_block(block_start, block_end)
+
+    for busy_start, busy_end in get_busy_intervals(court, day_start, day_end):
+        occupancy.add_busy(busy_start, busy_end)
+
+    return occupancy
+
+
+def get_day_occupancy(court, date_obj):
+    """
+    Lazily built, cached occupancy. Cached under the court version, so it
+    is rebuilt after any booking create / cancel or template change.
+    """
+    return get_or_compute(
+        court.id,
+        f"occupancy:{date_obj.isoformat()}",
+        lambda: build_day_occupancy(court, date_obj),
+    )
+
+
+def is_block_bookable(court, start, end):
+    """
+    Same answer as checking (start, end) against get_daily_booking_blocks,
+    but O(1) on the cached bitsets. Falls back to the block list when the
+    day is not exactly representable on the grid.
+    """
+    occupancy = get_day_occupancy(court, start.date())
+    if occupancy.exact:
+        return occupancy.is_bookable_block(start, end)
+
+    allowed_blocks = get_cached_daily_booking_blocks(court, start.date())
+    return (start, end) in {(b["start"], b["end"]) for b in allowed_blocks}
+
+
+def is_block_on_grid(court, start, end):
+    """
+    Whether (start, end) is one of the court's blocks that day, booked or
+    not. For the write paths: cached busy cells may be stale (a locmem
+    cache is per process, a bump lands after the commit), so they check
+    conflicts in the database under the court lock.
+    """
+    occupancy = get_day_occupancy(court, start.date())
+    if occupancy.exact:
+        return occupancy.is_candidate_block(start, end)
+
+    return any(
+        (start, end) in slot["blocks"]
+        for slot in get_daily_base_slots(court, start.date())
+    )
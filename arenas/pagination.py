@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ArenaCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("name", "id")
+
+
+class CourtCursorPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("arena_id", "name", "id")
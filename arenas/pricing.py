@@ -0,0 +1,163 @@
+"""
+Block prices.
+
+The price of a block is the base_price of the template it was compiled
+from, adjusted by every matching active PriceRule of the court in priority
+order (price = price * multiplier + amount), rounded to cents.
+
+Rules are compiled per court into a price table
+{(weekday, start_minute, end_minute): Decimal} covering every candidate
+block of every template. Tables are cached under the court's PRICING
+version, which only template, plan and rule changes bump (see
+arenas/signals.py), so bookings and holds don't invalidate them.
+Availability and booking creation read the same table, so the price a
+client is shown is the price that gets stored.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.utils import timezone
+
+from .cache import PRICING, aget_or_compute, get_many_or_compute, get_or_compute
+from .models import PriceRule, SlotTemplate
+from .timeblocks import minute_of_day, template_blocks
+
+CENTS = Decimal("0.01")
+
+
+def rule_matches(rule, weekday, start_minute, end_minute):
+    if rule.weekdays and weekday not in rule.weekdays:
+        return False
+    if rule.start_time is not None and start_minute < minute_of_day(rule.start_time):
+        return False
+    if rule.end_time is not None and start_minute >= minute_of_day(rule.end_time):
+        return False
+
+    minutes = end_minute - start_minute
+    if rule.min_minutes is not None and minutes < rule.min_minutes:
+        return False
+    if rule.max_minutes is not None and minutes > rule.max_minutes:
+        return False
+
+    return True
+
+
+def apply_rules(base_price, rules, weekday, start_minute, end_minute):
+    price = Decimal(base_price)
+    for rule in rules:
+        if rule_matches(rule, weekday, start_minute, end_minute):
+            price = price * rule.multiplier + rule.amount
+
+    return max(price, Decimal(0)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def build_price_table(templates, rules):
+    """
+    templates: active SlotTemplates of one court, ordered by start_time
+    rules: active PriceRules of that court, in priority order
+
+    When templates overlap, the earliest one prices a shared block,
+    like the covering-template lookup of booking creation.
+    """
+    table = {}
+    for tpl in templates:
+        for start_minute, end_minute in template_blocks(tpl):
+            key = (tpl.weekday, start_minute, end_minute)
+            if key not in table:
+                table[key] = apply_rules(
+                    tpl.base_price, rules, tpl.weekday, start_minute, end_minute
+                )
+
+    return table
+
+
+def _templates(court_ids):
+    return SlotTemplate.objects.filter(
+        court_id__in=court_ids,
+        is_active=True,
+    ).order_by("start_time")
+
+
+def _rules(court_ids):
+    return PriceRule.objects.filter(
+        court_id__in=court_ids,
+        is_active=True,
+    ).order_by("priority", "id")
+
+
+def compute_price_tables(court_ids):
+    """
+    Price tables of many courts in two queries.
+    returns: {court_id: table}
+    """
+    templates = {court_id: [] for court_id in court_ids}
+    rules = {court_id: [] for court_id in court_ids}
+
+    for tpl in _templates(court_ids):
+        templates[tpl.court_id].append(tpl)
+    for rule in _rules(court_ids):
+        rules[rule.court_id].append(rule)
+
+    return {
+        court_id: build_price_table(templates[court_id], rules[court_id])
+        for court_id in court_ids
+    }
+
+
+def get_price_table(court):
+    return get_or_compute(
+        court.id,
+        "prices",
+        lambda: compute_price_tables([court.id])[court.id],
+        kind=PRICING,
+    )
+
+
+def get_price_tables(court_ids):
+    """
+    Cached price tables of many courts; all misses are built together.
+    """
+    return get_many_or_compute(court_ids, "prices", compute_price_tables, kind=PRICING)
+
+
+async def aget_price_table(court):
+    async def acompute():
+        templates = [tpl async for tpl in _templates([court.id])]
+        rules = [rule async for rule in _rules([court.id])]
+        return build_price_table(templates, rules)
+
+    return await aget_or_compute(court.id, "prices", acompute, kind=PRICING)
+
+
+def block_price(table, start, end):
+    """
+    Price of the block [start, end), None if it isn't a candidate block.
+    """
+    tz = timezone.get_current_timezone()
+    local_start = timezone.localtime(start, tz)
+    local_end = timezone.localtime(end, tz)
+    if local_start.date() != local_end.date():
+        return None
+    if local_start.second or local_start.microsecond or local_end.second or local_end.microsecond:
+        return None
+
+    return table.get((
+        local_start.weekday(),
+        minute_of_day(local_start),
+        minute_of_day(local_end),
+    ))
+
+
+def priced_blocks(blocks, table):
+    """
+    Blocks as API dicts with ISO datetimes and the price as a string.
+    """
+    data = []
+    for b in blocks:
+        price = block_price(table, b["start"], b["end"])
+        data.append({
+            "start": b["start"].isoformat(),
+            "end": b["end"].isoformat(),
+            "price": None if price is None else str(price),
+        })
+
+    return data
@@ -1,12 +1,37 @@
 # arenas/serializers.py
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Arena, Court
+from .models import Arena, Court, PriceRule
+from .timeblocks import default_block_plan, validate_block_plan
 
 
 class CourtSerializer(serializers.ModelSerializer):
     class Meta:
         model = Court
-        fields = ['id', 'arena', 'name', 'sport_type', 'capacity', 'indoor']
+        fields = [
+            'id',
+            'arena',
+            'name',
+            'sport_type',
+            'capacity',
+            'indoor',
+            'block_plan',
+            'block_buffer_minutes',
+        ]
+
+    def validate(self, data):
+        instance = self.instance
+        plan = data.get(
+            'block_plan', instance.block_plan if instance else default_block_plan()
+        )
+        buffer_minutes = data.get(
+            'block_buffer_minutes', instance.block_buffer_minutes if instance else 0
+        )
+        try:
+            validate_block_plan(plan, buffer_minutes)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict)
+        return data
 
 
 class ArenaSerializer(serializers.ModelSerializer):
@@ -25,4 +50,72 @@ class ArenaSerializer(serializers.ModelSerializer):
             'is_active',
             'courts',
         ]
-        read_only_fields = ['id', 'owner', 'courts']
\ No newline at end of file
+        read_only_fields = ['id', 'owner', 'courts']
+
+
+class ArenaListSerializer(serializers.ModelSerializer):
+    """
+    Catalog listing without nested courts (add ?include=courts to get them).
+    """
+    class Meta:
+        model = Arena
+        fields = [
+            'id',
+            'owner',
+            'name',
+            'address',
+            'latitude',
+            'longitude',
+            'is_active',
+        ]
+        read_only_fields = fields
+
+
+class PriceRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceRule
+        fields = [
+            'id',
+            'court',
+            'name',
+            'weekdays',
+            'start_time',
+            'end_time',
+            'min_minutes',
+            'max_minutes',
+            'multiplier',
+            'amount',
+            'priority',
+            'is_active',
+        ]
+
+    def validate_weekdays(self, value):
+        if not isinstance(value, list) or any(
+            not isinstance(day, int) or isinstance(day, bool) or not 0 <= day <= 6
+            for day in value
+        ):
+            raise serializers.ValidationError('weekdays must be a list of 0 (Mon) .. 6 (Sun)')
+        return sorted(set(value))
+
+    def validate_multiplier(self, value):
+        if value < 0:
+            raise serializers.ValidationError('multiplier must not be negative')
+        return value
+
+    def validate(self, data):
+        def current(field):
+            if field in data:
+                return data[field]
+            return getattr(self.instance, field, None)
+
+        start_time, end_time = current('start_time'), current('end_time')
+        if start_time is not None and end_time is not None and end_time <= start_time:
+            raise serializers.ValidationError({'end_time': 'end_time must be after start_time'})
+
+        min_minutes, max_minutes = current('min_minutes'), current('max_minutes')
+        if min_minutes is not None and max_minutes is not None and max_minutes < min_minutes:
+            raise serializers.ValidationError(
+                {'max_minutes': 'max_minutes must not be below min_minutes'}
+            )
+
+        return data
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import PRICING, bump_court_version
+from .changes import record_change
+from .models import Court, PriceRule, SlotTemplate
+from .windows import mark_dirty, rematerialize_on_commit
+
+# Sent whenever the free time of a court may have changed
+# (booking created / cancelled, template, plan or price rule edited).
+# kwargs: court_id, start / end: the changed time, None for all of it
+availability_changed = Signal()
+
+
+def notify_availability_changed(court_id, start=None, end=None):
+    availability_changed.send(sender=Court, court_id=court_id, start=start, end=end)
+
+
+@receiver(availability_changed)
+def invalidate_availability_cache(sender, court_id, **kwargs):
+    # Only bump once the change is visible to other connections,
+    # otherwise a concurrent reader could re-cache the old state.
+    transaction.on_commit(lambda: bump_court_version(court_id))
+
+
+@receiver(availability_changed)
+def log_availability_change(sender, court_id, start=None, end=None, **kwargs):
+    # in the changing transaction, so a rollback takes it back too
+    record_change(court_id, start, end)
+
+
+@receiver(post_save, sender=Court)
+def court_changed(sender, instance, created, **kwargs):
+    # block plan (recompiled templates) or is_active may have changed
+    if not created:
+        notify_availability_changed(instance.id)
+        pricing_changed(instance.id)
+        calendar_changed(instance.id)
+
+
+@receiver(post_save, sender=SlotTemplate)
+@receiver(post_delete, sender=SlotTemplate)
+@receiver(post_save, sender=PriceRule)
+@receiver(post_delete, sender=PriceRule)
+def slot_template_changed(sender, instance, **kwargs):
+    notify_availability_changed(instance.court_id)
+    pricing_changed(instance.court_id)
+    if sender is SlotTemplate:
+        calendar_changed(instance.court_id)
+
+
+def pricing_changed(court_id):
+    # price tables are keyed on their own version, which booking and
+    # hold writes (availability_changed alone) leave alone
+    transaction.on_commit(lambda: bump_court_version(court_id, PRICING))
+
+
+def calendar_changed(court_id):
+    # readers fall back to templates until the windows are rebuilt
+    mark_dirty(court_id)
+    rematerialize_on_commit(court_id)
@@ -1,3 +1,503 @@
-from django.test import TestCase
+import random
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections, router, transaction
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.throttling import AnonRateThrottle
+
+from bookings.models import Booking
+from core.db_router import REPLICA_DB_ALIAS, replica_configured, use_replica
+from core.testing import assert_query_budget
+from core.throttling import THROTTLE_CACHE_ALIAS
+from users.serializers import ClaimsTokenObtainPairSerializer
+from .availability import split_into_blocks, subtract_busy_from_slots, subtract_interval
+from .changes import ChangeFeed
+from .cache import aget_or_compute, get_availability_cache, get_many_or_compute, get_or_compute
+from .geo import haversine_km
+from .intervals import TICKS_PER_MINUTE, from_ticks, split_ticks, to_ticks
+from .models import Arena, Court, CourtCalendar, OpenWindow, PriceRule, SlotTemplate
+from .pricing import apply_rules, build_price_table, get_price_table
+from .signals import notify_availability_changed
+from .windows import calendar_horizon, materialize
+
+
+def aware(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class ArenaTestData(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="x")
+        cls.user = User.objects.create_user("player", password="x")
+        cls.arenas = []
+        for i in range(3):
+            arena = Arena.objects.create(
+                owner=cls.owner,
+                name=f"Arena {i}",
+                address=f"Street {i}",
+                latitude=Decimal("35.70"),
+                longitude=Decimal("51.40"),
+            )
+            cls.arenas.append(arena)
+            for j, sport_type in enumerate(("padel", "football")):
+                court = Court.objects.create(arena=arena, name=f"Court {j}", sport_type=sport_type)
+                for weekday in range(7):
+                    SlotTemplate.objects.create(
+                        court=court,
+                        weekday=weekday,
+                        start_time=time(10),
+                        end_time=time(22),
+                        base_price=Decimal("100"),
+                    )
+        cls.court = Court.objects.filter(arena=cls.arenas[0]).order_by("id").first()
+        cls.day = timezone.localdate() + timedelta(days=2)
+
+    def setUp(self):
+        get_availability_cache().clear()
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+class QueryBudgetTests(ArenaTestData):
+    """
+    The query_budget each view declares holds, whatever the data size.
+    """
+    def test_arena_list(self):
+        response = assert_query_budget(self.client, "get", "/api/v1/arenas/")
+        self.assertEqual(response.status_code, 200)
+
+        response = assert_query_budget(self.client, "get", "/api/v1/arenas/?include=courts")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(arena["courts"] for arena in response.data["results"]))
+
+    def test_availability_blocks(self):
+        Booking.objects.create(
+            user=self.user, court=self.court,
+            start=aware(self.day, 10), end=aware(self.day, 11, 30),
+        )
+        path = f"/api/v1/availability/blocks/?court_id={self.court.id}&date={self.day}"
+
+        # cache miss, then hit
+        cold = assert_query_budget(self.client, "get", path)
+        warm = assert_query_budget(self.client, "get", path, budget=1)
+
+        self.assertEqual(cold.status_code, 200)
+        self.assertEqual(cold.data, warm.data)
+        self.assertNotIn(aware(self.day, 10).isoformat(), [b["start"] for b in cold.data])
+
+    def test_my_bookings(self):
+        for court in Court.objects.all():
+            Booking.objects.create(
+                user=self.user, court=court,
+                start=aware(self.day, 10), end=aware(self.day, 11, 30),
+            )
+        self.authenticate(self.user)
+
+        for query in ("", "?when=upcoming", "?when=past", "?status=RESERVED"):
+            response = assert_query_budget(self.client, "get", f"/api/v1/bookings/mine/{query}")
+            self.assertEqual(response.status_code, 200)
+
+
+class FreeCourtSearchTests(ArenaTestData):
+    def search(self, **params):
+        params = {"sport_type": "padel", "date": self.day.isoformat(), "start": "10:00", **params}
+        return self.client.get("/api/v1/availability/search/", params)
+
+    def test_nearest_courts_are_kept_under_the_cap(self):
+        # about 5 km, 1 km and 22 km from the searched point
+        for arena, latitude in zip(self.arenas, ("35.745", "35.709", "35.90")):
+            arena.latitude = Decimal(latitude)
+            arena.save(update_fields=["latitude"])
+
+        response = self.search(lat="35.70", lng="51.40", radius_km="10")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["arena_id"] for item in response.data],
+            [self.arenas[1].id, self.arenas[0].id],
+        )
+        self.assertAlmostEqual(
+            response.data[0]["distance_km"],
+            haversine_km(35.70, 51.40, Decimal("35.709"), Decimal("51.40")),
+            places=3,
+        )
+
+        with patch("arenas.api.MAX_SEARCH_COURTS", 1):
+            response = self.search(lat="35.70", lng="51.40", radius_km="10")
+        self.assertEqual([item["arena_id"] for item in response.data], [self.arenas[1].id])
+
+    def test_sport_type_matches_case_insensitively(self):
+        Court.objects.filter(id=self.court.id).update(sport_type="Padel")
+
+        response = self.search(arena_id=self.arenas[0].id, sport_type="PADEL ")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["court_id"] for item in response.data], [self.court.id])
+
+    def test_invalid_arena_id(self):
+        response = self.search(arena_id="abc")
+        self.assertEqual(response.status_code, 400)
+
+
+class PricingTests(SimpleTestCase):
+    def test_rules_apply_in_priority_order(self):
+        rules = [
+            PriceRule(weekdays=[5, 6], multiplier=Decimal("2")),
+            PriceRule(start_time=time(18), amount=Decimal("10")),
+            PriceRule(min_minutes=120, amount=Decimal("1000")),
+        ]
+
+        self.assertEqual(apply_rules(Decimal("100"), rules, 5, 18 * 60, 19 * 60 + 30), Decimal("210.00"))
+        self.assertEqual(apply_rules(Decimal("100"), rules, 0, 18 * 60, 19 * 60 + 30), Decimal("110.00"))
+        self.assertEqual(apply_rules(Decimal("100"), rules, 0, 10 * 60, 11 * 60 + 30), Decimal("100.00"))
+
+    def test_rounding_and_floor(self):
+        third = [PriceRule(multiplier=Decimal("0.333"))]
+        self.assertEqual(apply_rules(Decimal("100.05"), third, 0, 600, 690), Decimal("33.32"))
+
+        discount = [PriceRule(amount=Decimal("-500"))]
+        self.assertEqual(apply_rules(Decimal("100"), discount, 0, 600, 690), Decimal("0.00"))
+
+    def test_earliest_template_prices_a_shared_block(self):
+        templates = [
+            SlotTemplate(weekday=0, start_time=time(10), end_time=time(13), base_price=Decimal("100")),
+            SlotTemplate(weekday=0, start_time=time(11, 30), end_time=time(14, 30), base_price=Decimal("50")),
+        ]
+
+        self.assertEqual(build_price_table(templates, []), {
+            (0, 600, 690): Decimal("100.00"),
+            (0, 690, 780): Decimal("100.00"),
+            (0, 780, 870): Decimal("50.00"),
+        })
+
+
+class PriceTableCacheTests(ArenaTestData):
+    def test_bookings_keep_the_table_and_rule_edits_replace_it(self):
+        key = (self.day.weekday(), 600, 690)
+        self.assertEqual(get_price_table(self.court)[key], Decimal("100.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_availability_changed(self.court.id, aware(self.day, 10), aware(self.day, 11, 30))
+        with self.assertNumQueries(0):
+            get_price_table(self.court)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PriceRule.objects.create(court=self.court, name="Double", multiplier=Decimal("2"))
+        self.assertEqual(get_price_table(self.court)[key], Decimal("200.00"))
+
+
+class CalendarRematerializeTests(ArenaTestData):
+    # setUpTestData's callbacks never run, so its courts are still pending
+    # (and have no calendar): the rebuilds below may include them
+    def setUp(self):
+        super().setUp()
+        self.new_court = Court.objects.create(arena=self.arenas[0], name="New", sport_type="padel")
+
+    def add_week(self):
+        for weekday in range(7):
+            SlotTemplate.objects.create(
+                court=self.new_court,
+                weekday=weekday,
+                start_time=time(10),
+                end_time=time(22),
+                base_price=Decimal("100"),
+            )
+
+    def test_once_per_court_per_transaction(self):
+        with patch("arenas.windows.materialize") as materialize:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.add_week()
+
+        materialize.assert_called_once()
+        self.assertIn(self.new_court.id, materialize.call_args.args[0])
+
+    def test_rolled_back_savepoint_doesnt_take_the_rebuild_along(self):
+        with patch("arenas.windows.materialize") as materialize:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        self.add_week()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                self.add_week()
+
+        materialize.assert_called_once()
+        self.assertIn(self.new_court.id, materialize.call_args.args[0])
+
+    def test_rolled_back_edit_leaves_a_clean_calendar_alone(self):
+        first, last = calendar_horizon()
+        materialize([self.new_court.id], first, last)
+
+        with patch("arenas.windows.materialize") as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        self.add_week()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                self.court.save()  # plan edit of another court
+
+        rebuild.assert_called_once()
+        self.assertIn(self.court.id, rebuild.call_args.args[0])
+        self.assertNotIn(self.new_court.id, rebuild.call_args.args[0])
+
+    def test_deleted_court_is_not_rebuilt(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_week()
+        self.assertTrue(CourtCalendar.objects.filter(court_id=self.new_court.id).exists())
+
+        # deleting the court deletes its templates, whose signals
+        # schedule a rebuild of the court
+        court_id = self.new_court.id
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.new_court.delete()
+
+        self.assertTrue(callbacks)
+        self.assertFalse(CourtCalendar.objects.filter(court_id=court_id).exists())
+        self.assertFalse(OpenWindow.objects.filter(court_id=court_id).exists())
+
+
+class ReplicaCacheFillTests(SimpleTestCase):
+    """
+    Availability cache misses are computed on the primary, also inside
+    use_replica(): the entry outlives the request.
+    """
+    def setUp(self):
+        get_availability_cache().clear()
+        patcher = patch("core.db_router.replica_configured", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_alias(self):
+        return router.db_for_read(Booking)
+
+    def test_misses_are_computed_on_the_primary(self):
+        with use_replica():
+            self.assertEqual(self.read_alias(), REPLICA_DB_ALIAS)
+            self.assertEqual(get_or_compute(1, "alias", self.read_alias), "default")
+            self.assertEqual(
+                get_many_or_compute([1, 2], "alias", lambda ids: {i: self.read_alias() for i in ids}),
+                {1: "default", 2: "default"},
+            )
+            # and back to the replica for the rest of the request
+            self.assertEqual(self.read_alias(), REPLICA_DB_ALIAS)
+
+    async def test_async_misses_are_computed_on_the_primary(self):
+        async def acompute():
+            return await sync_to_async(self.read_alias)()
+
+        with use_replica():
+            self.assertEqual(await aget_or_compute(1, "alias", acompute), "default")
+            self.assertEqual(await sync_to_async(self.read_alias)(), REPLICA_DB_ALIAS)
+
+
+@skipUnless(replica_configured(), "needs the replica alias, e.g. DB_REPLICA_NAME=replica")
+class ReplicaAvailabilityTests(TransactionTestCase):
+    """
+    Both aliases: a cold availability request reads the court from the
+    replica but computes the cached blocks on the primary.
+    """
+    # the test runner collects every class's aliases, skipped or not
+    databases = {"default", REPLICA_DB_ALIAS} if replica_configured() else {"default"}
+
+    def test_cached_blocks_come_from_the_primary(self):
+        owner = User.objects.create_user("owner", password="x")
+        arena = Arena.objects.create(owner=owner, name="Arena", address="Street")
+        court = Court.objects.create(arena=arena, name="Court", sport_type="padel")
+        day = timezone.localdate() + timedelta(days=2)
+        SlotTemplate.objects.create(
+            court=court, weekday=day.weekday(),
+            start_time=time(10), end_time=time(22), base_price=Decimal("100"),
+        )
+        Booking.objects.create(user=owner, court=court, start=aware(day, 10), end=aware(day, 11, 30))
+        get_availability_cache().clear()
+
+        with (
+            CaptureQueriesContext(connections["default"]) as primary,
+            CaptureQueriesContext(connections[REPLICA_DB_ALIAS]) as replica,
+        ):
+            response = self.client.get(f"/api/v1/availability/blocks/?court_id={court.id}&date={day}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(aware(day, 10).isoformat(), [b["start"] for b in response.data])
+
+        def tables(queries):
+            return " ".join(query["sql"] for query in queries)
+
+        self.assertIn("arenas_court", tables(replica))
+        self.assertNotIn("bookings_booking", tables(replica))
+        self.assertIn("bookings_booking", tables(primary))
+
+
+class ThrottleTests(ArenaTestData):
+    def setUp(self):
+        super().setUp()
+        caches[THROTTLE_CACHE_ALIAS].clear()
+        caches["default"].clear()
+
+    def rest_framework(self, **overrides):
+        return self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, **overrides})
+
+    def get(self, ip):
+        return self.client.get("/api/v1/arenas/", REMOTE_ADDR=ip).status_code
+
+    def test_reads_over_the_client_limit_dont_count_globally(self):
+        rates = {"read_anon": "2/min", "read_global": "3/min"}
+        with self.rest_framework(DEFAULT_THROTTLE_RATES=rates):
+            self.assertEqual([self.get("10.0.0.1") for _ in range(5)], [200, 200, 429, 429, 429])
+            # the global window holds the two allowed reads only
+            self.assertEqual([self.get("10.0.0.2") for _ in range(2)], [200, 429])
+
+    async def test_async_views_take_stock_drf_throttles(self):
+        path = f"/api/v1/availability/blocks/async/?court_id={self.court.id}&date={self.day}"
+        # SimpleRateThrottle reads the rates once, at import
+        with (
+            self.rest_framework(DEFAULT_THROTTLE_CLASSES=["rest_framework.throttling.AnonRateThrottle"]),
+            patch.object(AnonRateThrottle, "THROTTLE_RATES", {"anon": "1/min"}),
+        ):
+            client = AsyncClient()
+            first = await client.get(path)
+            second = await client.get(path)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn("Retry-After", second.headers)
+
+    async def test_async_views_throttle_users_as_users(self):
+        path = f"/api/v1/availability/blocks/async/?court_id={self.court.id}&date={self.day}"
+        token = await sync_to_async(
+            lambda: str(ClaimsTokenObtainPairSerializer.get_token(self.user).access_token)
+        )()
+        client = AsyncClient()
+
+        rates = {"read_anon": "1/min", "read_user": "3/min"}
+        with self.rest_framework(DEFAULT_THROTTLE_RATES=rates):
+            statuses = [
+                (await client.get(path, headers={"Authorization": f"Bearer {token}"})).status_code
+                for _ in range(4)
+            ]
+            self.assertEqual((await client.get(path)).status_code, 200)
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        for bad in (path, f"/api/v1/availability/stream/?court_id={self.court.id}"):
+            response = await client.get(bad, headers={"Authorization": "Bearer nope"})
+            self.assertEqual(response.status_code, 401)
+
+
+class ChangeFeedTests(SimpleTestCase):
+    async def test_feed_runs_on_its_own_thread_and_connection(self):
+        threads = {}
+
+        async def alatest_seq():
+            threads["feed"] = await sync_to_async(threading.get_ident)()
+            return 0
+
+        async def aread_settled(cursor):
+            return [], cursor
+
+        def close():
+            threads["close"] = threading.get_ident()
+
+        with (
+            patch("arenas.changes.alatest_seq", alatest_seq),
+            patch("arenas.changes.aread_settled", aread_settled),
+            patch("arenas.changes.POLL_INTERVAL_SECONDS", 0),
+            patch("arenas.changes.connection") as connection,
+        ):
+            connection.close = close
+            # as a request under ASGI
+            async with ThreadSensitiveContext():
+                threads["request"] = await sync_to_async(threading.get_ident)()
+                feed = ChangeFeed()
+                subscription = feed.subscribe([1])
+                task = feed.task
+                self.assertEqual(await feed.position(), 0)
+                feed.unsubscribe(subscription)
+                await task
+
+        self.assertNotEqual(threads["feed"], threads["request"])
+        self.assertEqual(threads["close"], threads["feed"])
+
+
+class IntervalEngineTests(TestCase):
+    """
+    The sweep-line engine returns what subtract_interval / split_into_blocks
+    (the reference implementation) return.
+    """
+    def reference(self, slots, busy_intervals, block_minutes):
+        pieces = []
+        for slot in slots:
+            current = [(slot["start"], slot["end"])]
+            for busy_start, busy_end in busy_intervals:
+                current = [
+                    piece
+                    for start, end in current
+                    for piece in subtract_interval(start, end, busy_start, busy_end)
+                ]
+            pieces.extend(current)
+        pieces.sort()
+
+        blocks = [
+            (block["start"], block["end"])
+            for start, end in pieces
+            for block in split_into_blocks(start, end, block_minutes)
+        ]
+        return pieces, blocks
+
+    def engine(self, slots, busy_intervals, block_minutes):
+        remaining = subtract_busy_from_slots(slots, busy_intervals)
+        pieces = [(slot["start"], slot["end"]) for slot in remaining]
+
+        tz = timezone.get_current_timezone()
+        blocks = [
+            (from_ticks(start, tz), from_ticks(end, tz))
+            for piece_start, piece_end in pieces
+            for start, end in split_ticks(
+                to_ticks(piece_start), to_ticks(piece_end), block_minutes * TICKS_PER_MINUTE,
+            )
+        ]
+        return pieces, blocks
+
+    def test_matches_reference_on_random_days(self):
+        rng = random.Random(0)
+        day = timezone.localdate()
+
+        def at(minute):
+            return aware(day, 0) + timedelta(minutes=minute)
+
+        for _ in range(1000):
+            slots = []
+            for _ in range(rng.randint(0, 4)):
+                start = rng.randrange(0, 20 * 60, 15)
+                slots.append({
+                    "start": at(start),
+                    "end": at(start + rng.randrange(15, 8 * 60, 15)),
+                    "price": Decimal("100"),
+                })
+            busy_intervals = []
+            for _ in range(rng.randint(0, 8)):
+                start = rng.randrange(0, 23 * 60, 5)
+                busy_intervals.append((at(start), at(start + rng.randrange(5, 4 * 60, 5))))
+            block_minutes = rng.choice((30, 60, 90))
+
+            # overlapping slots may come out in another order
+            pieces, blocks = self.engine(slots, busy_intervals, block_minutes)
+            expected_pieces, expected_blocks = self.reference(slots, busy_intervals, block_minutes)
+            self.assertEqual(sorted(pieces), expected_pieces)
+            self.assertEqual(sorted(blocks), sorted(expected_blocks))
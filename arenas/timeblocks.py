@@ -1,9 +1,99 @@
-from datetime import timedelta
-
-# All reservation blocks (minutes)
-BLOCK_DELTAS = [
-    timedelta(minutes=90),  # 1h30
-    timedelta(minutes=90),
-    timedelta(minutes=90),
-    timedelta(minutes=90),
-]
+"""
+Block plans: how a court cuts its SlotTemplate windows into bookable blocks.
+
+A plan is a sequence of block lengths in minutes, applied cyclically from
+the start of every window, with Court.block_buffer_minutes left free after
+each block. [90] gives back-to-back 90 minute blocks; [60, 90] alternates.
+A block that would run past the window end is dropped.
+
+Blocks are compiled once per template (SlotTemplate.compiled_blocks, as
+[start_minute, end_minute] pairs of local wall time) when the template or
+its court's plan changes. The request path only removes booked blocks.
+"""
+from django.core.exceptions import ValidationError
+
+DEFAULT_BLOCK_PLAN = [90]
+
+MIN_BLOCK_MINUTES = 15
+MAX_BLOCK_MINUTES = 480
+MAX_PLAN_LENGTH = 12
+MAX_BUFFER_MINUTES = 120
+
+# block lengths and buffers must stay on the occupancy grid
+PLAN_STEP_MINUTES = 5
+
+
+def default_block_plan():
+    return list(DEFAULT_BLOCK_PLAN)
+
+
+def validate_block_plan(plan, buffer_minutes=0):
+    """
+    Raises django.core.exceptions.ValidationError keyed by Court field.
+    """
+    if not isinstance(plan, list) or not plan:
+        raise ValidationError({"block_plan": "block_plan must be a non-empty list of minutes"})
+    if len(plan) > MAX_PLAN_LENGTH:
+        raise ValidationError(
+            {"block_plan": f"block_plan can have at most {MAX_PLAN_LENGTH} entries"}
+        )
+
+    for minutes in plan:
+        if (
+            not isinstance(minutes, int)
+            or isinstance(minutes, bool)
+            or not MIN_BLOCK_MINUTES <= minutes <= MAX_BLOCK_MINUTES
+            or minutes % PLAN_STEP_MINUTES
+        ):
+            raise ValidationError({
+                "block_plan": (
+                    f"Block lengths must be multiples of {PLAN_STEP_MINUTES} between "
+                    f"{MIN_BLOCK_MINUTES} and {MAX_BLOCK_MINUTES} minutes"
+                ),
+            })
+
+    if not 0 <= buffer_minutes <= MAX_BUFFER_MINUTES or buffer_minutes % PLAN_STEP_MINUTES:
+        raise ValidationError({
+            "block_buffer_minutes": (
+                f"block_buffer_minutes must be a multiple of {PLAN_STEP_MINUTES} "
+                f"between 0 and {MAX_BUFFER_MINUTES}"
+            ),
+        })
+
+
+def minute_of_day(value, round_up=False):
+    minutes = value.hour * 60 + value.minute
+    if round_up and (value.second or value.microsecond):
+        minutes += 1
+    return minutes
+
+
+def compile_blocks(start_time, end_time, plan=None, buffer_minutes=0):
+    """
+    Candidate blocks of one window [start_time, end_time).
+
+    returns: [[start_minute, end_minute], ...] in order
+    """
+    plan = plan or DEFAULT_BLOCK_PLAN
+    cursor = minute_of_day(start_time, round_up=True)
+    window_end = minute_of_day(end_time)
+
+    blocks = []
+    step = 0
+    while cursor + plan[step % len(plan)] <= window_end:
+        block_end = cursor + plan[step % len(plan)]
+        blocks.append([cursor, block_end])
+        cursor = block_end + buffer_minutes
+        step += 1
+
+    return blocks
+
+
+def template_blocks(template):
+    """
+    Compiled blocks of a SlotTemplate. Rows written without save()
+    (bulk_create) and not yet compiled fall back to the default plan.
+    """
+    if template.compiled_blocks is not None:
+        return template.compiled_blocks
+    return compile_blocks(template.start_time, template.end_time)
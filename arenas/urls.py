@@ -2,13 +2,19 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import ArenaViewSet, CourtViewSet
-from .api import AvailabilityBlocksView
+from .views import ArenaViewSet, CourtViewSet, PriceRuleViewSet
+from . import async_views
+from .api import AvailabilityBlocksView, AvailabilityRangeView, FreeCourtSearchView
 
 router = DefaultRouter()
 router.register('arenas', ArenaViewSet, basename='arena')
 router.register('courts', CourtViewSet, basename='court')
+router.register('price-rules', PriceRuleViewSet, basename='price-rule')
 
 urlpatterns = [
     path('availability/blocks/', AvailabilityBlocksView.as_view()),
+    path('availability/blocks/async/', async_views.availability_blocks),
+    path('availability/range/', AvailabilityRangeView.as_view()),
+    path('availability/stream/', async_views.availability_stream),
+    path('availability/search/', FreeCourtSearchView.as_view()),
 ] + router.urls
@@ -1,14 +1,71 @@
-from rest_framework import viewsets, permissions
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils.cache import patch_cache_control
+from rest_framework import status, viewsets, permissions
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 
-from .models import Arena, Court
-from .serializers import ArenaSerializer, CourtSerializer
+from core.db_router import ReplicaReadMixin
+from .geo import haversine_km, parse_point, within_cells_q
+from .models import Arena, Court, PriceRule, sport_type_matches
+from .pagination import ArenaCursorPagination, CourtCursorPagination
+from .serializers import (
+    ArenaListSerializer,
+    ArenaSerializer,
+    CourtSerializer,
+    PriceRuleSerializer,
+)
 from .permissions import IsArenaOwnerOrAdmin
 
+# Public catalog reads may be cached by clients / proxies for this long
+CATALOG_CACHE_SECONDS = 60
 
-class ArenaViewSet(viewsets.ModelViewSet):
-    queryset = Arena.objects.all()
+# Limits of GET /api/v1/arenas/nearby/
+MAX_NEARBY_LIMIT = 100
+DEFAULT_NEARBY_LIMIT = 20
+
+
+class CatalogCacheMixin:
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS and response.status_code == 200:
+            patch_cache_control(response, public=True, max_age=CATALOG_CACHE_SECONDS)
+        return response
+
+
+class ArenaViewSet(ReplicaReadMixin, CatalogCacheMixin, viewsets.ModelViewSet):
+    """
+    GET /api/v1/arenas/                   active arenas, no nested courts
+    GET /api/v1/arenas/?include=courts    with their active courts
+    GET /api/v1/arenas/<id>/              always with active courts
+    GET /api/v1/arenas/nearby/?lat=..&lng=..&radius_km=10&sport_type=padel&limit=20
+    """
     serializer_class = ArenaSerializer
+    pagination_class = ArenaCursorPagination
+    # arenas + (optional) one prefetch query for all their courts
+    query_budget = {"list": 2, "retrieve": 2, "nearby": 1}
+
+    def include_courts(self):
+        if self.action == "list":
+            return "courts" in self.request.query_params.get("include", "").split(",")
+        return True
+
+    def get_queryset(self):
+        queryset = Arena.objects.all()
+
+        if self.request.method in permissions.SAFE_METHODS:
+            queryset = queryset.filter(is_active=True)
+            if self.include_courts():
+                queryset = queryset.prefetch_related(
+                    Prefetch("courts", queryset=Court.objects.filter(is_active=True))
+                )
+
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "nearby" or (self.action == "list" and not self.include_courts()):
+            return ArenaListSerializer
+        return ArenaSerializer
 
     def get_permissions(self):
         # Read = public
@@ -20,12 +77,82 @@ class ArenaViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         # Owner becomes the logged-in user automatically
-        serializer.save(owner=self.request.user)
+        serializer.save(owner_id=self.request.user.id)
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        Active arenas within radius_km, nearest first.
+        Indexed grid-cell prefilter, then exact haversine distance.
+        """
+        try:
+            lat, lng, radius_km = parse_point(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_NEARBY_LIMIT))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MAX_NEARBY_LIMIT))
+
+        queryset = Arena.objects.filter(
+            within_cells_q(lat, lng, radius_km),
+            is_active=True,
+        )
+
+        sport_type = request.query_params.get("sport_type")
+        if sport_type:
+            queryset = queryset.filter(Exists(
+                Court.objects.filter(
+                    sport_type_matches(sport_type),
+                    arena=OuterRef("pk"),
+                    is_active=True,
+                )
+            ))
+
+        found = []
+        for arena in queryset:
+            distance = haversine_km(lat, lng, arena.latitude, arena.longitude)
+            if distance <= radius_km:
+                found.append((distance, arena))
+        found.sort(key=lambda pair: pair[0])
+
+        data = []
+        for distance, arena in found[:limit]:
+            item = self.get_serializer(arena).data
+            item["distance_km"] = round(distance, 3)
+            data.append(item)
+
+        return Response(data)
 
 
-class CourtViewSet(viewsets.ModelViewSet):
-    queryset = Court.objects.all()
+class CourtViewSet(ReplicaReadMixin, CatalogCacheMixin, viewsets.ModelViewSet):
+    """
+    GET /api/v1/courts/?arena=<id>&sport_type=padel    active courts only
+    """
     serializer_class = CourtSerializer
+    pagination_class = CourtCursorPagination
+    query_budget = {"list": 1, "retrieve": 1}
+
+    def get_queryset(self):
+        queryset = Court.objects.all()
+
+        if self.request.method in permissions.SAFE_METHODS:
+            queryset = queryset.filter(is_active=True, arena__is_active=True)
+
+            arena_id = self.request.query_params.get("arena")
+            if arena_id and arena_id.isdigit():
+                queryset = queryset.filter(arena_id=arena_id)
+
+            sport_type = self.request.query_params.get("sport_type")
+            if sport_type:
+                queryset = queryset.filter(sport_type_matches(sport_type))
+        else:
+            # IsArenaOwnerOrAdmin reads court.arena.owner_id
+            queryset = queryset.select_related("arena")
+
+        return queryset
 
     def get_permissions(self):
         # Read = public
@@ -41,3 +168,37 @@ class CourtViewSet(viewsets.ModelViewSet):
         if arena.owner_id != self.request.user.id and not self.request.user.is_superuser:
             raise PermissionDenied("You can only add courts to your own arenas.")
         serializer.save()
+
+
+class PriceRuleViewSet(viewsets.ModelViewSet):
+    """
+    /api/v1/price-rules/?court=<id>    rules of the owner's courts only
+    """
+    serializer_class = PriceRuleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = PriceRule.objects.all()
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(court__arena__owner_id=self.request.user.id)
+
+        court_id = self.request.query_params.get("court")
+        if court_id and court_id.isdigit():
+            queryset = queryset.filter(court_id=court_id)
+
+        return queryset.order_by("court_id", "priority", "id")
+
+    def check_court_owner(self, serializer):
+        court = serializer.validated_data.get("court")
+        if court is None:
+            return
+        if court.arena.owner_id != self.request.user.id and not self.request.user.is_superuser:
+            raise PermissionDenied("You can only price your own courts.")
+
+    def perform_create(self, serializer):
+        self.check_court_owner(serializer)
+        serializer.save()
+
+    def perform_update(self, serializer):
+        self.check_court_owner(serializer)
+        serializer.save()
@@ -0,0 +1,217 @@
+"""
+Materialized dated availability (OpenWindow) and its freshness (CourtCalendar).
+
+SlotTemplate stays the source of truth. materialize() expands courts'
+templates into OpenWindows for a date range. Template and plan edits mark
+the court's calendar dirty inside the editing transaction and
+re-materialize it on commit (arenas/signals.py). `manage.py
+build_calendar` prunes past days, extends every calendar to CALENDAR_DAYS
+ahead and catches up dirty courts (e.g. after bulk writes that skip
+signals).
+
+Readers (arenas/availability.py) use the windows only for courts whose
+calendar is clean and covers the requested dates, SlotTemplate otherwise,
+so a missing or stale calendar is slower, never wrong.
+"""
+import threading
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import build_datetime, get_weekday, iter_dates, minute_to_time
+from .intervals import TICKS_PER_MINUTE, to_ticks
+from .models import Court, CourtCalendar, OpenWindow, SlotTemplate
+from .timeblocks import template_blocks
+
+CALENDAR_DAYS = 60
+
+MATERIALIZE_BATCH_SIZE = 2000
+# courts per transaction in build_calendar
+MATERIALIZE_CHUNK_COURTS = 100
+
+
+class _Pending(threading.local):
+    """
+    Court ids rematerialize_on_commit() scheduled on this thread's
+    connection.
+    """
+    def __init__(self):
+        self.court_ids = set()
+
+
+_pending = _Pending()
+
+
+def calendar_horizon(today=None):
+    """
+    returns: (first, last) date every calendar should cover
+    """
+    today = today or timezone.localdate()
+    return today, today + timedelta(days=CALENDAR_DAYS - 1)
+
+
+def build_windows(templates, start_date, end_date):
+    """
+    Unsaved OpenWindows of the active templates over [start_date, end_date].
+    """
+    tz = timezone.get_current_timezone()
+    by_weekday = {}
+    for tpl in templates:
+        by_weekday.setdefault(tpl.weekday, []).append(tpl)
+
+    windows = []
+    for day in iter_dates(start_date, end_date):
+        for tpl in by_weekday.get(get_weekday(day), []):
+            start = build_datetime(day, tpl.start_time, tz)
+            origin = to_ticks(start)
+            windows.append(OpenWindow(
+                court_id=tpl.court_id,
+                template=tpl,
+                date=day,
+                start=start,
+                end=build_datetime(day, tpl.end_time, tz),
+                price=tpl.base_price,
+                blocks=[
+                    [
+                        (to_ticks(build_datetime(day, minute_to_time(block_start), tz)) - origin)
+                        // TICKS_PER_MINUTE,
+                        (to_ticks(build_datetime(day, minute_to_time(block_end), tz)) - origin)
+                        // TICKS_PER_MINUTE,
+                    ]
+                    for block_start, block_end in template_blocks(tpl)
+                ],
+            ))
+
+    return windows
+
+
+@transaction.atomic
+def materialize(court_ids, start_date, end_date, extend=False):
+    """
+    Write the OpenWindows of [start_date, end_date] and mark the calendars
+    clean. extend=True only appends those dates to a clean calendar;
+    otherwise every existing window of the courts is replaced.
+
+    returns: number of windows written
+    """
+    court_ids = list(court_ids)
+    if not court_ids:
+        return 0
+
+    CourtCalendar.objects.bulk_create(
+        [CourtCalendar(court_id=court_id) for court_id in court_ids],
+        ignore_conflicts=True,
+    )
+    # Serializes with mark_dirty() of a concurrent template edit: either
+    # the edit waits and dirties the result, or the templates read below
+    # already include it.
+    list(CourtCalendar.objects.select_for_update().filter(court_id__in=court_ids))
+
+    templates = SlotTemplate.objects.filter(
+        court_id__in=court_ids,
+        is_active=True,
+    ).order_by("start_time")
+
+    stale = OpenWindow.objects.filter(court_id__in=court_ids)
+    if extend:
+        stale = stale.filter(date__gte=start_date, date__lte=end_date)
+    stale.delete()
+
+    windows = OpenWindow.objects.bulk_create(
+        build_windows(templates, start_date, end_date),
+        batch_size=MATERIALIZE_BATCH_SIZE,
+    )
+
+    calendars = CourtCalendar.objects.filter(court_id__in=court_ids)
+    if extend:
+        calendars.update(generated_until=end_date, updated_at=timezone.now())
+    else:
+        calendars.update(
+            generated_from=start_date,
+            generated_until=end_date,
+            dirty=False,
+            updated_at=timezone.now(),
+        )
+
+    return len(windows)
+
+
+def mark_dirty(court_id):
+    """
+    Stop readers from using the court's windows; call inside the
+    transaction that changes its templates or plan.
+    """
+    CourtCalendar.objects.filter(court_id=court_id).update(dirty=True, updated_at=timezone.now())
+
+
+def rematerialize_on_commit(court_id):
+    """
+    Re-materialize the court's calendar when the current transaction
+    commits, once however many of its templates the transaction edits.
+    """
+    _pending.court_ids.add(court_id)
+    # one callback per call, so a rolled back savepoint can't take the
+    # only one along; the first to run drains the set
+    transaction.on_commit(_rematerialize_pending)
+
+
+def _rematerialize_pending():
+    court_ids, _pending.court_ids = _pending.court_ids, set()
+    if not court_ids:
+        return
+
+    # Ids left over from a rolled back transaction are still in the set:
+    # only rebuild calendars that are dirty or missing. Templates are also
+    # deleted along with their court, which then no longer exists.
+    court_ids = list(
+        Court.objects.filter(id__in=court_ids)
+        .exclude(calendar__dirty=False)
+        .values_list("id", flat=True)
+    )
+    first, last = calendar_horizon()
+    materialize(court_ids, first, last)
+
+
+def build_calendars(today=None):
+    """
+    The rolling job behind `manage.py build_calendar`:
+    - drop windows before today
+    - regenerate courts that are dirty or have no calendar yet
+    - extend clean calendars to the horizon (only the missing days)
+
+    returns: {"pruned": ..., "regenerated": courts, "extended": courts, "windows": ...}
+    """
+    first, last = calendar_horizon(today)
+    stats = {"pruned": 0, "regenerated": 0, "extended": 0, "windows": 0}
+
+    stats["pruned"], _ = OpenWindow.objects.filter(date__lt=first).delete()
+    CourtCalendar.objects.filter(generated_from__lt=first).update(generated_from=first)
+
+    active = Court.objects.filter(is_active=True)
+    clean = CourtCalendar.objects.filter(court__is_active=True, dirty=False, generated_until__isnull=False)
+
+    regenerate = list(
+        active.exclude(id__in=clean.values("court_id")).values_list("id", flat=True)
+    )
+    for i in range(0, len(regenerate), MATERIALIZE_CHUNK_COURTS):
+        chunk = regenerate[i:i + MATERIALIZE_CHUNK_COURTS]
+        stats["windows"] += materialize(chunk, first, last)
+        stats["regenerated"] += len(chunk)
+
+    # grouped by how far they already reach, so each group is one append
+    behind = {}
+    for court_id, until in clean.filter(generated_until__lt=last).values_list(
+        "court_id", "generated_until"
+    ):
+        behind.setdefault(until, []).append(court_id)
+
+    for until, court_ids in behind.items():
+        for i in range(0, len(court_ids), MATERIALIZE_CHUNK_COURTS):
+            chunk = court_ids[i:i + MATERIALIZE_CHUNK_COURTS]
+            stats["windows"] += materialize(
+                chunk, max(first, until + timedelta(days=1)), last, extend=True,
+            )
+            stats["extended"] += len(chunk)
+
+    return stats
@@ -0,0 +1,40 @@
+"""
+Native async twin of MyBookingsView for the ASGI stack.
+"""
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from core.async_api import aauthenticate, athrottle, json_response
+from .pagination import MyBookingsCursorPagination
+from .serializers import MyBookingSerializer
+from .views import my_bookings_queryset
+
+
+@require_GET
+async def my_bookings(request):
+    """
+    GET /api/v1/bookings/mine/async/?when=upcoming|past&status=RESERVED
+    """
+    user, error = await aauthenticate(request)
+    if error:
+        return error
+
+    throttled = await athrottle(request, user)
+    if throttled:
+        return throttled
+
+    try:
+        queryset = my_bookings_queryset(user.id, request.GET)
+    except ValueError as exc:
+        return json_response({"detail": str(exc)}, status=400)
+
+    # the paginator reads query params and builds next / previous links
+    paginator = MyBookingsCursorPagination()
+    try:
+        page = await sync_to_async(paginator.paginate_queryset)(queryset, Request(request))
+    except NotFound as exc:
+        return json_response({"detail": exc.detail}, status=exc.status_code)
+
+    return json_response(paginator.get_paginated_response(MyBookingSerializer(page, many=True).data).data)
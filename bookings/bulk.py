@@ -0,0 +1,112 @@
+"""
+Planning for bulk / recurring booking creation.
+
+Every occurrence is checked against the same blocks (the court's block
+plan) a single POST /api/v1/bookings/ would accept, but templates and bookings for the
+whole span are loaded once (two queries) instead of once per occurrence.
+"""
+from datetime import time, timedelta
+
+from django.utils import timezone
+
+from arenas.availability import (
+    build_base_slots,
+    build_datetime,
+    compute_booking_blocks,
+    get_busy_intervals_by_court,
+    get_templates_by_court_weekday,
+    get_weekday,
+)
+from arenas.intervals import merge_intervals, overlaps_merged, to_ticks
+from arenas.pricing import block_price, get_price_table
+
+MAX_BULK_OCCURRENCES = 52
+
+MODE_ALL_OR_NOTHING = "all_or_nothing"
+MODE_BEST_EFFORT = "best_effort"
+
+RESULT_AVAILABLE = "available"
+RESULT_CREATED = "created"
+RESULT_CONFLICT = "conflict"
+RESULT_INVALID = "invalid"
+
+
+def weekly_occurrences(start, end, weeks):
+    """
+    (start, end) repeated every 7 days, `weeks` times in total.
+    Steps in local wall time, so a block stays at 18:00 across DST changes.
+    """
+    tz = timezone.get_current_timezone()
+    local_start = timezone.localtime(start, tz).replace(tzinfo=None)
+    local_end = timezone.localtime(end, tz).replace(tzinfo=None)
+
+    occurrences = []
+    for week in range(weeks):
+        shift = timedelta(weeks=week)
+        occurrences.append((
+            timezone.make_aware(local_start + shift, tz),
+            timezone.make_aware(local_end + shift, tz),
+        ))
+
+    return occurrences
+
+
+def plan_occurrences(court, occurrences):
+    """
+    Decide, for each (start, end), whether it can be booked.
+
+    An occurrence is:
+    - invalid:   not one of the court's blocks on that day
+    - conflict:  overlaps a RESERVED booking, a live hold or an earlier occurrence
+                 of the same request
+    - available: otherwise; `price` comes from the court's price table
+
+    returns: list of dicts {'start', 'end', 'result', 'price'} in input order
+    """
+    if not occurrences:
+        return []
+
+    tz = timezone.get_current_timezone()
+    local_days = [timezone.localtime(start, tz).date() for start, _ in occurrences]
+    range_start = build_datetime(min(local_days), time.min, tz)
+    range_end = build_datetime(max(local_days) + timedelta(days=1), time.min, tz)
+
+    templates_by_key = get_templates_by_court_weekday(
+        [court.id], {get_weekday(day) for day in local_days}
+    )
+    busy_starts, busy_ends = merge_intervals(
+        (to_ticks(s), to_ticks(e))
+        for (s, e) in get_busy_intervals_by_court([court.id], range_start, range_end)[court.id]
+    )
+
+    price_table = get_price_table(court)
+    blocks_by_day = {}
+    accepted = []
+    plan = []
+
+    for (start, end), day in zip(occurrences, local_days):
+        templates = templates_by_key.get((court.id, get_weekday(day)), [])
+
+        if day not in blocks_by_day:
+            # every candidate of the day, booked or not
+            blocks_by_day[day] = {
+                (b["start"], b["end"])
+                for b in compute_booking_blocks(build_base_slots(templates, day), [], [])
+            }
+
+        entry = {"start": start, "end": end, "price": None}
+
+        if (start, end) not in blocks_by_day[day]:
+            entry["result"] = RESULT_INVALID
+        elif overlaps_merged(to_ticks(start), to_ticks(end), busy_starts, busy_ends) or any(
+            start < other_end and end > other_start for other_start, other_end in accepted
+        ):
+            entry["result"] = RESULT_CONFLICT
+        else:
+            entry["result"] = RESULT_AVAILABLE
+            entry["price"] = block_price(price_table, start, end)
+            accepted.append((start, end))
+
+        plan.append(entry)
+
+    return plan
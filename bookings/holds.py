@@ -0,0 +1,135 @@
+"""
+Checkout holds.
+
+POST /api/v1/bookings/holds/ reserves a block for HOLD_TTL_SECONDS. The
+race for a popular block is decided here:
+
+- the view only checks the block against the cached grid; whether it is
+  free is never taken from the cache;
+- place_hold() counts the user's live holds under the user row lock,
+  then checks for overlapping bookings and live holds and inserts under
+  the court row lock booking creation takes too, held only for those
+  statements, so overlapping holds of one court can't both be placed,
+  no user gets past MAX_ACTIVE_HOLDS_PER_USER and holds and bookings
+  see each other;
+- where row locks are no-ops (SQLite), concurrent holds of the same
+  block still collide on the booking_hold_unique_block constraint.
+
+Confirming a hold takes the same court lock (then the hold row) around
+its overlap check and insert, so a hold that expires mid-checkout can't
+be confirmed on top of a booking made meanwhile.
+
+Expired holds stop counting as busy right away, but cached availability
+keeps showing them until expire_holds() deletes them and bumps the court
+version, so run `manage.py expire_holds` every minute or so. The cron is
+its own process: the bump only reaches the web workers through a shared
+availability cache (AVAILABILITY_CACHE_DIR, see core/settings.py).
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from arenas.availability import live_holds
+from arenas.models import Court
+from arenas.signals import notify_availability_changed
+from .models import Booking, BookingHold
+
+HOLD_TTL_SECONDS = 300
+MAX_ACTIVE_HOLDS_PER_USER = 3
+
+HOLD_CONFLICT = "conflict"
+HOLD_LIMIT = "limit"
+
+
+def place_hold(user_id, court, start, end, price):
+    """
+    The caller has checked that (start, end) is a bookable block of court.
+
+    returns: (hold, None) or (None, HOLD_CONFLICT / HOLD_LIMIT)
+    """
+    now = timezone.now()
+
+    # the block may have changed hands since the cached check
+    conflicts = Booking.objects.filter(
+        court=OuterRef("pk"),
+        status=Booking.Status.RESERVED,
+        start__lt=end,
+        end__gt=start,
+    )
+    held = live_holds().filter(
+        court=OuterRef("pk"),
+        start__lt=end,
+        end__gt=start,
+    )
+
+    try:
+        with transaction.atomic():
+            # the user row serializes one user's holds (they may be on
+            # different courts), so concurrent requests can't pass the limit
+            get_user_model().objects.select_for_update().filter(id=user_id).values_list("id").first()
+            if live_holds().filter(user_id=user_id).count() >= MAX_ACTIVE_HOLDS_PER_USER:
+                return None, HOLD_LIMIT
+
+            locked = (
+                Court.objects.select_for_update()
+                .filter(id=court.id)
+                .annotate(has_conflict=Exists(conflicts) | Exists(held))
+                .first()
+            )
+            if locked is None or locked.has_conflict:
+                return None, HOLD_CONFLICT
+
+            # an expired, not yet swept hold of the same block
+            # would trip the unique constraint
+            BookingHold.objects.filter(
+                court=court, start=start, end=end, expires_at__lte=now,
+            ).delete()
+            hold = BookingHold.objects.create(
+                user_id=user_id,
+                court=court,
+                start=start,
+                end=end,
+                price=price,
+                expires_at=now + timedelta(seconds=HOLD_TTL_SECONDS),
+            )
+    except IntegrityError:
+        return None, HOLD_CONFLICT
+
+    notify_availability_changed(court.id, start, end)
+    return hold, None
+
+
+def release_hold(user_id, hold_id):
+    """
+    returns: True if the user had that hold
+    """
+    hold = BookingHold.objects.filter(id=hold_id, user_id=user_id).first()
+    if hold is None:
+        return False
+
+    hold.delete()
+    notify_availability_changed(hold.court_id, hold.start, hold.end)
+    return True
+
+
+def expire_holds():
+    """
+    Delete expired holds and invalidate the availability of their courts.
+
+    returns: number of holds deleted
+    """
+    expired = BookingHold.objects.filter(expires_at__lte=timezone.now())
+    spans = list(
+        expired.order_by().values("court_id").annotate(first=Min("start"), last=Max("end"))
+    )
+    if not spans:
+        return 0
+
+    deleted, _ = expired.delete()
+    for span in spans:
+        notify_availability_changed(span["court_id"], span["first"], span["last"])
+
+    return deleted
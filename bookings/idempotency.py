@@ -0,0 +1,88 @@
+"""
+Idempotency-Key support for booking writes.
+
+The key row is inserted BEFORE the work is done, inside the request
+transaction. A concurrent retry with the same key blocks on the unique
+index until the first request commits, then replays its stored response.
+"""
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(data):
+    """
+    Stable hash of the validated request payload.
+    """
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim_idempotency_key(user, key, request_hash):
+    """
+    returns: (record, created)
+    """
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user_id=user.id,
+                key=key,
+                request_hash=request_hash,
+            )
+            return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.get(user_id=user.id, key=key), False
+
+
+def replay_response(record, request_hash):
+    if record.request_hash != request_hash:
+        return Response(
+            {"detail": "Idempotency-Key was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    return Response(
+        record.response_body,
+        status=record.response_status,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def store_response(record, response):
+    record.response_status = response.status_code
+    record.response_body = response.data
+    record.save(update_fields=["response_status", "response_body"])
+
+
+def run_idempotent(request, data, handler):
+    """
+    Run handler() at most once per (user, Idempotency-Key).
+    Must be called inside a transaction.
+    Requests without the header just run handler().
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler()
+
+    if len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {"detail": f"Idempotency-Key is limited to {MAX_KEY_LENGTH} characters."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    request_hash = request_fingerprint(data)
+    record, created = claim_idempotency_key(request.user, key, request_hash)
+    if not created:
+        return replay_response(record, request_hash)
+
+    response = handler()
+    store_response(record, response)
+    return response
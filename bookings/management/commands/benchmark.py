@@ -0,0 +1,272 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from arenas.availability import (
+    get_busy_intervals,
+    iter_dates,
+    get_daily_base_slots,
+    get_daily_booking_blocks,
+    subtract_busy_from_slots,
+)
+from arenas.cache import get_availability_cache
+from arenas.models import Court
+from bookings.seeding import seed_dataset
+from core.perf import summarize
+from core.throttling import without_throttling
+
+OPERATIONS = [
+    "get_daily_booking_blocks",
+    "subtract_busy_from_slots",
+    "availability_endpoint",
+    "availability_endpoint_cached",
+    "booking_create",
+    "my_bookings",
+]
+
+# Courts / court-days sampled per size; keeps setup time flat on big sizes
+SAMPLE_COURTS = 200
+
+
+@contextmanager
+def throwaway_database():
+    """
+    Point the default alias at a new, migrated database (the test database
+    name) and drop it afterwards. Unlike a rolled back transaction, the
+    ops run in autocommit as requests do, so on_commit cache bumps, change
+    log rows and calendar rebuilds happen between them. Reads stay on it,
+    the replica (if any) doesn't have the seeded data.
+    """
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(DATABASE_ROUTERS=[]):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark availability and booking paths at several data sizes. "
+        "Each size is seeded into a throwaway database (the test database "
+        "name, created and dropped here)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10,100",
+            help="Comma-separated arena counts, one seeded dataset each.",
+        )
+        parser.add_argument("--courts-per-arena", type=int, default=4)
+        parser.add_argument("--days", type=int, default=14)
+        parser.add_argument("--bookings-per-court-day", type=int, default=4)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--operations",
+            default=",".join(OPERATIONS),
+            help=f"Subset of: {', '.join(OPERATIONS)}",
+        )
+        parser.add_argument("--json", help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+
+        operations = [op for op in options["operations"].split(",") if op]
+        unknown = set(operations) - set(OPERATIONS)
+        if unknown:
+            raise CommandError(f"Unknown operations: {', '.join(sorted(unknown))}")
+
+        # one log line per request would drown the report
+        logging.getLogger("core.request_metrics").setLevel(logging.ERROR)
+
+        results = []
+        for size in sizes:
+            self.stdout.write(f"Seeding {size} arenas ...")
+            with throwaway_database(), without_throttling(), override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                # ids restart in the new database
+                get_availability_cache().clear()
+                with transaction.atomic():
+                    data = seed_dataset(
+                        f"bench{size}-{time.time_ns()}",
+                        arenas=size,
+                        courts_per_arena=options["courts_per_arena"],
+                        days=options["days"],
+                        bookings_per_court_day=options["bookings_per_court_day"],
+                        users=options["users"],
+                        seed=options["seed"],
+                    )
+                results.extend(self.run_size(size, data, operations, options))
+
+        self.print_table(results)
+
+        if options["json"]:
+            with open(options["json"], "w") as fh:
+                json.dump(results, fh, indent=2, default=str)
+
+    def run_size(self, size, data, operations, options):
+        rng = random.Random(options["seed"])
+        iterations = options["iterations"]
+
+        sample_ids = rng.sample(data["court_ids"], min(SAMPLE_COURTS, len(data["court_ids"])))
+        courts = list(Court.objects.filter(id__in=sample_ids))
+        days = list(iter_dates(data["start_date"], data["end_date"]))
+        users = list(User.objects.filter(id__in=data["user_ids"]))
+
+        # Anonymous client for public endpoints. The authenticated ops call
+        # force_authenticate on their own client; un-authenticating goes
+        # through the session table and would pollute the query counts.
+        client = APIClient()
+        auth_client = APIClient()
+        results = []
+
+        for op in operations:
+            runner = getattr(self, f"op_{op}")
+            calls = runner(rng, courts, days, users, client, auth_client, iterations)
+
+            latencies = []
+            query_counts = []
+            errors = 0
+            for call in calls:
+                # the query log is a bounded deque and seeding fills it,
+                # which would skew CaptureQueriesContext's counts
+                reset_queries()
+                with CaptureQueriesContext(connection) as queries:
+                    began = time.perf_counter()
+                    ok = call()
+                    latencies.append((time.perf_counter() - began) * 1000)
+                query_counts.append(len(queries.captured_queries))
+                if ok is False:
+                    errors += 1
+
+            summary = summarize(latencies)
+            summary.update({
+                "size": size,
+                "operation": op,
+                "queries_mean": sum(query_counts) / len(query_counts) if query_counts else 0,
+                "queries_max": max(query_counts) if query_counts else 0,
+                "errors": errors,
+            })
+            results.append(summary)
+
+        return results
+
+    # Each op_* returns a list of zero-argument callables, one per iteration.
+    # Setup (picking courts, building inputs) happens here, outside the timer.
+    # A callable returning False counts as an error.
+
+    def op_get_daily_booking_blocks(self, rng, courts, days, users, client, auth_client, iterations):
+        return [
+            (lambda c=rng.choice(courts), d=rng.choice(days): get_daily_booking_blocks(c, d))
+            for _ in range(iterations)
+        ]
+
+    def op_subtract_busy_from_slots(self, rng, courts, days, users, client, auth_client, iterations):
+        calls = []
+        for _ in range(iterations):
+            court, day = rng.choice(courts), rng.choice(days)
+            slots = get_daily_base_slots(court, day)
+            if not slots:
+                continue
+            busy = get_busy_intervals(
+                court,
+                min(s["start"] for s in slots),
+                max(s["end"] for s in slots),
+            )
+            calls.append(lambda s=slots, b=busy: subtract_busy_from_slots(s, b))
+        return calls
+
+    def op_availability_endpoint(self, rng, courts, days, users, client, auth_client, iterations):
+        def call(url):
+            get_availability_cache().clear()
+            return self.api_ok(client.get(url))
+
+        return [
+            (lambda u=self.blocks_url(rng.choice(courts), rng.choice(days)): call(u))
+            for _ in range(iterations)
+        ]
+
+    def op_availability_endpoint_cached(self, rng, courts, days, users, client, auth_client, iterations):
+        calls = []
+        for _ in range(iterations):
+            url = self.blocks_url(rng.choice(courts), rng.choice(days))
+            client.get(url)  # warm
+            calls.append(lambda u=url: self.api_ok(client.get(u)))
+        return calls
+
+    def op_booking_create(self, rng, courts, days, users, client, auth_client, iterations):
+        candidates = []
+        for court in courts:
+            for day in days:
+                blocks = get_daily_booking_blocks(court, day)
+                if blocks:
+                    candidates.append((court, rng.choice(blocks)))
+        rng.shuffle(candidates)
+
+        def call(court, block, user):
+            auth_client.force_authenticate(user)
+            response = auth_client.post(
+                "/api/v1/bookings/",
+                {
+                    "court_id": court.id,
+                    "start": block["start"].isoformat(),
+                    "end": block["end"].isoformat(),
+                },
+                format="json",
+            )
+            return self.api_ok(response)
+
+        return [
+            (lambda c=court, b=block, u=rng.choice(users): call(c, b, u))
+            for court, block in candidates[:iterations]
+        ]
+
+    def op_my_bookings(self, rng, courts, days, users, client, auth_client, iterations):
+        def call(user):
+            auth_client.force_authenticate(user)
+            response = auth_client.get("/api/v1/bookings/mine/")
+            return self.api_ok(response)
+
+        return [(lambda u=rng.choice(users): call(u)) for _ in range(iterations)]
+
+    @staticmethod
+    def blocks_url(court, day):
+        return f"/api/v1/availability/blocks/?court_id={court.id}&date={day.isoformat()}"
+
+    @staticmethod
+    def api_ok(response):
+        return 200 <= response.status_code < 300
+
+    def print_table(self, results):
+        header = (
+            f"{'size':>6}  {'operation':<30} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'max ms':>9} {'queries':>8} {'errors':>6}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for r in results:
+            if not r["count"]:
+                self.stdout.write(f"{r['size']:>6}  {r['operation']:<30} {0:>5}")
+                continue
+            self.stdout.write(
+                f"{r['size']:>6}  {r['operation']:<30} {r['count']:>5} "
+                f"{r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f} {r['max']:>9.2f} "
+                f"{r['queries_mean']:>8.1f} {r['errors']:>6}"
+            )
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from arenas.windows import CALENDAR_DAYS, build_calendars
+
+
+class Command(BaseCommand):
+    help = (
+        f"Materialize dated open windows for the next {CALENDAR_DAYS} days: "
+        "prune past days, extend every court's calendar and regenerate "
+        "courts whose templates changed. Run daily (and after bulk "
+        "template imports)."
+    )
+
+    def handle(self, *args, **options):
+        began = time.perf_counter()
+        stats = build_calendars()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Regenerated {stats['regenerated']} courts, extended {stats['extended']}, "
+            f"wrote {stats['windows']} windows, pruned {stats['pruned']} "
+            f"in {time.perf_counter() - began:.1f}s"
+        ))
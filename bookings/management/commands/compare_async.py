@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from arenas.cache import get_availability_cache
+from arenas.models import Court
+from core.perf import summarize
+from core.throttling import without_throttling
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+# (sync path, async path); availability takes ?court_id=&date=
+ENDPOINTS = {
+    "availability": (
+        "/api/v1/availability/blocks/",
+        "/api/v1/availability/blocks/async/",
+    ),
+    "my_bookings": (
+        "/api/v1/bookings/mine/",
+        "/api/v1/bookings/mine/async/",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and tail latency of the sync DRF endpoints and "
+        "their native async twins under concurrent load, against the data "
+        "already in the database (see seed_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument(
+            "--endpoints",
+            default=",".join(ENDPOINTS),
+            help=f"Subset of: {', '.join(ENDPOINTS)}",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the availability cache before each run.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        endpoints = [e for e in options["endpoints"].split(",") if e]
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+
+        rng = random.Random(options["seed"])
+        court_ids = list(
+            Court.objects.filter(is_active=True, slot_templates__is_active=True)
+            .values_list("id", flat=True)
+            .distinct()[:500]
+        )
+        user_ids = list(
+            User.objects.filter(bookings__isnull=False)
+            .values_list("id", flat=True)
+            .distinct()[:100]
+        )
+        if not court_ids or not user_ids:
+            raise CommandError("No data to query, run seed_data first")
+
+        logging.getLogger("core.request_metrics").setLevel(logging.ERROR)
+
+        rows = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]), without_throttling():
+            for endpoint in endpoints:
+                calls = self.build_calls(endpoint, rng, court_ids, user_ids, options["requests"])
+                sync_path, async_path = ENDPOINTS[endpoint]
+
+                for mode, path in (("sync", sync_path), ("async", async_path)):
+                    if options["cold"]:
+                        get_availability_cache().clear()
+
+                    runner = self.run_sync if mode == "sync" else self.run_async
+                    elapsed, latencies, errors = runner(path, calls, options["concurrency"])
+                    rows.append({
+                        "endpoint": endpoint,
+                        "mode": mode,
+                        "rps": len(calls) / elapsed,
+                        "errors": errors,
+                        **summarize(latencies),
+                    })
+
+        self.print_table(rows)
+
+    def build_calls(self, endpoint, rng, court_ids, user_ids, count):
+        """
+        returns: [(query_params, headers)], the same list for both modes
+        """
+        if endpoint == "availability":
+            # seed_data starts at today by default
+            today = timezone.localdate()
+            return [
+                (
+                    {
+                        "court_id": rng.choice(court_ids),
+                        "date": (today + timedelta(days=rng.randrange(14))).isoformat(),
+                    },
+                    {},
+                )
+                for _ in range(count)
+            ]
+
+        tokens = {
+            user.id: f"Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}"
+            for user in User.objects.filter(id__in=user_ids)
+        }
+        return [
+            ({}, {"Authorization": tokens[rng.choice(user_ids)]})
+            for _ in range(count)
+        ]
+
+    def run_sync(self, path, calls, concurrency):
+        def call(params, headers):
+            client = Client()
+            started = time.perf_counter()
+            response = client.get(path, params, headers=headers)
+            latency = (time.perf_counter() - started) * 1000
+            close_old_connections()
+            return latency, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(lambda c: call(*c), calls))
+        elapsed = time.perf_counter() - started
+
+        return self.collect(elapsed, outcomes)
+
+    def run_async(self, path, calls, concurrency):
+        async def run_all():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def call(params, headers):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(path, params, headers=headers)
+                    return (time.perf_counter() - started) * 1000, response.status_code
+
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(*(call(*c) for c in calls))
+            return time.perf_counter() - started, outcomes
+
+        elapsed, outcomes = async_to_sync(run_all)()
+        return self.collect(elapsed, outcomes)
+
+    @staticmethod
+    def collect(elapsed, outcomes):
+        latencies = [latency for latency, _ in outcomes]
+        errors = sum(1 for _, status in outcomes if status >= 400)
+        return elapsed, latencies, errors
+
+    def print_table(self, rows):
+        header = (
+            f"{'endpoint':<14} {'mode':<6} {'rps':>9} {'p50 ms':>9} "
+            f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<14} {row['mode']:<6} {row['rps']:>9.1f} "
+                f"{row['p50']:>9.2f} {row['p95']:>9.2f} {row['p99']:>9.2f} "
+                f"{row['max']:>9.2f} {row['errors']:>7}"
+            )
@@ -0,0 +1,24 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from arenas.cache import get_availability_cache
+from bookings.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired booking holds and refresh the cached availability "
+        "of their courts. Run every minute or so, with the availability "
+        "cache shared with the web workers (AVAILABILITY_CACHE_DIR)."
+    )
+
+    def handle(self, *args, **options):
+        if isinstance(get_availability_cache(), LocMemCache):
+            self.stderr.write(
+                "The availability cache is per process (locmem): web workers "
+                "keep showing the expired holds until their entries time out. "
+                "Set AVAILABILITY_CACHE_DIR to share it."
+            )
+
+        deleted = expire_holds()
+        self.stdout.write(f"Deleted {deleted} expired holds")
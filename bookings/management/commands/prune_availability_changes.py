@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from arenas.models import AvailabilityChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete availability change log entries older than --hours. Streams "
+        "resuming from before that get a reset event."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        latest = AvailabilityChange.objects.order_by("-id").values_list("id", flat=True).first()
+        # keep the newest row, SQLite would reuse its id otherwise
+        deleted, _ = AvailabilityChange.objects.filter(
+            created_at__lt=cutoff,
+        ).exclude(id=latest).delete()
+        self.stdout.write(f"Deleted {deleted} availability changes")
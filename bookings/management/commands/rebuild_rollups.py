@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from bookings.models import Booking
+from bookings.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute CourtDailyRollup rows from bookings for a date range "
+        "(default: every day that has a booking)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start_date", help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="end_date", help="YYYY-MM-DD")
+        parser.add_argument(
+            "--court",
+            type=int,
+            action="append",
+            dest="court_ids",
+            help="Only this court id; repeat for several.",
+        )
+
+    def handle(self, *args, **options):
+        span = Booking.objects.aggregate(first=Min("start"), last=Max("start"))
+        if span["first"] is None and not (options["start_date"] and options["end_date"]):
+            self.stdout.write("No bookings, nothing to rebuild")
+            return
+
+        start_date = self.parse(options["start_date"], "--from") or timezone.localdate(span["first"])
+        end_date = self.parse(options["end_date"], "--to") or timezone.localdate(span["last"])
+        if end_date < start_date:
+            raise CommandError("--to must not be before --from")
+
+        began = time.perf_counter()
+        rows = rebuild_rollups(start_date, end_date, court_ids=options["court_ids"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} daily rollups for {start_date} .. {end_date} "
+            f"in {time.perf_counter() - began:.1f}s"
+        ))
+
+    @staticmethod
+    def parse(value, option):
+        if not value:
+            return None
+        day = parse_date(value)
+        if not day:
+            raise CommandError(f"Invalid {option}. Use YYYY-MM-DD")
+        return day
@@ -0,0 +1,260 @@
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.perf import summarize
+from core.throttling import without_throttling
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a traffic file recorded by core.traffic.TrafficRecordingMiddleware "
+        "against the Django test client (default) or a running server, and "
+        "report throughput and latency percentiles per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL file written with TRAFFIC_RECORD_PATH")
+        parser.add_argument(
+            "--target",
+            help="Base URL of a running server, e.g. http://127.0.0.1:8000 "
+                 "(default: in-process test client)",
+        )
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--speedup",
+            type=float,
+            default=0,
+            help="Replay N times faster than recorded; 0 sends as fast as "
+                 "--concurrency allows (default).",
+        )
+        parser.add_argument("--limit", type=int, help="Only the first N lines.")
+        parser.add_argument(
+            "--methods",
+            default="GET",
+            help="Comma separated methods to replay, or ALL (default: GET, "
+                 "which leaves the data untouched).",
+        )
+        parser.add_argument(
+            "--allow-writes",
+            action="store_true",
+            help="Required to replay anything but GET / HEAD / OPTIONS: writes "
+                 "go to the default database, or to --target.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Local users recorded users are mapped onto (round robin).",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["speedup"] < 0:
+            raise CommandError("--concurrency must be positive and --speedup not negative")
+
+        methods = self.parse_methods(options["methods"])
+        if not options["allow_writes"] and (methods is None or methods - SAFE_METHODS):
+            raise CommandError(
+                "Replaying writes changes the data of the default database (or of "
+                "--target); pass --allow-writes to do it anyway"
+            )
+
+        lines = self.read_lines(options["path"], options["limit"], methods)
+        if not lines:
+            raise CommandError("Nothing to replay")
+
+        headers = self.auth_headers(lines, options["users"])
+        send = self.http_sender(options["target"]) if options["target"] else self.client_sender()
+
+        # don't record the replay, and keep the per-request log quiet
+        logging.getLogger("core.request_metrics").setLevel(logging.ERROR)
+        with override_settings(
+            TRAFFIC_RECORD_PATH=None,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        ), without_throttling():
+            elapsed, outcomes = self.replay(lines, headers, send, options)
+
+        self.print_report(lines, outcomes, elapsed)
+
+    @staticmethod
+    def parse_methods(value):
+        """
+        returns: set of methods, None for ALL
+        """
+        methods = {m.strip().upper() for m in value.split(",") if m.strip()}
+        if not methods:
+            raise CommandError("--methods is empty")
+        if "ALL" in methods:
+            return None
+        return methods
+
+    @staticmethod
+    def read_lines(path, limit, methods):
+        lines = []
+        try:
+            with open(path) as f:
+                for raw in f:
+                    if not raw.strip():
+                        continue
+                    line = json.loads(raw)
+                    if methods is not None and line["method"] not in methods:
+                        continue
+                    lines.append(line)
+                    if limit and len(lines) >= limit:
+                        break
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Can't read {path}: {exc}")
+
+        lines.sort(key=lambda line: line["ts"])
+        return lines
+
+    @staticmethod
+    def auth_headers(lines, user_count):
+        """
+        returns: {pseudonym: headers}, recorded users spread over local ones
+        """
+        pseudonyms = sorted({line["user"] for line in lines if line.get("user")})
+        if not pseudonyms:
+            return {}
+
+        users = list(User.objects.filter(is_active=True).order_by("id")[:user_count])
+        if not users:
+            raise CommandError("The recording has authenticated requests but there are no users")
+
+        tokens = {}
+        headers = {}
+        for i, pseudonym in enumerate(pseudonyms):
+            user = users[i % len(users)]
+            if user.id not in tokens:
+                tokens[user.id] = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+            headers[pseudonym] = {"Authorization": f"Bearer {tokens[user.id]}"}
+
+        return headers
+
+    @staticmethod
+    def request_url(line):
+        query = urlencode(line.get("query") or {}, doseq=True)
+        return f"{line['path']}?{query}" if query else line["path"]
+
+    @staticmethod
+    def request_body(line):
+        body = line.get("body")
+        # non JSON bodies are only recorded by size
+        if body is None or (isinstance(body, str) and body.startswith("<bytes:")):
+            return None
+        return json.dumps(body)
+
+    def client_sender(self):
+        local = threading.local()
+
+        def send(line, headers):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = Client()
+
+            body = self.request_body(line)
+            response = client.generic(
+                line["method"],
+                self.request_url(line),
+                data=body or "",
+                content_type="application/json",
+                headers=headers,
+            )
+            close_old_connections()
+            return response.status_code
+
+        return send
+
+    def http_sender(self, target):
+        base = target.rstrip("/")
+
+        def send(line, headers):
+            body = self.request_body(line)
+            request = urllib.request.Request(
+                base + self.request_url(line),
+                data=body.encode() if body else None,
+                method=line["method"],
+                headers={"Content-Type": "application/json", **headers},
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as exc:
+                return exc.code
+            except OSError:
+                return 0
+
+        return send
+
+    def replay(self, lines, headers, send, options):
+        """
+        returns: (elapsed seconds, [(latency_ms, status)] in line order)
+        """
+        speedup = options["speedup"]
+        first_ts = lines[0]["ts"]
+
+        def call(line):
+            started = time.perf_counter()
+            status = send(line, headers.get(line.get("user"), {}))
+            return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            futures = []
+            for line in lines:
+                if speedup:
+                    # keep the recorded spacing, compressed by speedup
+                    delay = (line["ts"] - first_ts) / speedup - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(pool.submit(call, line))
+            outcomes = [future.result() for future in futures]
+
+        return time.perf_counter() - started, outcomes
+
+    def print_report(self, lines, outcomes, elapsed):
+        groups = {}
+        for line, outcome in zip(lines, outcomes):
+            endpoint = f"{line['method']} /{line.get('route') or line['path'].lstrip('/')}"
+            groups.setdefault(endpoint, []).append((line, outcome))
+
+        header = (
+            f"{'endpoint':<52} {'count':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'rec p50':>8} {'errors':>6} {'same':>6}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        for endpoint, rows in sorted(groups.items(), key=lambda g: -len(g[1])):
+            replayed = summarize([latency for _, (latency, _) in rows])
+            recorded = summarize([line["duration_ms"] for line, _ in rows])
+            errors = sum(1 for _, (_, status) in rows if status == 0 or status >= 500)
+            # replayed status equals the recorded one
+            same = sum(1 for line, (_, status) in rows if status == line["status"])
+            self.stdout.write(
+                f"{endpoint[:52]:<52} {len(rows):>6} {len(rows) / elapsed:>8.1f} "
+                f"{replayed['p50']:>8.2f} {replayed['p95']:>8.2f} {replayed['p99']:>8.2f} "
+                f"{recorded['p50']:>8.2f} {errors:>6} {same / len(rows):>6.0%}"
+            )
+
+        total = summarize([latency for latency, _ in outcomes])
+        self.stdout.write(
+            f"\n{len(outcomes)} requests in {elapsed:.2f}s = {len(outcomes) / elapsed:.1f} rps, "
+            f"p50 {total['p50']:.2f} ms, p95 {total['p95']:.2f} ms, p99 {total['p99']:.2f} ms"
+        )
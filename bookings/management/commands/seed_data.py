@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from arenas.models import Arena
+from bookings.seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic dataset (users, arenas, courts, templates, bookings)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--arenas", type=int, default=100)
+        parser.add_argument("--courts-per-arena", type=int, default=4)
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--bookings-per-court-day", type=int, default=4)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--start-date", help="YYYY-MM-DD, default today")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Name prefix of every generated row; must not exist yet.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if Arena.objects.filter(name__startswith=f"{prefix} arena").exists():
+            raise CommandError(f"Data with prefix '{prefix}' already exists, use another --prefix")
+
+        start_date = None
+        if options["start_date"]:
+            start_date = parse_date(options["start_date"])
+            if not start_date:
+                raise CommandError("Invalid --start-date. Use YYYY-MM-DD")
+
+        began = time.perf_counter()
+        with transaction.atomic():
+            result = seed_dataset(
+                prefix,
+                arenas=options["arenas"],
+                courts_per_arena=options["courts_per_arena"],
+                days=options["days"],
+                bookings_per_court_day=options["bookings_per_court_day"],
+                users=options["users"],
+                start_date=start_date,
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+                log=self.stdout.write,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {result['bookings']} bookings on {result['courts']} courts "
+            f"in {time.perf_counter() - began:.1f}s"
+        ))
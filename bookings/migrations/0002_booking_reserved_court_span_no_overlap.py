@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# PostgreSQL only: reject overlapping RESERVED bookings of the same court
+# in the database itself. Other backends keep the application-level check.
+NO_OVERLAP_SQL = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE bookings_booking
+    ADD CONSTRAINT booking_no_overlap
+    EXCLUDE USING gist (
+        court_id WITH =,
+        tstzrange("start", "end", '[)') WITH &&
+    )
+    WHERE (status = 'RESERVED');
+"""
+
+
+def add_no_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(NO_OVERLAP_SQL)
+
+
+def remove_no_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE bookings_booking DROP CONSTRAINT IF EXISTS booking_no_overlap;"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0005_slottemplate_active_court_day'),
+        ('bookings', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'RESERVED')), fields=['court', 'start', 'end'], name='booking_reserved_court_span'),
+        ),
+        migrations.RunPython(add_no_overlap_constraint, remove_no_overlap_constraint),
+    ]
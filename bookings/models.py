@@ -2,6 +2,20 @@ from django.db import models
 from django.contrib.auth.models import User
 from arenas.models import Court
 
+# PostgreSQL exclusion constraint on RESERVED bookings, see migration 0002
+BOOKING_NO_OVERLAP = "booking_no_overlap"
+
+
+def violates_constraint(exc, name):
+    """
+    Whether the IntegrityError `exc` was raised by the constraint `name`.
+    """
+    diag = getattr(exc.__cause__, "diag", None)
+    if diag is not None:
+        # psycopg reports the constraint separately from the message
+        return diag.constraint_name == name
+    return name in str(exc)
+
 
 class Booking(models.Model):
     class Status(models.TextChoices):
@@ -40,6 +54,139 @@ class Booking(models.Model):
                 name="booking_end_after_start",
             ),
         ]
+        indexes = [
+            # conflict checks and busy intervals: court + time range, RESERVED only
+            models.Index(
+                fields=["court", "start", "end"],
+                name="booking_reserved_court_span",
+                condition=models.Q(status="RESERVED"),
+            ),
+            # "my bookings" pages: newest first, or by start for ?when=
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="booking_user_created",
+            ),
+            models.Index(
+                fields=["user", "start", "id"],
+                name="booking_user_start",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.court} | {self.start}–{self.end} | {self.status}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a booking request sent with an Idempotency-Key
+    header, so client retries get the same response instead of
+    repeating the work.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"],
+                name="idempotency_key_unique_per_user",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} | {self.key} | {self.response_status}"
+
+
+class CourtDailyRollup(models.Model):
+    """
+    Per court, per local day totals of RESERVED bookings, kept up to date
+    by bookings/rollups.py on every create / cancel. Rebuilt from scratch
+    with `manage.py rebuild_rollups`.
+
+    open_minutes is the SlotTemplate time of that weekday when the row
+    was written; template edits refresh it for today and later.
+    """
+    court = models.ForeignKey(
+        Court,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+    )
+    date = models.DateField()
+
+    booking_count = models.PositiveIntegerField(default=0)
+    booked_minutes = models.PositiveIntegerField(default=0)
+    open_minutes = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["court", "date"],
+                name="court_daily_rollup_unique_day",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.court} | {self.date}"
+
+
+class BookingHold(models.Model):
+    """
+    A block reserved for one user during checkout, until expires_at.
+
+    Live holds (expires_at in the future) are busy time for availability
+    and for other bookings. A hold becomes a Booking through confirm and
+    is deleted then; expired ones are deleted by `manage.py expire_holds`.
+    See bookings/holds.py.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="booking_holds",
+    )
+    court = models.ForeignKey(
+        Court,
+        on_delete=models.CASCADE,
+        related_name="booking_holds",
+    )
+
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+
+    # quoted when the hold was taken, charged on confirm
+    price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end__gt=models.F("start")),
+                name="booking_hold_end_after_start",
+            ),
+            # racing holds on the same block: one insert wins, no row locks
+            models.UniqueConstraint(
+                fields=["court", "start", "end"],
+                name="booking_hold_unique_block",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="booking_hold_expires"),
+            models.Index(fields=["user", "expires_at"], name="booking_hold_user_expires"),
+        ]
+
+    def __str__(self):
+        return f"{self.court} | {self.start}–{self.end} | until {self.expires_at}"
@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination
+
+# ?when= of GET /api/v1/bookings/mine/
+WHEN_UPCOMING = "upcoming"
+WHEN_PAST = "past"
+WHENS = (WHEN_UPCOMING, WHEN_PAST)
+
+
+class MyBookingsCursorPagination(CursorPagination):
+    """
+    Newest bookings first; upcoming ones soonest first, past ones most
+    recent first. Each ordering is served by an index on (user, ...),
+    so a page costs the same however many bookings the user has.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-created_at", "-id")
+
+    orderings = {
+        WHEN_UPCOMING: ("start", "id"),
+        WHEN_PAST: ("-start", "-id"),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        return self.orderings.get(request.query_params.get("when"), self.ordering)
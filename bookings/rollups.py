@@ -0,0 +1,193 @@
+"""
+Incremental maintenance of CourtDailyRollup.
+
+Booking writes call record_bookings_created / record_booking_cancelled in
+their own transaction; each touched (court, day) costs one UPDATE with F()
+expressions, plus an INSERT the first time a day is seen. rebuild_rollups
+recomputes a date range from Booking for backfills and repairs.
+"""
+from datetime import time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Count,
+    DecimalField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from arenas.availability import (
+    build_datetime,
+    get_templates_by_court_weekday,
+    get_weekday,
+    iter_dates,
+)
+from arenas.intervals import merge_intervals
+from .models import Booking, CourtDailyRollup
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def booking_minutes(start, end):
+    return int((end - start).total_seconds() // 60)
+
+
+def template_open_minutes(templates):
+    """
+    Minutes covered by the templates of one weekday; overlapping windows
+    are counted once.
+    """
+    starts, ends = merge_intervals(
+        (tpl.start_time.hour * 60 + tpl.start_time.minute,
+         tpl.end_time.hour * 60 + tpl.end_time.minute)
+        for tpl in templates
+    )
+    return sum(end - start for start, end in zip(starts, ends))
+
+
+def get_open_minutes_by_court_weekday(court_ids, weekdays):
+    """
+    returns: {(court_id, weekday): open minutes}, missing keys mean 0
+    """
+    return {
+        key: template_open_minutes(templates)
+        for key, templates in get_templates_by_court_weekday(court_ids, weekdays).items()
+    }
+
+
+def _apply_deltas(deltas):
+    """
+    deltas: {(court_id, date): [booking_count, booked_minutes, revenue]}
+    """
+    missing = {}
+    for (court_id, day), (count, minutes, revenue) in deltas.items():
+        # clamped: bookings older than the rollup row (not yet rebuilt)
+        # must not push the totals below zero
+        updated = CourtDailyRollup.objects.filter(court_id=court_id, date=day).update(
+            booking_count=Greatest(F("booking_count") + count, 0),
+            booked_minutes=Greatest(F("booked_minutes") + minutes, 0),
+            revenue=Greatest(F("revenue") + revenue, Value(0, output_field=DecimalField())),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            missing[(court_id, day)] = (count, minutes, revenue)
+
+    if not missing:
+        return
+
+    open_minutes = get_open_minutes_by_court_weekday(
+        {court_id for court_id, _ in missing},
+        {get_weekday(day) for _, day in missing},
+    )
+    for (court_id, day), (count, minutes, revenue) in missing.items():
+        try:
+            with transaction.atomic():
+                CourtDailyRollup.objects.create(
+                    court_id=court_id,
+                    date=day,
+                    booking_count=max(count, 0),
+                    booked_minutes=max(minutes, 0),
+                    revenue=max(revenue, 0),
+                    open_minutes=open_minutes.get((court_id, get_weekday(day)), 0),
+                )
+        except IntegrityError:
+            # created by a concurrent request in the meantime
+            _apply_deltas({(court_id, day): [count, minutes, revenue]})
+
+
+def _add(deltas, booking, sign):
+    key = (booking.court_id, timezone.localdate(booking.start))
+    delta = deltas.setdefault(key, [0, 0, 0])
+    delta[0] += sign
+    delta[1] += sign * booking_minutes(booking.start, booking.end)
+    delta[2] += sign * booking.price
+
+
+def record_bookings_created(bookings):
+    deltas = {}
+    for booking in bookings:
+        _add(deltas, booking, 1)
+    _apply_deltas(deltas)
+
+
+def record_booking_cancelled(booking):
+    deltas = {}
+    _add(deltas, booking, -1)
+    _apply_deltas(deltas)
+
+
+def refresh_open_minutes(court_id):
+    """
+    Re-read open_minutes of today's and later rows after a template edit.
+    Past days keep the value they were recorded with.
+    """
+    open_minutes = get_open_minutes_by_court_weekday([court_id], range(7))
+    future = CourtDailyRollup.objects.filter(court_id=court_id, date__gte=timezone.localdate())
+
+    for weekday in range(7):
+        future.filter(date__iso_week_day=weekday + 1).update(
+            open_minutes=open_minutes.get((court_id, weekday), 0),
+        )
+
+
+def rebuild_rollups(start_date, end_date, court_ids=None):
+    """
+    Replace the rows of [start_date, end_date] with totals recomputed
+    from RESERVED bookings. One aggregate query, one template query,
+    batched inserts.
+
+    returns: number of rows written
+    """
+    tz = timezone.get_current_timezone()
+    range_start = build_datetime(start_date, time.min, tz)
+    range_end = build_datetime(end_date + timedelta(days=1), time.min, tz)
+
+    bookings = Booking.objects.filter(
+        status=Booking.Status.RESERVED,
+        start__gte=range_start,
+        start__lt=range_end,
+    )
+    rows = CourtDailyRollup.objects.filter(date__gte=start_date, date__lte=end_date)
+    if court_ids is not None:
+        bookings = bookings.filter(court_id__in=court_ids)
+        rows = rows.filter(court_id__in=court_ids)
+
+    totals = list(
+        bookings.annotate(day=TruncDate("start", tzinfo=tz))
+        .values("court_id", "day")
+        .annotate(
+            count=Count("id"),
+            duration=Sum(ExpressionWrapper(F("end") - F("start"), output_field=DurationField())),
+            revenue=Sum("price"),
+        )
+        .order_by()
+    )
+
+    open_minutes = get_open_minutes_by_court_weekday(
+        {row["court_id"] for row in totals},
+        {get_weekday(day) for day in iter_dates(start_date, end_date)},
+    )
+
+    with transaction.atomic():
+        rows.delete()
+        CourtDailyRollup.objects.bulk_create(
+            [
+                CourtDailyRollup(
+                    court_id=row["court_id"],
+                    date=row["day"],
+                    booking_count=row["count"],
+                    booked_minutes=int(row["duration"].total_seconds() // 60),
+                    open_minutes=open_minutes.get((row["court_id"], get_weekday(row["day"])), 0),
+                    revenue=row["revenue"] or 0,
+                )
+                for row in totals
+            ],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+
+    return len(totals)
@@ -0,0 +1,203 @@
+"""
+Synthetic dataset generator used by the seed_data and benchmark commands.
+
+Everything is written with bulk_create in batches, so the data set can go
+to thousands of arenas and millions of bookings without holding it in
+memory. Generated bookings never overlap, so they also satisfy the
+booking_no_overlap constraint on PostgreSQL.
+"""
+import random
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from arenas.availability import build_datetime, iter_dates
+from arenas.geo import geo_cell
+from arenas.models import Arena, Court, SlotTemplate
+from arenas.timeblocks import compile_blocks
+from arenas.windows import build_calendars
+from .models import Booking
+from .rollups import rebuild_rollups
+
+SPORT_TYPES = ["padel", "football", "tennis", "basketball", "volleyball"]
+
+# One weekly window per day, 08:00-23:00 = 10 blocks of 90 minutes
+OPEN_TIME = time(8, 0)
+CLOSE_TIME = time(23, 0)
+BLOCK_MINUTES = 90
+BLOCKS_PER_DAY = 10
+
+CANCELLED_RATIO = 0.1
+
+
+def _bulk_create(model, objects, batch_size):
+    """
+    bulk_create from a generator, batch by batch. Returns the row count.
+    """
+    batch = []
+    count = 0
+
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+
+    if batch:
+        model.objects.bulk_create(batch)
+        count += len(batch)
+
+    return count
+
+
+def seed_dataset(
+    prefix,
+    arenas=10,
+    courts_per_arena=4,
+    days=14,
+    bookings_per_court_day=4,
+    users=50,
+    start_date=None,
+    seed=0,
+    batch_size=5000,
+    log=None,
+):
+    """
+    Create users, arenas, courts, weekly SlotTemplates and bookings.
+    All names / usernames start with `prefix`.
+
+    returns: dict of created row counts, plus the user and court ids
+    """
+    log = log or (lambda msg: None)
+    rng = random.Random(seed)
+    start_date = start_date or timezone.localdate()
+    end_date = start_date + timedelta(days=days - 1)
+    bookings_per_court_day = min(bookings_per_court_day, BLOCKS_PER_DAY)
+    tz = timezone.get_current_timezone()
+
+    password = make_password(None)
+    _bulk_create(
+        User,
+        (
+            User(username=f"{prefix}-user{i}", password=password)
+            for i in range(users + 1)
+        ),
+        batch_size,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=f"{prefix}-user")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    owner_id = user_ids.pop(0)
+    log(f"users: {len(user_ids) + 1}")
+
+    def generate_arenas():
+        for i in range(arenas):
+            latitude = Decimal(f"{rng.uniform(25, 40):.6f}")
+            longitude = Decimal(f"{rng.uniform(44, 63):.6f}")
+            yield Arena(
+                owner_id=owner_id,
+                name=f"{prefix} arena {i}",
+                address=f"{i} Seed street",
+                latitude=latitude,
+                longitude=longitude,
+                # bulk_create skips Arena.save()
+                geo_cell=geo_cell(latitude, longitude),
+            )
+
+    _bulk_create(Arena, generate_arenas(), batch_size)
+    arena_ids = list(
+        Arena.objects.filter(name__startswith=f"{prefix} arena")
+        .values_list("id", flat=True)
+    )
+    log(f"arenas: {len(arena_ids)}")
+
+    _bulk_create(
+        Court,
+        (
+            Court(
+                arena_id=arena_id,
+                name=f"Court {n}",
+                sport_type=rng.choice(SPORT_TYPES),
+                indoor=rng.random() < 0.5,
+            )
+            for arena_id in arena_ids
+            for n in range(courts_per_arena)
+        ),
+        batch_size,
+    )
+    court_ids = list(
+        Court.objects.filter(arena_id__in=arena_ids).values_list("id", flat=True)
+    )
+    log(f"courts: {len(court_ids)}")
+
+    # default plan for every seeded court; bulk_create skips save()
+    compiled_blocks = compile_blocks(OPEN_TIME, CLOSE_TIME)
+    templates = _bulk_create(
+        SlotTemplate,
+        (
+            SlotTemplate(
+                court_id=court_id,
+                weekday=weekday,
+                start_time=OPEN_TIME,
+                end_time=CLOSE_TIME,
+                base_price=Decimal(rng.choice([60, 80, 100, 120])),
+                compiled_blocks=compiled_blocks,
+            )
+            for court_id in court_ids
+            for weekday in range(7)
+        ),
+        batch_size,
+    )
+    log(f"slot templates: {templates}")
+
+    block = timedelta(minutes=BLOCK_MINUTES)
+
+    def generate_bookings():
+        for court_id in court_ids:
+            for day in iter_dates(start_date, end_date):
+                day_open = build_datetime(day, OPEN_TIME, tz)
+                for n in rng.sample(range(BLOCKS_PER_DAY), bookings_per_court_day):
+                    start = day_open + n * block
+                    yield Booking(
+                        user_id=rng.choice(user_ids),
+                        court_id=court_id,
+                        start=start,
+                        end=start + block,
+                        price=Decimal("80"),
+                        status=(
+                            Booking.Status.CANCELLED
+                            if rng.random() < CANCELLED_RATIO
+                            else Booking.Status.RESERVED
+                        ),
+                    )
+
+    bookings = _bulk_create(Booking, generate_bookings(), batch_size)
+    log(f"bookings: {bookings}")
+
+    # bulk_create skips the incremental rollup updates; recompute the range
+    # (all courts: the seeded ids may exceed the backend's IN-list limit)
+    rollups = rebuild_rollups(start_date, end_date)
+    log(f"daily rollups: {rollups}")
+
+    windows = build_calendars()["windows"]
+    log(f"open windows: {windows}")
+
+    return {
+        "users": len(user_ids) + 1,
+        "arenas": len(arena_ids),
+        "courts": len(court_ids),
+        "slot_templates": templates,
+        "bookings": bookings,
+        "rollups": rollups,
+        "open_windows": windows,
+        "user_ids": user_ids,
+        "court_ids": court_ids,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from django.utils.dateparse import parse_datetime
 
-from .models import Booking
+from .bulk import (
+    MAX_BULK_OCCURRENCES,
+    MODE_ALL_OR_NOTHING,
+    MODE_BEST_EFFORT,
+    weekly_occurrences,
+)
+from .models import Booking, BookingHold
 from arenas.models import Court
 
 
@@ -9,6 +15,7 @@ class BookingCreateSerializer(serializers.Serializer):
     court_id = serializers.IntegerField()
     start = serializers.DateTimeField()
     end = serializers.DateTimeField()
+    quoted_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
 
     def validate(self, data):
         if data["end"] <= data["start"]:
@@ -21,3 +28,81 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = ["id", "user", "court", "start", "end", "price", "status", "created_at"]
         read_only_fields = fields
+
+
+class MyBookingSerializer(BookingSerializer):
+    """
+    Needs select_related("court__arena").
+    """
+    court_name = serializers.CharField(source="court.name", read_only=True)
+    arena_id = serializers.IntegerField(source="court.arena_id", read_only=True)
+    arena_name = serializers.CharField(source="court.arena.name", read_only=True)
+
+    class Meta(BookingSerializer.Meta):
+        fields = BookingSerializer.Meta.fields + ["court_name", "arena_id", "arena_name"]
+        read_only_fields = fields
+
+
+class BookingHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BookingHold
+        fields = ["id", "court", "start", "end", "price", "expires_at", "created_at"]
+        read_only_fields = fields
+
+
+class BookingBlockSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data["end"] <= data["start"]:
+            raise serializers.ValidationError("end must be after start")
+        return data
+
+
+class BookingBulkCreateSerializer(serializers.Serializer):
+    """
+    Either `blocks` (explicit list) or `start` / `end` / `repeat_weeks`
+    (same block weekly). validated_data["occurrences"] is the expanded
+    list of (start, end).
+    """
+    court_id = serializers.IntegerField()
+    mode = serializers.ChoiceField(
+        choices=[MODE_ALL_OR_NOTHING, MODE_BEST_EFFORT],
+        default=MODE_ALL_OR_NOTHING,
+    )
+    blocks = BookingBlockSerializer(many=True, required=False)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    repeat_weeks = serializers.IntegerField(
+        min_value=1, max_value=MAX_BULK_OCCURRENCES, required=False
+    )
+
+    def validate(self, data):
+        recurrence = [data.get(f) for f in ("start", "end", "repeat_weeks")]
+
+        if "blocks" in data:
+            if any(v is not None for v in recurrence):
+                raise serializers.ValidationError(
+                    "Send either blocks or start/end/repeat_weeks, not both"
+                )
+            if not data["blocks"]:
+                raise serializers.ValidationError("blocks must not be empty")
+            if len(data["blocks"]) > MAX_BULK_OCCURRENCES:
+                raise serializers.ValidationError(
+                    f"At most {MAX_BULK_OCCURRENCES} blocks per request"
+                )
+            occurrences = [(b["start"], b["end"]) for b in data.pop("blocks")]
+        else:
+            if any(v is None for v in recurrence):
+                raise serializers.ValidationError(
+                    "blocks or start, end and repeat_weeks are required"
+                )
+            if data["end"] <= data["start"]:
+                raise serializers.ValidationError("end must be after start")
+            occurrences = weekly_occurrences(
+                data.pop("start"), data.pop("end"), data.pop("repeat_weeks")
+            )
+
+        data["occurrences"] = occurrences
+        return data
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from arenas.models import SlotTemplate
+from .rollups import refresh_open_minutes
+
+
+@receiver(post_save, sender=SlotTemplate)
+@receiver(post_delete, sender=SlotTemplate)
+def refresh_rollup_open_minutes(sender, instance, **kwargs):
+    refresh_open_minutes(instance.court_id)
@@ -1,3 +1,254 @@
-from django.test import TestCase
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, Client, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from arenas.cache import get_availability_cache
+from arenas.models import Arena, Court, PriceRule, SlotTemplate
+from arenas.occupancy import is_block_bookable
+from users.serializers import ClaimsTokenObtainPairSerializer
+from .holds import HOLD_CONFLICT, HOLD_LIMIT, MAX_ACTIVE_HOLDS_PER_USER, place_hold
+from .models import BOOKING_NO_OVERLAP, Booking, BookingHold, IdempotencyKey, violates_constraint
+
+
+def aware(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class BookingTestData(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner", password="x")
+        cls.user = User.objects.create_user("player", password="x")
+        cls.arena = Arena.objects.create(
+            owner=cls.owner,
+            name="Arena",
+            address="Street 1",
+            latitude=Decimal("35.70"),
+            longitude=Decimal("51.40"),
+        )
+        cls.court = Court.objects.create(arena=cls.arena, name="Court 1", sport_type="padel")
+        for weekday in range(7):
+            SlotTemplate.objects.create(
+                court=cls.court,
+                weekday=weekday,
+                start_time=time(10),
+                end_time=time(22),
+                base_price=Decimal("100"),
+            )
+        cls.day = timezone.localdate() + timedelta(days=2)
+
+    def setUp(self):
+        get_availability_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, start, end, headers=None, **data):
+        return self.client.post(
+            "/api/v1/bookings/",
+            {"court_id": self.court.id, "start": start.isoformat(), "end": end.isoformat(), **data},
+            format="json",
+            headers=headers,
+        )
+
+    def book(self, start, end, status=Booking.Status.RESERVED):
+        return Booking.objects.create(
+            user=self.user, court=self.court, start=start, end=end, status=status,
+        )
+
+
+class BookingConstraintTests(BookingTestData):
+    def test_check_violation_is_not_an_overlap(self):
+        with self.assertRaises(IntegrityError) as ctx, transaction.atomic():
+            self.book(aware(self.day, 12), aware(self.day, 11))
+
+        self.assertFalse(violates_constraint(ctx.exception, BOOKING_NO_OVERLAP))
+
+    @skipUnless(connection.vendor == "postgresql", "exclusion constraint is PostgreSQL only")
+    def test_overlapping_reserved_bookings_are_rejected(self):
+        self.book(aware(self.day, 10), aware(self.day, 11, 30))
+
+        with self.assertRaises(IntegrityError) as ctx, transaction.atomic():
+            self.book(aware(self.day, 11), aware(self.day, 12))
+
+        self.assertTrue(violates_constraint(ctx.exception, BOOKING_NO_OVERLAP))
+
+    @skipUnless(connection.vendor == "postgresql", "exclusion constraint is PostgreSQL only")
+    def test_cancelled_and_adjacent_bookings_may_overlap(self):
+        self.book(aware(self.day, 10), aware(self.day, 11, 30))
+        self.book(aware(self.day, 11, 30), aware(self.day, 13))
+        self.book(aware(self.day, 10), aware(self.day, 11, 30), status=Booking.Status.CANCELLED)
+
+        self.assertEqual(Booking.objects.count(), 3)
+
+
+class BookingCreateTests(BookingTestData):
+    def test_busy_or_free_comes_from_the_database(self):
+        booking = self.book(aware(self.day, 10), aware(self.day, 11, 30))
+        self.assertEqual(self.post(booking.start, booking.end).status_code, 409)
+
+        # cancelled by another process: this one's cache still has it busy
+        Booking.objects.filter(id=booking.id).update(status=Booking.Status.CANCELLED)
+        self.assertFalse(is_block_bookable(self.court, booking.start, booking.end))
+        self.assertEqual(self.post(booking.start, booking.end).status_code, 201)
+
+    def test_off_grid_block_is_rejected(self):
+        response = self.post(aware(self.day, 10, 15), aware(self.day, 11, 45))
+        self.assertEqual(response.status_code, 400)
+
+    def test_stale_quoted_price_books_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PriceRule.objects.create(court=self.court, name="Peak", amount=Decimal("20"))
+        start, end = aware(self.day, 10), aware(self.day, 11, 30)
+
+        response = self.post(start, end, quoted_price="100.00")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["price"], "120.00")
+        self.assertFalse(Booking.objects.exists())
+
+        response = self.post(start, end, quoted_price="120.00")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.get().price, Decimal("120.00"))
+
+
+class IdempotencyTests(BookingTestData):
+    headers = {"Idempotency-Key": "checkout-1"}
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post(aware(self.day, 10), aware(self.day, 11, 30), headers=self.headers)
+        retry = self.post(aware(self.day, 10), aware(self.day, 11, 30), headers=self.headers)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.post(aware(self.day, 10), aware(self.day, 11, 30), headers=self.headers)
+        response = self.post(aware(self.day, 13), aware(self.day, 14, 30), headers=self.headers)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_prune_keeps_recent_keys(self):
+        self.post(aware(self.day, 10), aware(self.day, 11, 30), headers=self.headers)
+        self.post(aware(self.day, 13), aware(self.day, 14, 30), headers={"Idempotency-Key": "old"})
+        IdempotencyKey.objects.filter(key="old").update(
+            created_at=timezone.now() - timedelta(hours=25),
+        )
+
+        call_command("prune_idempotency_keys", "--hours", "24", stdout=StringIO())
+
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["checkout-1"])
+
+
+class BookingHoldTests(BookingTestData):
+    def test_overlapping_holds_are_refused(self):
+        hold, error = place_hold(
+            self.user.id, self.court, aware(self.day, 10), aware(self.day, 11, 30), Decimal("100"),
+        )
+        self.assertIsNone(error)
+
+        other = User.objects.create_user("other", password="x")
+        for start, end in ((aware(self.day, 11), aware(self.day, 12, 30)), (hold.start, hold.end)):
+            self.assertEqual(
+                place_hold(other.id, self.court, start, end, Decimal("100")),
+                (None, HOLD_CONFLICT),
+            )
+        self.assertEqual(BookingHold.objects.count(), 1)
+
+    def test_holds_per_user_are_capped(self):
+        for hour in range(10, 10 + MAX_ACTIVE_HOLDS_PER_USER):
+            _, error = place_hold(
+                self.user.id, self.court, aware(self.day, hour), aware(self.day, hour, 30), Decimal("100"),
+            )
+            self.assertIsNone(error)
+
+        self.assertEqual(
+            place_hold(self.user.id, self.court, aware(self.day, 20), aware(self.day, 21, 30), Decimal("100")),
+            (None, HOLD_LIMIT),
+        )
+
+    def test_hold_overlapped_by_a_booking_is_released_on_confirm(self):
+        hold, _ = place_hold(
+            self.user.id, self.court, aware(self.day, 10), aware(self.day, 11, 30), Decimal("100"),
+        )
+        # e.g. booked once the hold had expired, before it was swept
+        self.book(aware(self.day, 10), aware(self.day, 11, 30))
+
+        response = self.client.post(f"/api/v1/bookings/holds/{hold.id}/confirm/")
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(BookingHold.objects.filter(id=hold.id).exists())
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_confirm_books_at_the_held_price(self):
+        hold, _ = place_hold(
+            self.user.id, self.court, aware(self.day, 10), aware(self.day, 11, 30), Decimal("90"),
+        )
+
+        response = self.client.post(f"/api/v1/bookings/holds/{hold.id}/confirm/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.get().price, Decimal("90.00"))
+        self.assertFalse(BookingHold.objects.exists())
+
+        response = self.client.post(f"/api/v1/bookings/holds/{hold.id}/confirm/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_hold_lost_to_the_overlap_constraint_is_released(self):
+        hold, _ = place_hold(
+            self.user.id, self.court, aware(self.day, 10), aware(self.day, 11, 30), Decimal("100"),
+        )
+        # what a confirm racing a direct booking gets on PostgreSQL
+        overlap = IntegrityError(
+            f'conflicting key value violates exclusion constraint "{BOOKING_NO_OVERLAP}"'
+        )
+        with patch.object(Booking.objects, "create", side_effect=overlap):
+            response = self.client.post(f"/api/v1/bookings/holds/{hold.id}/confirm/")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(BookingHold.objects.filter(id=hold.id).exists())
+
+
+class BookingExportTests(BookingTestData):
+    path = "/api/v1/bookings/export/?output=ndjson"
+
+    def setUp(self):
+        self.bookings = [
+            self.book(aware(self.day, hour), aware(self.day, hour + 1)) for hour in (10, 12, 14)
+        ]
+        token = ClaimsTokenObtainPairSerializer.get_token(self.owner).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def exported_ids(self, lines):
+        return [json.loads(line)["id"] for line in b"".join(lines).splitlines()]
+
+    def test_wsgi_streams_a_sync_iterator(self):
+        response = Client().get(self.path, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        self.assertEqual(
+            self.exported_ids(response.streaming_content), [b.id for b in self.bookings],
+        )
+
+    async def test_asgi_streams_an_async_iterator(self):
+        response = await AsyncClient().get(self.path, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        # a sync iterator would be read to the end before sending
+        self.assertTrue(response.is_async)
+        with patch("bookings.export.EXPORT_CHUNK_SIZE", 2):
+            lines = [line async for line in response.streaming_content]
+        self.assertEqual(self.exported_ids(lines), [b.id for b in self.bookings])
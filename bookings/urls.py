@@ -1,7 +1,25 @@
 from django.urls import path
-from .views import BookingCreateView, MyBookingsView, BookingCancelView
+from . import async_views
+from .views import (
+    BookingBulkCreateView,
+    BookingCancelView,
+    BookingCreateView,
+    BookingExportView,
+    BookingHoldConfirmView,
+    BookingHoldCreateView,
+    BookingHoldView,
+    BookingStatsView,
+    MyBookingsView,
+)
 urlpatterns = [
     path("bookings/", BookingCreateView.as_view()),
+    path("bookings/bulk/", BookingBulkCreateView.as_view()),
+    path("bookings/export/", BookingExportView.as_view()),
+    path("bookings/holds/", BookingHoldCreateView.as_view()),
+    path("bookings/holds/<int:hold_id>/", BookingHoldView.as_view()),
+    path("bookings/holds/<int:hold_id>/confirm/", BookingHoldConfirmView.as_view()),
+    path("bookings/stats/", BookingStatsView.as_view()),
     path("bookings/mine/", MyBookingsView.as_view()),
+    path("bookings/mine/async/", async_views.my_bookings),
     path("bookings/<int:booking_id>/cancel/", BookingCancelView.as_view()),
 ]
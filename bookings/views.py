@@ -1,82 +1,439 @@
-from django.db import transaction
+from datetime import time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ParseError
+from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from arenas.availability import build_datetime, get_weekday, iter_dates, live_holds
 from arenas.models import Court
-from arenas.availability import get_daily_booking_blocks
-from .models import Booking
-from .serializers import BookingCreateSerializer, BookingSerializer
+from arenas.occupancy import is_block_on_grid
+from arenas.pricing import block_price, get_price_table
+from arenas.signals import notify_availability_changed
+from .bulk import (
+    MODE_ALL_OR_NOTHING,
+    RESULT_AVAILABLE,
+    RESULT_CREATED,
+    plan_occurrences,
+)
+from .export import OUTPUTS, OUTPUT_CSV, export_response
+from .holds import HOLD_CONFLICT, HOLD_LIMIT, MAX_ACTIVE_HOLDS_PER_USER, place_hold, release_hold
+from .idempotency import run_idempotent
+from .models import (
+    BOOKING_NO_OVERLAP,
+    Booking,
+    BookingHold,
+    CourtDailyRollup,
+    violates_constraint,
+)
+from .pagination import WHEN_UPCOMING, WHENS, MyBookingsCursorPagination
+from .rollups import (
+    get_open_minutes_by_court_weekday,
+    record_booking_cancelled,
+    record_bookings_created,
+)
+from .serializers import (
+    BookingBlockSerializer,
+    BookingBulkCreateSerializer,
+    BookingCreateSerializer,
+    BookingHoldSerializer,
+    BookingSerializer,
+    MyBookingSerializer,
+)
 
 
 class BookingCreateView(APIView):
+    """
+    POST /api/v1/bookings/
+
+    Optional header: Idempotency-Key. A retry with the same key returns
+    the stored response instead of booking again.
+
+    Optional field: quoted_price, the price shown by availability. If the
+    price changed since, nothing is booked (409 with the current price).
+    """
     permission_classes = [IsAuthenticated]
+    throttle_scope = "booking"
 
     @transaction.atomic
     def post(self, request):
         serializer = BookingCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        return run_idempotent(
+            request,
+            serializer.validated_data,
+            lambda: self.create_booking(request, **serializer.validated_data),
+        )
+
+    def create_booking(self, request, court_id, start, end, quoted_price=None):
+        # 1) One query: lock the court row (serializes bookings per court)
+        # and find out whether the block overlaps a RESERVED booking or
+        # a live hold.
+        conflicts = Booking.objects.filter(
+            court=OuterRef("pk"),
+            status=Booking.Status.RESERVED,
+            start__lt=end,
+            end__gt=start,
+        )
+        held = live_holds().filter(
+            court=OuterRef("pk"),
+            start__lt=end,
+            end__gt=start,
+        )
+
+        court = (
+            Court.objects.select_for_update()
+            .filter(id=court_id, is_active=True)
+            .annotate(has_conflict=Exists(conflicts) | Exists(held))
+            .first()
+        )
+
+        if court is None:
+            return Response({"detail": "Court not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # 2) Validate requested block is one of the allowed blocks for that day
+        # and price it from the same table availability quotes from
+        # (cached bitsets and price table, no query on a cache hit). Busy
+        # or free is the locked query's answer, never the cache's.
+        price = block_price(get_price_table(court), start, end)
+        if price is None or not is_block_on_grid(court, start, end):
+            return Response(
+                {"detail": "Requested time is not available or not a valid preset block."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if court.has_conflict:
+            return Response({"detail": "Time already booked"}, status=status.HTTP_409_CONFLICT)
+
+        if quoted_price is not None and quoted_price != price:
+            return Response(
+                {"detail": "Price has changed", "price": str(price)},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        # 3) Insert. On PostgreSQL the booking_no_overlap constraint is the
+        # final guard and is mapped to the same 409.
+        try:
+            with transaction.atomic():
+                booking = Booking.objects.create(
+                    user_id=request.user.id,
+                    court=court,
+                    start=start,
+                    end=end,
+                    price=price,
+                    status=Booking.Status.RESERVED,
+                )
+        except IntegrityError as exc:
+            if not violates_constraint(exc, BOOKING_NO_OVERLAP):
+                raise
+            return Response({"detail": "Time already booked"}, status=status.HTTP_409_CONFLICT)
+        record_bookings_created([booking])
+        notify_availability_changed(court.id, start, end)
+
+        return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+
+
+class BookingBulkCreateView(APIView):
+    """
+    POST /api/v1/bookings/bulk/
+
+    Book many blocks of one court at once, either an explicit `blocks`
+    list or `start` / `end` repeated weekly for `repeat_weeks` weeks.
+
+    mode=all_or_nothing (default): every occurrence is booked, or none is
+    (409 with the per-occurrence results).
+    mode=best_effort: the available occurrences are booked, the rest are
+    reported as conflict / invalid.
+
+    Optional header: Idempotency-Key, as for single bookings.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "booking"
+
+    @transaction.atomic
+    def post(self, request):
+        serializer = BookingBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return run_idempotent(
+            request,
+            serializer.validated_data,
+            lambda: self.create_bookings(request, **serializer.validated_data),
+        )
+
+    def create_bookings(self, request, court_id, mode, occurrences):
+        # Same per-court lock as single bookings
+        court = (
+            Court.objects.select_for_update()
+            .filter(id=court_id, is_active=True)
+            .first()
+        )
+        if court is None:
+            return Response({"detail": "Court not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Two queries for the whole span: templates + RESERVED bookings
+        plan = plan_occurrences(court, occurrences)
+        available = [entry for entry in plan if entry["result"] == RESULT_AVAILABLE]
+
+        if not available or (mode == MODE_ALL_OR_NOTHING and len(available) < len(plan)):
+            return Response(
+                {
+                    "detail": "Some occurrences are not available, nothing was booked.",
+                    "created": 0,
+                    "results": [self.result_data(entry) for entry in plan],
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            with transaction.atomic():
+                bookings = Booking.objects.bulk_create([
+                    Booking(
+                        user_id=request.user.id,
+                        court=court,
+                        start=entry["start"],
+                        end=entry["end"],
+                        price=entry["price"],
+                        status=Booking.Status.RESERVED,
+                    )
+                    for entry in available
+                ])
+        except IntegrityError as exc:
+            if not violates_constraint(exc, BOOKING_NO_OVERLAP):
+                raise
+            return Response({"detail": "Time already booked"}, status=status.HTTP_409_CONFLICT)
+        record_bookings_created(bookings)
+        notify_availability_changed(
+            court.id,
+            min(booking.start for booking in bookings),
+            max(booking.end for booking in bookings),
+        )
+
+        for entry, booking in zip(available, bookings):
+            entry["result"] = RESULT_CREATED
+            entry["booking"] = booking
+
+        return Response(
+            {
+                "created": len(bookings),
+                "results": [self.result_data(entry) for entry in plan],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @staticmethod
+    def result_data(entry):
+        data = {
+            **BookingBlockSerializer(entry).data,
+            "result": entry["result"],
+        }
+        if "booking" in entry:
+            data["booking"] = BookingSerializer(entry["booking"]).data
+        return data
+
+
+class BookingHoldCreateView(APIView):
+    """
+    POST /api/v1/bookings/holds/    {court_id, start, end, quoted_price?}
+
+    Hold a block for HOLD_TTL_SECONDS while the user checks out, then
+    POST /api/v1/bookings/holds/<id>/confirm/ to book it or
+    DELETE /api/v1/bookings/holds/<id>/ to let it go.
+    The court row is locked only while the hold is placed; see
+    bookings/holds.py.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "booking"
+
+    def post(self, request):
+        serializer = BookingCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         court_id = serializer.validated_data["court_id"]
         start = serializer.validated_data["start"]
         end = serializer.validated_data["end"]
+        quoted_price = serializer.validated_data.get("quoted_price")
 
-        try:
-            court = Court.objects.get(id=court_id, is_active=True)
-        except Court.DoesNotExist:
+        court = Court.objects.filter(id=court_id, is_active=True).first()
+        if court is None:
             return Response({"detail": "Court not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # 1) Validate requested block is one of the allowed blocks for that day
-        allowed_blocks = get_daily_booking_blocks(court, start.date())
-        allowed_set = {(b["start"], b["end"]) for b in allowed_blocks}
-
-        if (start, end) not in allowed_set:
+        # a block of the grid; place_hold() checks it is free
+        price = block_price(get_price_table(court), start, end)
+        if price is None or not is_block_on_grid(court, start, end):
             return Response(
                 {"detail": "Requested time is not available or not a valid preset block."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 2) Prevent double-booking (atomic check)
-        conflict = Booking.objects.select_for_update().filter(
-            court=court,
-            status=Booking.Status.RESERVED,
-            start__lt=end,
-            end__gt=start,
-        ).exists()
+        if quoted_price is not None and quoted_price != price:
+            return Response(
+                {"detail": "Price has changed", "price": str(price)},
+                status=status.HTTP_409_CONFLICT,
+            )
 
-        if conflict:
+        hold, error = place_hold(request.user.id, court, start, end, price)
+        if error == HOLD_LIMIT:
+            return Response(
+                {"detail": f"At most {MAX_ACTIVE_HOLDS_PER_USER} active holds per user"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if error == HOLD_CONFLICT:
             return Response({"detail": "Time already booked"}, status=status.HTTP_409_CONFLICT)
 
-        # 3) Price: for now, use the price from availability blocks if you want
-        # We'll keep it simple for now:
-        price = 80
+        return Response(BookingHoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+
+class BookingHoldView(APIView):
+    """
+    DELETE /api/v1/bookings/holds/<id>/
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "booking"
+
+    def delete(self, request, hold_id):
+        if not release_hold(request.user.id, hold_id):
+            return Response({"detail": "Hold not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BookingHoldConfirmView(APIView):
+    """
+    POST /api/v1/bookings/holds/<id>/confirm/
+
+    Turns a live hold into a Booking at the held price.
+    Optional header: Idempotency-Key, as for single bookings.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "booking"
 
-        booking = Booking.objects.create(
-            user=request.user,
-            court=court,
-            start=start,
-            end=end,
-            price=price,
+    @transaction.atomic
+    def post(self, request, hold_id):
+        return run_idempotent(
+            request,
+            {"hold_id": hold_id},
+            lambda: self.confirm(request, hold_id),
+        )
+
+    def confirm(self, request, hold_id):
+        hold = BookingHold.objects.filter(id=hold_id, user_id=request.user.id).first()
+        if hold is None:
+            return Response({"detail": "Hold not found or expired"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Court row first, as booking creation and place_hold() lock it,
+        # then the hold row. Both are held only for the check and insert.
+        # A booking made after the hold expired (or that skipped the
+        # court lock: admin, bulk writes) shows up here.
+        conflicts = Booking.objects.filter(
+            court=OuterRef("pk"),
             status=Booking.Status.RESERVED,
+            start__lt=hold.end,
+            end__gt=hold.start,
+        )
+        court = (
+            Court.objects.select_for_update()
+            .filter(id=hold.court_id, is_active=True)
+            .annotate(has_conflict=Exists(conflicts))
+            .first()
         )
+        hold = (
+            BookingHold.objects.select_for_update()
+            .filter(id=hold.id, expires_at__gt=timezone.now())
+            .first()
+        )
+        if court is None or hold is None:
+            return Response({"detail": "Hold not found or expired"}, status=status.HTTP_404_NOT_FOUND)
+
+        if court.has_conflict:
+            hold.delete()
+            notify_availability_changed(hold.court_id, hold.start, hold.end)
+            return Response({"detail": "Time already booked"}, status=status.HTTP_409_CONFLICT)
+
+        try:
+            with transaction.atomic():
+                booking = Booking.objects.create(
+                    user_id=request.user.id,
+                    court_id=hold.court_id,
+                    start=hold.start,
+                    end=hold.end,
+                    price=hold.price,
+                    status=Booking.Status.RESERVED,
+                )
+        except IntegrityError as exc:
+            if not violates_constraint(exc, BOOKING_NO_OVERLAP):
+                raise
+            # the hold can't be confirmed any more, free it
+            hold.delete()
+            notify_availability_changed(hold.court_id, hold.start, hold.end)
+            return Response({"detail": "Time already booked"}, status=status.HTTP_409_CONFLICT)
+        hold.delete()
+        record_bookings_created([booking])
+        notify_availability_changed(hold.court_id, hold.start, hold.end)
 
         return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
-from rest_framework.generics import ListAPIView
-from rest_framework.permissions import IsAuthenticated
+
+
+def my_bookings_queryset(user_id, params):
+    """
+    Bookings of one user, filtered by ?when=upcoming|past and ?status=.
+    Ordering is left to MyBookingsCursorPagination.
+    Raises ValueError on an unknown filter value.
+    """
+    queryset = Booking.objects.filter(user_id=user_id).select_related("court__arena")
+
+    when = params.get("when")
+    if when:
+        if when not in WHENS:
+            raise ValueError(f"when must be one of: {', '.join(WHENS)}")
+        now = timezone.now()
+        if when == WHEN_UPCOMING:
+            queryset = queryset.filter(end__gt=now)
+        else:
+            queryset = queryset.filter(end__lte=now)
+
+    booking_status = params.get("status")
+    if booking_status:
+        if booking_status not in Booking.Status.values:
+            raise ValueError(f"status must be one of: {', '.join(Booking.Status.values)}")
+        queryset = queryset.filter(status=booking_status)
+
+    return queryset
+
 
 class MyBookingsView(ListAPIView):
+    """
+    GET /api/v1/bookings/mine/?when=upcoming|past&status=RESERVED&page_size=50
+
+    Cursor paginated; follow `next` for older (or later) pages.
+    """
     permission_classes = [IsAuthenticated]
-    serializer_class = BookingSerializer
+    serializer_class = MyBookingSerializer
+    pagination_class = MyBookingsCursorPagination
+    # one page query, courts and arenas joined in
+    query_budget = 1
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user).order_by("-created_at")
+        try:
+            return my_bookings_queryset(self.request.user.id, self.request.query_params)
+        except ValueError as exc:
+            raise ParseError(str(exc))
+
+
 class BookingCancelView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = "booking"
 
+    @transaction.atomic
     def post(self, request, booking_id):
         try:
-            booking = Booking.objects.get(id=booking_id, user=request.user)
+            # locked, so a double cancel can't count twice in the rollups
+            booking = Booking.objects.select_for_update().get(id=booking_id, user_id=request.user.id)
         except Booking.DoesNotExist:
             return Response({"detail": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -85,5 +442,171 @@ class BookingCancelView(APIView):
 
         booking.status = Booking.Status.CANCELLED
         booking.save(update_fields=["status"])
+        record_booking_cancelled(booking)
+        notify_availability_changed(booking.court_id, booking.start, booking.end)
 
         return Response(BookingSerializer(booking).data, status=status.HTTP_200_OK)
+
+
+# Limits of GET /api/v1/bookings/stats/
+MAX_STATS_DAYS = 366
+MAX_STATS_COURTS = 200
+
+
+def _stats_totals(booking_count, booked_minutes, open_minutes, revenue):
+    return {
+        "booking_count": booking_count,
+        "booked_minutes": booked_minutes,
+        "open_minutes": open_minutes,
+        "revenue": f"{revenue:.2f}",
+        "utilization": round(booked_minutes / open_minutes, 4) if open_minutes else None,
+    }
+
+
+class BookingStatsView(APIView):
+    """
+    GET /api/v1/bookings/stats/?from=YYYY-MM-DD&to=YYYY-MM-DD[&arena_id=][&court_id=]
+
+    Per court, per day utilization and revenue of the requesting owner's
+    courts, read from CourtDailyRollup (one row per court-day, no Booking
+    scan). Days without a row had no bookings; their open minutes come
+    from the current templates.
+    """
+    permission_classes = [IsAuthenticated]
+    # user + courts + rollups + templates
+    query_budget = 4
+
+    def get(self, request):
+        params = request.query_params
+        start_date = parse_date(params.get("from") or "")
+        end_date = parse_date(params.get("to") or "")
+        if not start_date or not end_date:
+            return Response(
+                {"detail": "from and to are required. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if end_date < start_date:
+            return Response({"detail": "to must not be before from"}, status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= MAX_STATS_DAYS:
+            return Response(
+                {"detail": f"At most {MAX_STATS_DAYS} days per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        courts = Court.objects.order_by("arena_id", "name", "id")
+        if not request.user.is_superuser:
+            courts = courts.filter(arena__owner_id=request.user.id)
+        for param, field in (("arena_id", "arena_id"), ("court_id", "id")):
+            if param in params:
+                try:
+                    courts = courts.filter(**{field: int(params[param])})
+                except ValueError:
+                    return Response(
+                        {"detail": f"{param} must be an integer"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+        courts = list(courts.values("id", "name", "arena_id")[:MAX_STATS_COURTS + 1])
+        if len(courts) > MAX_STATS_COURTS:
+            return Response(
+                {"detail": f"At most {MAX_STATS_COURTS} courts per request, filter by arena_id"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        court_ids = [court["id"] for court in courts]
+        days = list(iter_dates(start_date, end_date))
+
+        rollups = {
+            (row.court_id, row.date): row
+            for row in CourtDailyRollup.objects.filter(
+                court_id__in=court_ids,
+                date__gte=start_date,
+                date__lte=end_date,
+            )
+        }
+        open_minutes = get_open_minutes_by_court_weekday(
+            court_ids, {get_weekday(day) for day in days}
+        )
+
+        grand = [0, 0, 0, 0]
+        data = []
+        for court in courts:
+            court_sum = [0, 0, 0, 0]
+            per_day = []
+            for day in days:
+                row = rollups.get((court["id"], day))
+                if row is None:
+                    values = (0, 0, open_minutes.get((court["id"], get_weekday(day)), 0), 0)
+                else:
+                    values = (row.booking_count, row.booked_minutes, row.open_minutes, row.revenue)
+
+                for i, value in enumerate(values):
+                    court_sum[i] += value
+                per_day.append({"date": day, **_stats_totals(*values)})
+
+            for i, value in enumerate(court_sum):
+                grand[i] += value
+            data.append({
+                "court_id": court["id"],
+                "court": court["name"],
+                "arena_id": court["arena_id"],
+                "totals": _stats_totals(*court_sum),
+                "days": per_day,
+            })
+
+        return Response({
+            "from": start_date,
+            "to": end_date,
+            "totals": _stats_totals(*grand),
+            "courts": data,
+        })
+
+
+class BookingExportView(APIView):
+    """
+    GET /api/v1/bookings/export/?output=csv|ndjson
+        [&from=YYYY-MM-DD][&to=YYYY-MM-DD][&arena_id=][&court_id=]
+
+    Streams every booking (any status) on the requesting owner's courts,
+    ordered by start. from / to are inclusive local dates on start.
+    `output` rather than `format`, which DRF reserves for renderers.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        output = params.get("output", OUTPUT_CSV)
+        if output not in OUTPUTS:
+            return Response(
+                {"detail": f"output must be one of: {', '.join(OUTPUTS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        qs = Booking.objects.all()
+        if not request.user.is_superuser:
+            qs = qs.filter(court__arena__owner_id=request.user.id)
+
+        tz = timezone.get_current_timezone()
+        for param, lookup, days in (("from", "start__gte", 0), ("to", "start__lt", 1)):
+            if param not in params:
+                continue
+            day = parse_date(params[param]) if params[param] else None
+            if not day:
+                return Response(
+                    {"detail": "Invalid date format. Use YYYY-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            qs = qs.filter(**{lookup: build_datetime(day + timedelta(days=days), time.min, tz)})
+
+        for param, field in (("arena_id", "court__arena_id"), ("court_id", "court_id")):
+            if param in params:
+                try:
+                    qs = qs.filter(**{field: int(params[param])})
+                except ValueError:
+                    return Response(
+                        {"detail": f"{param} must be an integer"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+        filename = f"bookings-{timezone.localdate():%Y%m%d}"
+        return export_response(request, qs.order_by("start", "id"), output, filename)
@@ -0,0 +1,94 @@
+"""
+Helpers for plain Django async views that must answer exactly like their
+DRF counterparts (DRF's APIView is sync only).
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+def json_response(data, status=200, headers=None):
+    """
+    Rendered with DRF's JSONRenderer, so the body is byte-identical
+    to the sync view's response.
+    """
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def _authenticate(request):
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authentication_class()
+        result = authenticator.authenticate(request)
+        if result is not None:
+            return result[0], authenticator
+    return None, None
+
+
+async def aauthenticate(request, optional=False):
+    """
+    Run the configured DRF authentication classes (they may hit the DB).
+    optional=True is for AllowAny views: a request without credentials
+    gets DRF's UNAUTHENTICATED_USER (bad credentials are still a 401).
+
+    returns: (user, None) on success, (None, error_response) otherwise,
+    with the same 401 body and WWW-Authenticate header DRF sends.
+    """
+    try:
+        user, authenticator = await sync_to_async(_authenticate)(request)
+    except exceptions.AuthenticationFailed as exc:
+        return None, _unauthorized(exc)
+
+    if user is None:
+        if not optional:
+            return None, _unauthorized(exceptions.NotAuthenticated())
+        if api_settings.UNAUTHENTICATED_USER:
+            user = api_settings.UNAUTHENTICATED_USER()
+
+    # as DRF does, for middleware that looks at the user afterwards
+    request.user = user
+    return user, None
+
+
+async def athrottle(request, user=None):
+    """
+    Check the configured DRF throttle classes.
+
+    returns: None, or the 429 response DRF sends (with Retry-After)
+    """
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if hasattr(throttle, "aallow_request"):
+            allowed = await throttle.aallow_request(request, user)
+        else:
+            # stock DRF throttles are sync and read request.user; no view here
+            allowed = await sync_to_async(throttle.allow_request)(request, None)
+        # the remaining throttles don't count a rejected request
+        if not allowed:
+            break
+    else:
+        return None
+
+    exc = exceptions.Throttled(wait=throttle.wait())
+    headers = {}
+    if exc.wait is not None:
+        headers["Retry-After"] = "%d" % exc.wait
+    return json_response({"detail": exc.detail}, status=exc.status_code, headers=headers)
+
+
+def _unauthorized(exc):
+    headers = {}
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    if authentication_classes:
+        header = authentication_classes[0]().authenticate_header(None)
+        if header:
+            headers["WWW-Authenticate"] = header
+
+    data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+    return json_response(data, status=exc.status_code, headers=headers)
@@ -0,0 +1,98 @@
+"""
+Read-replica routing.
+
+With a "replica" alias in DATABASES (DB_REPLICA_HOST / DB_REPLICA_NAME,
+see core/settings.py), reads inside use_replica() go to it. Everything
+else stays on "default":
+
+- writes, and select_for_update() reads (Django routes those as writes),
+  so booking creation keeps checking conflicts on the primary;
+- reads inside a transaction, which expect to see its own writes;
+- reads of objects loaded from the replica, once outside use_replica().
+
+Replica reads may lag behind the primary. Views opt in with
+ReplicaReadMixin (GET / HEAD only) when a slightly stale answer is fine:
+availability and catalog reads. Availability cache misses are computed
+inside use_primary() (arenas/cache.py): the entries are stored under the
+court's current version, which a lagging replica may not have caught up
+with, and the booking path reads them too.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework import permissions
+
+REPLICA_DB_ALIAS = "replica"
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+@contextmanager
+def use_replica():
+    """
+    Route the reads of the block to the replica, if there is one. Follows
+    the request into sync_to_async threads like any ContextVar.
+    """
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Undo use_replica() for the block, for reads whose results outlive the
+    request.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in connections.settings
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_configured():
+            return None
+        if _use_replica.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA_DB_ALIAS
+        # not the instance's alias, which may be the replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if not replica_configured():
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # same data on both aliases
+        dbs = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica gets its schema through replication
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin: safe-method requests read from the replica.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in permissions.SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+
+        with use_replica():
+            return super().dispatch(request, *args, **kwargs)
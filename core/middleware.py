@@ -0,0 +1,183 @@
+"""
+Per-request DB / timing instrumentation.
+
+For every request this records the number of SQL queries, the time spent
+in the database, in the view and in response rendering, and reports it
+as a Server-Timing header plus one JSON log line on the
+"core.request_metrics" logger.
+
+Views can declare a query budget:
+
+    class AvailabilityBlocksView(APIView):
+        query_budget = 3                      # any method
+        query_budget = {"get": 3}             # per HTTP method
+        query_budget = {"list": 2}            # per ViewSet action
+
+Requests that go over it are logged at WARNING level. Tests can enforce
+the same budgets with core.testing.assert_query_budget.
+"""
+import json
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("core.request_metrics")
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper that counts queries and their duration.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - started
+
+
+def get_view_query_budget(view_func, method):
+    """
+    Declared query_budget of a resolved view function, or None.
+    """
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    budget = getattr(view_class, "query_budget", None)
+
+    if not isinstance(budget, dict):
+        return budget
+
+    method = method.lower()
+    # DRF ViewSets: budgets keyed by action name
+    actions = getattr(view_func, "actions", None) or {}
+    if actions.get(method) in budget:
+        return budget[actions[method]]
+    return budget.get(method)
+
+
+# Recorder of the request being served. A ContextVar follows the request
+# into sync_to_async threads, where async views run their queries on that
+# thread's own connection.
+_current_recorder = ContextVar("request_query_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    """
+    Permanent execute wrapper; a no-op outside of requests.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+class RequestMetricsMiddleware:
+    """
+    Sync and async capable, so async views on ASGI are not pushed onto a
+    thread just because this middleware is in the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder, started, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder, started, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def start(self, request):
+        # connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+        request._metrics_timings = {}
+        recorder = QueryRecorder()
+        token = _current_recorder.set(recorder)
+        return recorder, perf_counter(), token
+
+    def finish(self, request, response, recorder, started):
+        timings = request._metrics_timings
+        finished = perf_counter()
+        total = finished - started
+
+        # view time includes its DB time; render is DRF/template rendering
+        view = timings.get("render_start", finished) - timings.get("view_start", started)
+        render = 0.0
+        if "render_end" in timings:
+            render = timings["render_end"] - timings["render_start"]
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+            f"view;dur={view * 1000:.1f}",
+            f"render;dur={render * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+        budget = timings.get("query_budget")
+        over_budget = budget is not None and recorder.count > budget
+        line = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(total * 1000, 2),
+            "db_queries": recorder.count,
+            "db_ms": round(recorder.duration * 1000, 2),
+            "view_ms": round(view * 1000, 2),
+            "render_ms": round(render * 1000, 2),
+            "query_budget": budget,
+            "over_budget": over_budget,
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(line))
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_timings["view_start"] = perf_counter()
+        request._metrics_timings["query_budget"] = get_view_query_budget(
+            view_func, request.method
+        )
+
+    def process_template_response(self, request, response):
+        # DRF Responses are rendered right after this hook returns
+        timings = request._metrics_timings
+        timings["render_start"] = perf_counter()
+
+        def render_done(rendered):
+            timings["render_end"] = perf_counter()
+
+        response.add_post_render_callback(render_done)
+        return response
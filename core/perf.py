@@ -0,0 +1,33 @@
+"""
+Small helpers shared by the benchmark / load tooling.
+"""
+import math
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+def summarize(latencies_ms):
+    """
+    Latency summary in milliseconds: count, mean, p50, p95, p99, max.
+    """
+    values = sorted(latencies_ms)
+    if not values:
+        return {"count": 0}
+
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+    }
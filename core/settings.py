@@ -10,22 +10,46 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Values come from the environment, or from a .env file next to manage.py
+# (see .env.example); variables already set in the environment win.
+load_dotenv(BASE_DIR / '.env')
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default=()):
+    value = os.environ.get(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-w@9ko13v691oi&$2doo^qzny*apyo_qd+!nuu%57#3b($x7jre'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'django-insecure-w@9ko13v691oi&$2doo^qzny*apyo_qd+!nuu%57#3b($x7jre',
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool('DEBUG', True)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS')
 
 
 # Application definition
@@ -44,6 +68,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # no-op unless TRAFFIC_RECORD_PATH is set
+    'core.traffic.TrafficRecordingMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,11 +103,99 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# PostgreSQL when DB_NAME is set (docker-compose.yml), SQLite otherwise.
+#
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before
+# reuse. DB_POOL=true uses psycopg 3's connection pool instead (install
+# "psycopg[pool]"); Django requires CONN_MAX_AGE = 0 with a pool.
+#
+# DB_REPLICA_HOST (or DB_REPLICA_NAME) adds a "replica" alias, other
+# DB_REPLICA_* values default to the primary's. Only views that opt in
+# read from it, see core/db_router.py. Locally, DB_REPLICA_NAME pointing
+# at the same SQLite file gives two aliases over the same data.
+
+if os.environ.get('DB_NAME'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['DB_NAME'],
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
     }
+    if env_bool('DB_POOL'):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        # tests create one database and read it through both aliases
+        'TEST': {'MIRROR': 'default'},
+    }
+    for key in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT'):
+        if os.environ.get(f'DB_REPLICA_{key}'):
+            DATABASES['replica'][key] = os.environ[f'DB_REPLICA_{key}']
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# "availability" holds computed booking blocks (see arenas/cache.py).
+# Invalidation is a version bump in this cache, so every process that
+# writes bookings or holds must share it. With a per-process locmem cache,
+# other web workers and the `manage.py expire_holds` cron can't invalidate
+# what a worker has cached. AVAILABILITY_CACHE_DIR switches it to
+# FileBasedCache at that path. With DEBUG off it defaults to
+# BASE_DIR/.cache/availability; locmem is only for a single dev server.
+AVAILABILITY_CACHE_DIR = os.environ.get('AVAILABILITY_CACHE_DIR') or (
+    None if DEBUG else str(BASE_DIR / '.cache' / 'availability')
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'availability': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache' if AVAILABILITY_CACHE_DIR
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': AVAILABILITY_CACHE_DIR or 'availability',
+        'TIMEOUT': 60 * 10,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    # sliding-window counters of core/throttling.py; use a shared cache
+    # for limits across workers
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
 }
 
 
@@ -126,6 +241,67 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # trusts signed user claims, no User query per request
+        'users.authentication.ClaimsJWTAuthentication',
+    ),
+    # sliding windows, see core/throttling.py; a scope without a rate
+    # is not throttled
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.ReadRateThrottle',
+        'core.throttling.WriteRateThrottle',
     ),
+    'DEFAULT_THROTTLE_RATES': {
+        'read_anon': os.environ.get('THROTTLE_READ_ANON', '120/min'),
+        'read_user': os.environ.get('THROTTLE_READ_USER', '300/min'),
+        # per process, sheds reads before they crowd out bookings;
+        # checked by ReadRateThrottle after the client's own read limit
+        'read_global': os.environ.get('THROTTLE_READ_GLOBAL', '200/s'),
+        'write_anon': os.environ.get('THROTTLE_WRITE_ANON', '20/min'),
+        'write_user': os.environ.get('THROTTLE_WRITE_USER', '60/min'),
+        'booking_user': os.environ.get('THROTTLE_BOOKING_USER', '30/min'),
+    },
+    # proxies in front of the app, for the client IP of anonymous limits
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES']) if os.environ.get('NUM_PROXIES') else None,
+}
+
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.ClaimsTokenRefreshSerializer',
+}
+
+# Opt-in: sanitized request lines for `manage.py replay_traffic`,
+# see core/traffic.py. e.g. TRAFFIC_RECORD_PATH=traffic.jsonl
+TRAFFIC_RECORD_PATH = os.environ.get('TRAFFIC_RECORD_PATH') or None
+TRAFFIC_RECORD_SAMPLE_RATE = float(os.environ.get('TRAFFIC_RECORD_SAMPLE_RATE', 1.0))
+
+# quiets core.request_metrics while tests run
+TEST_RUNNER = 'core.testing.TestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # one JSON line per request, see core/middleware.py
+        'core.request_metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
+
+if TRAFFIC_RECORD_PATH:
+    LOGGING['handlers']['traffic'] = {
+        'class': 'logging.FileHandler',
+        'filename': TRAFFIC_RECORD_PATH,
+    }
+    LOGGING['loggers']['core.traffic'] = {
+        'handlers': ['traffic'],
+        'level': 'INFO',
+        'propagate': False,
+    }
@@ -0,0 +1,77 @@
+"""
+Test helpers for query budgets, and the test runner (settings.TEST_RUNNER).
+
+    from core.testing import assert_max_queries, assert_query_budget
+
+    with assert_max_queries(3):
+        get_daily_booking_blocks(court, day)
+
+    # uses the view's declared query_budget (see core.middleware)
+    assert_query_budget(client, "get", "/api/v1/arenas/")
+"""
+import logging
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .middleware import get_view_query_budget
+
+
+def _format_queries(captured):
+    return "\n".join(
+        f"{i}. {query['sql']}" for i, query in enumerate(captured, start=1)
+    )
+
+
+@contextmanager
+def assert_max_queries(budget, using=DEFAULT_DB_ALIAS):
+    """
+    Fail if the block runs more than `budget` queries on `using`.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    if executed > budget:
+        raise AssertionError(
+            f"{executed} queries executed, budget is {budget}:\n"
+            f"{_format_queries(context.captured_queries)}"
+        )
+
+
+def assert_query_budget(client, method, path, budget=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Send one request with a (DRF / Django) test client and fail if it runs
+    more queries than `budget`, or than the view's declared query_budget.
+
+    returns: the response
+    """
+    if budget is None:
+        match = resolve(path.split("?", 1)[0])
+        budget = get_view_query_budget(match.func, method)
+        if budget is None:
+            raise AssertionError(f"{match.func.__name__} declares no query_budget")
+
+    with assert_max_queries(budget, using=using):
+        response = getattr(client, method.lower())(path, **kwargs)
+
+    return response
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Silences the per-request metrics lines, which would interleave with the
+    test progress; tests assert query budgets instead.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        metrics = logging.getLogger("core.request_metrics")
+        self._metrics_level = metrics.level
+        metrics.setLevel(logging.ERROR)
+
+    def teardown_test_environment(self, **kwargs):
+        logging.getLogger("core.request_metrics").setLevel(self._metrics_level)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,206 @@
+"""
+Sliding-window rate limits (REST_FRAMEWORK DEFAULT_THROTTLE_CLASSES).
+
+A fixed window lets a client send twice its rate around a window
+boundary. Here a request is allowed while
+
+    previous_window_count * (1 - elapsed / window) + current_window_count
+
+is under the rate, which smooths that out with two counters per client,
+kept in the "throttle" cache (local memory by default, a shared cache
+makes limits global across workers).
+
+A throttle may check several windows; the request is counted in all of
+them only if all have room, so rejected requests are counted nowhere.
+
+Budgets are scopes in DEFAULT_THROTTLE_RATES, so scrapers exhausting the
+read budget leave the booking budget alone:
+
+- ReadRateThrottle: GET / HEAD / OPTIONS, "read_user" per user,
+  "read_anon" per client IP, then "read_global" for all reads of the
+  process together (under load reads are turned away before bookings).
+  A client over its own limit doesn't use up everyone's.
+- WriteRateThrottle: other methods, "<scope>_user" / "<scope>_anon" where
+  scope is the view's throttle_scope, "write" by default (booking views
+  use "booking")
+
+A scope without a rate is not throttled. DRF answers rejections with
+429 and a Retry-After header.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test.utils import override_settings
+from rest_framework import permissions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_CACHE_ALIAS = "throttle"
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    "100/min" -> (100, 60), same format as DRF rates.
+    """
+    if not rate:
+        return None
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+def without_throttling():
+    """
+    override_settings() without any rates, for the load tools
+    (benchmark, compare_async, replay_traffic), which send many requests
+    as few clients.
+    """
+    return override_settings(
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}},
+    )
+
+
+def sliding_count(previous, current, elapsed, window):
+    return previous * (1 - elapsed / window) + current
+
+
+def seconds_until_allowed(previous, current, elapsed, window, limit):
+    room = limit - 1
+    if current > room:
+        # the current window has to become the previous one, then decay
+        return (window - elapsed) + window * (1 - room / current)
+    # only the previous window's share has to decay
+    return max(window * (1 - (room - current) / previous) - elapsed, 0)
+
+
+class SlidingWindowRateThrottle(BaseThrottle):
+    scope = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def applies(self, request, view):
+        return True
+
+    def get_scope(self, request, view, user):
+        return self.scope
+
+    def get_ident_key(self, request, user):
+        if user is not None and user.is_authenticated:
+            return "user", user.id
+        return "anon", self.get_ident(request)
+
+    def get_rate(self, scope):
+        return parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+
+    def get_limits(self, request, view, user):
+        """
+        returns: [(scope, ident)], the windows that all need room
+        """
+        return [(self.get_scope(request, view, user), self.ident(request, user))]
+
+    def prepare(self, request, view, user):
+        """
+        returns: [(rate, keys, elapsed)] of the limits that have a rate
+        """
+        if not self.applies(request, view):
+            return []
+
+        now = time.time()
+        prepared = []
+        for scope, ident in self.get_limits(request, view, user):
+            rate = self.get_rate(scope) if scope else None
+            if rate is None:
+                continue
+            limit, window = rate
+            index = int(now // window)
+            key = f"throttle:{scope}:{ident}"
+            keys = (f"{key}:{index - 1}", f"{key}:{index}")
+            prepared.append((rate, keys, now - index * window))
+        return prepared
+
+    def ident(self, request, user):
+        kind, value = self.get_ident_key(request, user)
+        return f"{kind}:{value}"
+
+    def decide(self, prepared, counts):
+        for rate, keys, elapsed in prepared:
+            limit, window = rate
+            previous, current = counts.get(keys[0], 0), counts.get(keys[1], 0)
+            if sliding_count(previous, current, elapsed, window) + 1 > limit:
+                self.wait_seconds = seconds_until_allowed(previous, current, elapsed, window, limit)
+                return False
+        return True
+
+    def allow_request(self, request, view):
+        prepared = self.prepare(request, view, getattr(request, "user", None))
+        if not prepared:
+            return True
+
+        cache = caches[THROTTLE_CACHE_ALIAS]
+        counts = cache.get_many([key for _, keys, _ in prepared for key in keys])
+        if not self.decide(prepared, counts):
+            return False
+
+        for rate, keys, _ in prepared:
+            # both windows must outlive the next one
+            if not cache.add(keys[1], 1, timeout=rate[1] * 2 + 1):
+                try:
+                    cache.incr(keys[1])
+                except ValueError:
+                    # expired in between
+                    cache.set(keys[1], 1, timeout=rate[1] * 2 + 1)
+        return True
+
+    async def aallow_request(self, request, user=None):
+        """
+        allow_request() for plain async views (core.async_api.athrottle),
+        with the cache's async API.
+        """
+        prepared = self.prepare(request, None, user)
+        if not prepared:
+            return True
+
+        cache = caches[THROTTLE_CACHE_ALIAS]
+        counts = await cache.aget_many([key for _, keys, _ in prepared for key in keys])
+        if not self.decide(prepared, counts):
+            return False
+
+        for rate, keys, _ in prepared:
+            if not await cache.aadd(keys[1], 1, timeout=rate[1] * 2 + 1):
+                try:
+                    await cache.aincr(keys[1])
+                except ValueError:
+                    await cache.aset(keys[1], 1, timeout=rate[1] * 2 + 1)
+        return True
+
+    def wait(self):
+        return None if self.wait_seconds is None else max(math.ceil(self.wait_seconds), 1)
+
+
+class ReadRateThrottle(SlidingWindowRateThrottle):
+    def applies(self, request, view):
+        return request.method in permissions.SAFE_METHODS
+
+    def get_scope(self, request, view, user):
+        if user is not None and user.is_authenticated:
+            return "read_user"
+        return "read_anon"
+
+    def get_limits(self, request, view, user):
+        # after the client's own window, which has to have room first
+        return [*super().get_limits(request, view, user), ("read_global", "all:reads")]
+
+
+class WriteRateThrottle(SlidingWindowRateThrottle):
+    def applies(self, request, view):
+        return request.method not in permissions.SAFE_METHODS
+
+    def get_scope(self, request, view, user):
+        scope = getattr(view, "throttle_scope", None) or "write"
+        if user is not None and user.is_authenticated:
+            return f"{scope}_user"
+        return f"{scope}_anon"
@@ -0,0 +1,162 @@
+"""
+Opt-in traffic recording for `manage.py replay_traffic`.
+
+With settings.TRAFFIC_RECORD_PATH set, every sampled request is written as
+one JSON line on the "core.traffic" logger (a FileHandler on that path):
+
+    {"ts": 1760792400.123, "method": "POST", "path": "/api/v1/bookings/",
+     "route": "api/v1/bookings/", "query": {}, "body": {...},
+     "user": "3f1c0a9b2d4e5f60", "status": 201, "duration_ms": 14.2}
+
+Lines are sanitized before they are written:
+- no headers, cookies or tokens; the user is an HMAC pseudonym, stable
+  within one SECRET_KEY, so replay can map it onto a local user
+- values of keys that look like credentials or contact data are replaced
+  by "<redacted>"
+- long strings become "<str:N>", bodies over MAX_BODY_BYTES or not JSON
+  become "<bytes:N>", lists are cut to MAX_LIST_ITEMS
+
+Without the setting the middleware removes itself (MiddlewareNotUsed).
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger("core.traffic")
+
+SENSITIVE_KEY = re.compile(
+    r"pass|token|secret|refresh|access|auth|cookie|session|user_?name|email|phone|key",
+    re.IGNORECASE,
+)
+REDACTED = "<redacted>"
+
+MAX_STRING_LENGTH = 64
+MAX_LIST_ITEMS = 60
+MAX_BODY_BYTES = 64 * 1024
+
+
+def sanitize(value, key=""):
+    """
+    JSON value with credentials removed and free text reduced to its length.
+    """
+    if key and SENSITIVE_KEY.search(key):
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: sanitize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v) for v in value[:MAX_LIST_ITEMS]]
+    if isinstance(value, str) and len(value) > MAX_STRING_LENGTH:
+        return f"<str:{len(value)}>"
+    return value
+
+
+def sanitize_query(query_dict):
+    return {
+        key: sanitize(values if len(values) > 1 else values[0], key)
+        for key, values in query_dict.lists()
+    }
+
+
+def sanitize_body(request):
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length > MAX_BODY_BYTES:
+        return f"<bytes:{length}>"
+
+    body = request.body
+    if not body:
+        return None
+    if "json" not in (request.content_type or ""):
+        return f"<bytes:{len(body)}>"
+    try:
+        return sanitize(json.loads(body))
+    except ValueError:
+        return f"<bytes:{len(body)}>"
+
+
+def user_pseudonym(request):
+    # DRF sets request.user on the underlying HttpRequest once it
+    # authenticates; session auth would otherwise resolve it lazily
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(),
+        str(user.id).encode(),
+        hashlib.sha256,
+    )
+    return digest.hexdigest()[:16]
+
+
+class TrafficRecordingMiddleware:
+    """
+    Put it first in MIDDLEWARE so duration_ms covers the whole stack.
+    Sync and async capable, like RequestMetricsMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "TRAFFIC_RECORD_PATH", None):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "TRAFFIC_RECORD_SAMPLE_RATE", 1.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.sampled():
+            return self.get_response(request)
+
+        line, started = self.start(request)
+        response = self.get_response(request)
+        self.finish(request, response, line, started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        line, started = self.start(request)
+        response = await self.get_response(request)
+        self.finish(request, response, line, started)
+        return response
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def start(self, request):
+        # read before the view does; the stream can't be read twice
+        line = {
+            "ts": round(time.time(), 3),
+            "method": request.method,
+            "path": request.path,
+            "query": sanitize_query(request.GET),
+            "body": sanitize_body(request),
+        }
+        return line, time.perf_counter()
+
+    def finish(self, request, response, line, started):
+        match = getattr(request, "resolver_match", None)
+        line.update({
+            "route": match.route if match else None,
+            "user": user_pseudonym(request),
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+        logger.info(json.dumps(line, default=str))
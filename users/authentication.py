@@ -0,0 +1,150 @@
+"""
+JWT authentication without a User query per request.
+
+Access tokens issued by users.serializers carry the claims in USER_CLAIMS.
+ClaimsJWTAuthentication trusts them (the token is signed) and returns a
+ClaimsUser, so id / username / is_superuser checks never touch the
+database. Anything else is read from a small process-local LRU/TTL cache
+of User rows, which is also what older tokens without the claims use.
+
+Views must use request.user.id (user_id=..., owner_id=...) rather than
+passing request.user to the ORM: a ClaimsUser is not a model instance.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CLAIMS = ("username", "email", "is_staff", "is_superuser")
+
+USER_CACHE_MAX_SIZE = 10000
+USER_CACHE_TTL_SECONDS = 300
+
+
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+
+
+class UserCache:
+    """
+    Bounded LRU of User rows with a TTL. Entries are dropped on User
+    save / delete (users/signals.py); other processes only see the
+    change after the TTL.
+    """
+    def __init__(self, max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id):
+        # token claims are strings, signal senders give the typed pk
+        return get_user_model()._meta.pk.to_python(user_id)
+
+    def get(self, user_id):
+        """
+        returns: a copy of the User (callers may mutate it), or None
+        """
+        user_id = self.key(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return copy.copy(entry[0])
+
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).first()
+        if user is None:
+            return None
+
+        with self._lock:
+            self._entries[user_id] = (user, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return copy.copy(user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(self.key(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserCache()
+
+
+def get_cached_user(user_id):
+    return user_cache.get(user_id)
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user backed by the token claims. Attributes the token doesn't
+    carry come from the cached User row, loaded on first access.
+    """
+    @cached_property
+    def id(self):
+        # views compare it with owner_id / user_id
+        return UserCache.key(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def user(self):
+        user = get_cached_user(self.id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return user
+
+    def __getattr__(self, attr):
+        if attr in self.token:
+            return self.token[attr]
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in for JWTAuthentication: same header, same errors, no User
+    query when the token carries USER_CLAIMS.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        if all(claim in validated_token for claim in USER_CLAIMS):
+            return ClaimsUser(validated_token)
+
+        # token issued before the claims were added
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import add_user_claims
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair with the user claims ClaimsJWTAuthentication trusts.
+    Access tokens copy them from the refresh token.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        add_user_claims(token, user)
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-reads the user on refresh, so a changed username / is_superuser
+    reaches new access tokens without waiting for the refresh token to
+    expire.
+    """
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
+
+        add_user_claims(refresh, user)
+        return super().validate({"refresh": str(refresh)})
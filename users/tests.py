@@ -1,3 +1,104 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import ClaimsJWTAuthentication, ClaimsUser, UserCache, user_cache
+from .serializers import ClaimsTokenObtainPairSerializer
+
+
+class UserTestData(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("player", email="player@example.com", password="x")
+
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+
+    def authenticate(self, token):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return ClaimsJWTAuthentication().authenticate(request)
+
+
+class ClaimsJWTAuthenticationTests(UserTestData):
+    def test_claims_token_needs_no_user_query(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(token)
+            self.assertIsInstance(user, ClaimsUser)
+            self.assertEqual(user.id, self.user.id)
+            self.assertEqual(user.username, "player")
+            self.assertFalse(user.is_superuser)
+
+        # anything the token doesn't carry comes from the cached row
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.user.date_joined)
+            self.assertEqual(user.last_login, self.user.last_login)
+
+    def test_token_without_claims_uses_the_user_cache(self):
+        token = AccessToken.for_user(self.user)
+
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(token)
+        self.assertIsInstance(user, User)
+        self.assertEqual(user.pk, self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.authenticate(token)
+
+    def test_deactivation_invalidates_the_cached_user(self):
+        token = AccessToken.for_user(self.user)
+        self.authenticate(token)
+
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+
+        with self.assertRaises(AuthenticationFailed) as ctx:
+            self.authenticate(token)
+        self.assertEqual(ctx.exception.get_codes(), "user_inactive")
+
+
+class UserCacheTests(UserTestData):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.others = [User.objects.create_user(f"player{i}", password="x") for i in range(2)]
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = UserCache(ttl=60)
+        with patch("users.authentication.time.monotonic", return_value=1000):
+            cache.get(self.user.id)
+        with patch("users.authentication.time.monotonic", return_value=1059), self.assertNumQueries(0):
+            self.assertEqual(cache.get(self.user.id).username, "player")
+        with patch("users.authentication.time.monotonic", return_value=1060), self.assertNumQueries(1):
+            cache.get(self.user.id)
+
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = UserCache(max_size=2)
+        first, second, third = self.user, *self.others
+        cache.get(first.id)
+        cache.get(second.id)
+        cache.get(first.id)  # now the most recently used
+        cache.get(third.id)
+
+        self.assertEqual(len(cache), 2)
+        with self.assertNumQueries(0):
+            cache.get(str(first.id))  # claims are strings
+            cache.get(third.id)
+        with self.assertNumQueries(1):
+            cache.get(second.id)
+
+    def test_callers_get_a_copy(self):
+        user_cache.get(self.user.id).username = "changed"
+        self.assertEqual(user_cache.get(self.user.id).username, "player")
+
+    def test_deleted_user_is_dropped(self):
+        user_id = self.others[0].id
+        user_cache.get(user_id)
+        self.others[0].delete()
+
+        self.assertIsNone(user_cache.get(user_id))